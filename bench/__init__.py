@@ -0,0 +1,6 @@
+"""
+bench
+Headless benchmark suite of the Neurotrace game: scripted stress scenarios run on the World
+without a window, measuring ticks/second, per-tick allocations and the slowest functions.
+Run it with: python -m bench
+"""
@@ -0,0 +1,194 @@
+"""
+__main__.py
+Runner of the benchmark suite.
+
+    python -m bench                                  run every scenario and print the report
+    python -m bench --scenario swarm_200 --ticks 1200
+    python -m bench --save-baseline baseline.json    store the results as the reference
+    python -m bench --baseline baseline.json         compare, exit 1 when a gated metric regressed
+    python -m bench --batched-ai                     same scenarios with the batched enemy update
+
+Each scenario runs from the same seed in three kinds of passes: timed passes (ticks/second and the profiler
+p50 of Player.update and the enemy updates, best of --repeat runs to filter out machine noise),
+a tracemalloc pass (allocations per tick) and a cProfile pass (slowest functions),
+so the tracing of one pass never slows down the timings of another.
+"""
+import argparse
+import cProfile
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+import src.profiler, src.enemy_batch
+from bench.scenarios import all_scenarios
+
+# profiler subsystems kept in the results: player is Player.update, enemies is every BaseEnemy.update of the tick
+SECTIONS = ("step", "player", "enemies", "bullets")
+# metrics checked against the baseline, and whether a bigger value is better
+GATED = {"ticks_per_second": True, "player_ms": False, "enemies_ms": False}
+# timings below this difference [ms] are noise, never a regression
+MIN_DELTA_MS = 0.01
+
+
+def with_batched_ai(build):
+    """build function of the scenario with the batched enemy update turned on"""
+    def batched_build():
+        world, tick = build()
+        world.enemy_batch = src.enemy_batch.EnemyBatch()
+        return world, tick
+    return batched_build
+
+
+def timed_pass(build, ticks):
+    """ticks/second and the p50 of each subsystem over the whole run"""
+    world, tick = build()
+    world.profiler = src.profiler.Profiler(window=ticks, trace_length=1)
+    world.profiler.enabled = True
+    start = time.perf_counter()
+    for index in range(ticks):
+        tick(index)
+    elapsed = time.perf_counter() - start
+    world.profiler.next_frame(world.frame)
+    result = {"ticks_per_second": round(ticks / elapsed, 1)}
+    for section in SECTIONS:
+        result[f"{section}_ms"] = round(world.profiler.percentiles(section)[0], 4)
+    result["enemies_at_end"] = len(world.all_enemies())
+    result["bullets_at_end"] = len(world.bullets)
+    return result
+
+
+def best_timed_pass(build, ticks, repeat):
+    """best result of `repeat` timed passes (highest ticks/second, lowest subsystem times)"""
+    best = None
+    for _ in range(repeat):
+        result = timed_pass(build, ticks)
+        if best is None:
+            best = result
+            continue
+        best["ticks_per_second"] = max(best["ticks_per_second"], result["ticks_per_second"])
+        for section in SECTIONS:
+            best[f"{section}_ms"] = min(best[f"{section}_ms"], result[f"{section}_ms"])
+    return best
+
+
+def allocation_pass(build, ticks):
+    """bytes allocated during a tick (peak above the start of the tick) and bytes kept per tick"""
+    world, tick = build()
+    tracemalloc.start()
+    start_memory = tracemalloc.get_traced_memory()[0]
+    allocated = 0
+    for index in range(ticks):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        tick(index)
+        allocated += tracemalloc.get_traced_memory()[1] - before
+    end_memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return {"alloc_bytes_per_tick": round(allocated / ticks), "kept_bytes_per_tick": round((end_memory - start_memory) / ticks)}
+
+
+def slowest_functions(build, ticks, top):
+    """the `top` functions with the most own time under cProfile"""
+    world, tick = build()
+    profile = cProfile.Profile()
+    profile.enable()
+    for index in range(ticks):
+        tick(index)
+    profile.disable()
+    stats = pstats.Stats(profile)
+    rows = []
+    for (filename, line, function), (calls, _, own, total, _) in stats.stats.items():
+        rows.append((own, total, calls, f"{function} ({filename.rsplit('/', 1)[-1]}:{line})"))
+    rows.sort(reverse=True)
+    return [{"function": name, "calls": calls, "own_ms": round(own * 1000, 2), "total_ms": round(total * 1000, 2)}
+            for own, total, calls, name in rows[:top]]
+
+
+def compare(results, baseline, threshold):
+    """
+    compare the gated metrics with the baseline
+    :return list of regression messages, empty when every metric is within the threshold
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            continue
+        for metric, bigger_is_better in GATED.items():
+            if metric not in reference:
+                continue
+            old = reference[metric]
+            new = result[metric]
+            if old <= 0:
+                continue
+            if bigger_is_better:
+                change = (old - new) / old
+            else:
+                if new - old < MIN_DELTA_MS:
+                    continue
+                change = (new - old) / old
+            if change > threshold:
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change * 100:.0f}% worse)")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m bench", description="Neurotrace headless benchmark suite")
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--ticks", type=int, default=600, help="ticks of the timed pass")
+    parser.add_argument("--repeat", type=int, default=3, help="timed passes per scenario, the best one is kept")
+    parser.add_argument("--alloc-ticks", type=int, default=200, help="ticks of the tracemalloc pass")
+    parser.add_argument("--profile-ticks", type=int, default=300, help="ticks of the cProfile pass")
+    parser.add_argument("--top", type=int, default=8, help="number of slowest functions shown")
+    parser.add_argument("--batched-ai", action="store_true", help="run the enemies with the batched update (src/enemy_batch.py)")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--save-baseline", help="write the results as the baseline file")
+    parser.add_argument("--baseline", help="compare with this baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown of a gated metric (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    scenarios = all_scenarios()
+    names = args.scenario or list(scenarios)
+    for name in names:
+        if name not in scenarios:
+            parser.error(f"unknown scenario {name}, choose from {', '.join(scenarios)}")
+
+    results = {}
+    for name in names:
+        build = scenarios[name]
+        if args.batched_ai:
+            build = with_batched_ai(build)
+        result = best_timed_pass(build, args.ticks, args.repeat)
+        result.update(allocation_pass(build, args.alloc_ticks))
+        result["slowest"] = slowest_functions(build, args.profile_ticks, args.top)
+        results[name] = result
+        print(f"== {name}: {result['ticks_per_second']} ticks/s, step p50 {result['step_ms']} ms, "
+              f"player {result['player_ms']} ms, enemies {result['enemies_ms']} ms, bullets {result['bullets_ms']} ms")
+        print(f"   {result['enemies_at_end']} enemies, {result['bullets_at_end']} bullets, "
+              f"{result['alloc_bytes_per_tick']} B allocated / tick, {result['kept_bytes_per_tick']} B kept / tick")
+        for row in result["slowest"]:
+            print(f"   {row['own_ms']:9.2f} ms own {row['total_ms']:9.2f} ms total {row['calls']:8d}x  {row['function']}")
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as file:
+            json.dump(results, file, indent=2)
+        print(f"baseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"REGRESSIONS (threshold {args.threshold * 100:.0f}%):")
+            for message in regressions:
+                print("   " + message)
+            return 1
+        print(f"no regression above {args.threshold * 100:.0f}% against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
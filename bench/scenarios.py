@@ -0,0 +1,112 @@
+"""
+scenarios.py
+Scripted stress scenarios of the benchmark suite.
+A scenario builds a seeded World and returns it with a tick function that feeds the inputs
+(and the forced stress) of every tick, so every run of a scenario simulates exactly the same frames.
+"""
+import random
+import src.structure, src.bullet_pool
+from src.world import World
+from src.inputs import InputFrame
+
+SEED = 20240601
+
+
+def scripted_inputs(tick):
+    """the same player script for every scenario: walk right and left, jump, fire forward"""
+    going_right = (tick // 240) % 2 == 0
+    return InputFrame(
+        left=not going_right,
+        right=going_right,
+        jump=tick % 90 == 0,
+        fire=tick % 15 == 0,
+        mouse_x=120 if going_right else 8,
+        mouse_y=64,
+    )
+
+
+def make_world(level):
+    """seeded world with god mode on, so the player survives the whole scenario"""
+    world = World(level, seed=SEED)
+    world.god_mode = True
+    return world
+
+
+def level_scenario(level):
+    """a level of STRUCTURE with its own enemies"""
+    def build():
+        world = make_world(level)
+
+        def tick(index):
+            world.step(scripted_inputs(index))
+        return world, tick
+    return build
+
+
+def swarm_scenario(count=200, level=3):
+    """`count` enemies of every regular type spread over the main floor of a level"""
+    def build():
+        world = make_world(level)
+        width = src.structure.STRUCTURE[level]["mapWH"][0]
+        for i in range(count):
+            ## cycle through the 8 regular enemy types (no boss), spread between the walls
+            x = 64 + (width - 128) * i // count
+            world.spawn_enemy(i % 8, x, 112)
+
+        def tick(index):
+            world.step(scripted_inputs(index))
+        return world, tick
+    return build
+
+
+def boss_scenario(level=4):
+    """boss fight where the boss summons minions and throws homing grenades all the time"""
+    def build():
+        world = make_world(level)
+        boss = world.enemies[0]
+
+        def tick(index):
+            ## restart both abilities as soon as they end (their timers are 30 frames)
+            if boss.alive:
+                if not boss.grenade_active:
+                    boss.grenade_active = True
+                    boss.grenade_timer = 30
+                if not boss.summon_active:
+                    boss.summon_active = True
+                    boss.summon_timer = 30
+                    boss.summon_flash = 0
+                    boss.summon_minions = []
+            world.step(scripted_inputs(index))
+        return world, tick
+    return build
+
+
+def bullets_scenario(count=1000, level=2):
+    """keep `count` bullets (player and enemy) alive in the air of a level"""
+    def build():
+        world = make_world(level)
+        width = src.structure.STRUCTURE[level]["mapWH"][0]
+        rng = random.Random(SEED)
+        owners = (src.bullet_pool.OWNER_PLAYER, src.bullet_pool.OWNER_ENEMY, src.bullet_pool.OWNER_TURRET)
+
+        def tick(index):
+            ## refill the bullets removed by floors, walls and bounds during the last tick
+            for i in range(count - len(world.bullets)):
+                owner = owners[i % 3]
+                vx = rng.choice((-3, -2, 2, 3))
+                world.bullets.spawn(rng.uniform(16, width - 16), rng.uniform(0, 56), vx, rng.uniform(-0.2, 0.2),
+                                    10, False, 1, owner)
+            world.step(scripted_inputs(index))
+        return world, tick
+    return build
+
+
+def all_scenarios():
+    """scenario name -> build function, in run order"""
+    scenarios = {}
+    for level in sorted(src.structure.STRUCTURE):
+        scenarios[f"level_{level}"] = level_scenario(level)
+    scenarios["swarm_200"] = swarm_scenario()
+    scenarios["boss_summons_grenades"] = boss_scenario()
+    scenarios["bullets_1000"] = bullets_scenario()
+    return scenarios
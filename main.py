@@ -1,30 +1,60 @@
-import pyxel, PyxelUniversalFont as pul
-from src import settings, game_status, player, map, camera
-from src.enemy import create_enemy
+import time
+# start of the startup report, before any other import
+STARTED = time.perf_counter()
+import argparse
+import atexit
+import pyxel
+from src import settings, game_status, profiler, assets
+
+# game modules (the simulation, NumPy, the draw code), imported by import_game() once the title screen is on screen
+world = map = replay = timestep = culler = hud = weapon_aims = InputFrame = None
+STARTUP = profiler.StartupTimer(STARTED)
+STARTUP.mark("imports")
+
+
+def import_game():
+    """import the game modules"""
+    global world, map, replay, timestep, culler, hud, weapon_aims, InputFrame
+    from src import world, map, replay, timestep
+    from src.culling import culler
+    from src.hud import hud
+    from src.enemy import weapon_aims
+    from src.inputs import InputFrame
 
 class Neurotrace:
     
     # === INIT AREA ===
 
-    def __init__(self):
-        self.debug_mode = False  # Debug mode flag
-        self.god_mode = False   # god mode 
-        self.infinite_ammo = False  # infinite ammo 
-        self.door_open = False  # Door state
-        self.door_proximity_distance = 32  # Distance to trigger door opening
+    def __init__(self, seed=None, record_path=None, startup_report=False):
+        self.seed = seed  # seed of the world random streams (None: random seed)
+        self.record_path = record_path  # record every input to this replay file (None: no recording)
+        self.startup_report = startup_report  # print the startup time of each phase
         self.initHelpers()  # Init Game Helpers 
         pyxel.init(settings.WINDOW_WIDTH, settings.WINDOW_HEIGHT, title=settings.GAME_TITLE, fps=settings.FPS)  # Init the game window
         pyxel.mouse(settings.CURSOR)  # Enable mouse cursor if specified in settings
+        STARTUP.mark("window")
+        # the rest of the game (modules, resources, world, map) loads behind the title screen, see loadGame 
+        self.world = None
+        self.first_frame_drawn = False
+
+    def loadGame(self):
+        """
+        Load the game once the title screen is on screen (the first frame does not wait for it)
+        """
+        STARTUP.mark("title screen")
+        import_game()
+        STARTUP.mark("game modules")
         # ! Load Resources first before map and player
         # Load resources from file 
         self.initResources()
-        # Init Player Module 
-        self.initPlayer()
-        # Init Map and Camera Module 
+        STARTUP.mark("resources")
+        # Init the simulation (player, enemies, camera) 
+        self.initWorld()
+        # Init Map Module for drawing 
         self.initMap()
-        # Init Player Postion in the map 
-        self.loadMap()
-        
+        STARTUP.mark("world")
+        if self.startup_report:
+            print(STARTUP.report())
 
     def initHelpers(self):
         """
@@ -33,25 +63,31 @@ class Neurotrace:
         self.GAME_STATUS = game_status.GameStatus()
 
     def initResources(self):
-        pyxel.load("src/assets.pyxres")
+        ## image banks and tilemaps from the asset cache (decoded once per version of the file)
+        assets.load_resources()
 
-    def initPlayer(self):
-        self.player = player.Player()
-        
+    def initWorld(self):
+        """
+        The world runs the whole game logic (player, enemies, bullets, boss) without touching pyxel,
+        the game window only feeds it inputs and draws it 
+        """
+        import_game()
+        self.world = world.World(seed=self.seed)
+        # fixed-step loop: the world steps at SIM_FPS whatever the draw rate (see src/timestep.py)
+        self.timestep = timestep.FixedTimestep()
+        self.interpolator = timestep.RenderInterpolator()
+        ## in lockstep (FPS == SIM_FPS) the last step is drawn as is
+        self.interpolate = settings.RENDER_INTERPOLATION and settings.FPS != settings.SIM_FPS
+        # presses of window frames that ran no step, given to the next step
+        self.pending_inputs = None
+        self.recorder = None
+        if self.record_path:
+            self.recorder = replay.ReplayRecorder(self.record_path, self.world.seed, self.world.level)
+            ## pyxel exits the process when the window closes, finish the file (with the state digest) there
+            atexit.register(lambda: self.recorder.close(self.world))
 
     def initMap(self):
-        self.level = 0
         self.map = map.Map()
-        self.camera = camera.Camera()
-        # Spawn enemies
-        self.enemies = []
-        ## Get enemies as defined in the structure 
-        for enemy_info in self.map.structure[self.level]["enemies"]:
-            type_index, x, y = enemy_info
-            self.enemies.append(create_enemy(type_index, x, y, self.level))
-
-    def loadMap(self, level = 0):
-        self.player.resetPlayerPos()
 
     # === END OF INIT AREA === 
 
@@ -61,33 +97,35 @@ class Neurotrace:
 
     def restart_game(self):
         # Reset all game state for a fresh start
-        self.level = 0
         self.GAME_STATUS.set_status(1)  # Set to playing
-        self.initPlayer()
-        self.initMap()
-        self.loadMap(self.level)
-        self.god_mode = False
-        self.infinite_ammo = False
-        self.door_open = False
-        # self.debug_mode = False
+        self.world.reset()
+        self.timestep.reset()
+        if self.recorder:
+            self.recorder.mark_reset()
+        # self.world.debug_mode = False
 
     def update(self):
+        if self.world is None:
+            ## the title screen is on screen: load the game now
+            if not self.first_frame_drawn:
+                return
+            self.loadGame()
         ## get camera offset 
-        self.camera_x, self.camera_y = self.camera.get_offset()
+        self.world.camera_x, self.world.camera_y = self.world.camera.get_offset()
         if self.GAME_STATUS.is_menu():
             if pyxel.btnp(pyxel.KEY_SPACE):
                 self.GAME_STATUS.set_status(1)
+                self.timestep.reset()
             return 
 
         # if player dead 
-        if self.player.health <= 0:
+        if self.world.is_player_dead():
             self.GAME_STATUS.set_status(3)
 
         # If boss is present and dead, set win status
-        for enemy in self.enemies:
-            if enemy.__class__.__name__ == "BossEnemy" and not enemy.alive:
-                self.GAME_STATUS.set_status(5)
-                return 
+        if self.world.is_boss_defeated():
+            self.GAME_STATUS.set_status(5)
+            return 
 
         if self.GAME_STATUS.is_game_over() or self.GAME_STATUS.is_winning():
             if pyxel.btnp(pyxel.KEY_R):
@@ -95,167 +133,44 @@ class Neurotrace:
             return 
 
 
-        # Toggle debug mode with F3 Key
-        if pyxel.btnp(pyxel.KEY_F3):
-            self.debug_mode = not self.debug_mode
-
-        if self.debug_mode:
-            if pyxel.btnp(pyxel.KEY_0):
-                self.player.speed += 1
-            if pyxel.btnp(pyxel.KEY_9):
-                self.player.speed -= 1
-        else:
-            self.player.speed = settings.PLAYER_SPEED
-
-        # Toggle god_mode with F4 Key 
-        if pyxel.btnp(pyxel.KEY_F4):
-            self.god_mode = not self.god_mode
-
-        if pyxel.btnp(pyxel.KEY_F5):
-            self.infinite_ammo = not self.infinite_ammo
-
-        # if player in god mode, always in full hp 
-        if self.god_mode:
-            self.player.health = 400
-
-        # if player in infinite ammo, always in full ammo 
-        if self.infinite_ammo:
-            self.player.ammo = self.ammo = [8, 30, 10]
-
-        # Reset player movement flag at the start of update
-        self.player.is_moving = False 
-
-        # Prevent all actions if player is dead
-        if not self.player.alive:
+        # the frame profiler runs while the debug overlay is shown, F6 exports its trace 
+        self.world.profiler.enabled = self.world.debug_mode
+        if self.world.debug_mode and pyxel.btnp(pyxel.KEY_F6):
+            self.export_profile()
+
+        # GAME MAIN UPDATE function: the simulation steps due since the last frame, with this frame's inputs 
+        ## debug keys (F3 debug, F4 god mode, F5 infinite ammo, 0/9 speed) are part of the inputs 
+        inputs = InputFrame.from_pyxel()
+        if self.pending_inputs:
+            inputs.latch(self.pending_inputs)
+        steps = self.timestep.advance()
+        if steps == 0:
+            ## drawing faster than the simulation: keep the presses for the next step
+            self.pending_inputs = inputs
             return
-        
-        # Player Movement 
-        ## Move Left 
-        if pyxel.btn(pyxel.KEY_A):
-            self.player.moveLeft()
-
-        ## Move Right 
-        elif pyxel.btn(pyxel.KEY_D):
-            self.player.moveRight()
-
-        ## Jump control
-        if pyxel.btnp(pyxel.KEY_SPACE):
-            self.player.jump()
-
-        ## Dash control
-        if pyxel.btnp(pyxel.KEY_CTRL):
-            self.player.dash()
-
-        # Update camera to follow player
-        ## Get the map width from the structure 
-        map_width = self.map.structure[self.level]["mapWH"][0]
-        ## update the camera: to center the player, since player is 16*16, we need to move right and move down 8 (half of the player)
-        self.camera.update(self.player.x + 8, self.player.y + 8, map_width)
-        
-
-        # Fire control
-        if pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT):
-            self.player.fire(self.camera_x)
-
-        # Portal interaction
-        if pyxel.btnp(pyxel.KEY_Z):
-            self.check_portal_interaction()
-            
-
-        # Check door proximity: if player approaches the portal, the door open. 
-        self.check_door_proximity()
-
-        # PLAYER MAIN UPDATE function
-        self.player.update(self.level, self.camera_x, self.enemies)
-
-        # ENEMIES MAIN UPDATE function 
-        for enemy in self.enemies:
-            ## if BOSS summon 
-            if hasattr(enemy, 'summon_active'):
-                enemy.update(self.player, self.camera_x, self.enemies)
-            else:
-                ## regular update each enemy 
-                enemy.update(self.player, self.camera_x)
-
-        # Check for collisions for player's firing 
-        if self.player.is_firing and self.player.fire_line:
-            ## get the bullet position 
-            x0, y0, x1, y1 = self.player.fire_line
-            for enemy in self.enemies:
-                ## only check when enemies are still alive 
-                if enemy.alive:
-                    ## get enemy position 
-                    ex, ey = enemy.x, enemy.y 
-                    ## if collide, enemy take damage 
-                    if self.line_intersects_rect(x0, y0, x1, y1, ex, ey, 16, 16):
-                        enemy.take_damage(1)
-
-    def check_portal_interaction(self):
-        """
-        Check if player is near portal and handle level transition
-        function is triggered when player press 'z' to go to next level 
-        """
-        if "portal" in self.map.structure[self.level]:
-            portal = self.map.structure[self.level]["portal"]
-            if portal is not None:
-                ## get portal position and size
-                portal_x, portal_y, portal_w, portal_h = portal
-                ## get player positon 
-                player_x, player_y = self.player.x, self.player.y
-                ## Check if player is within portal area
-                if (portal_x <= player_x <= portal_x + portal_w and 
-                    portal_y <= player_y <= portal_y + portal_h):
-                    ## trigger transition: move the player and let camera follow 
-                    self.transition_to_next_level()
-
-    def check_door_proximity(self):
-        """Check if player is near the door and update door state"""
-        if "portal" in self.map.structure[self.level]:
-            portal = self.map.structure[self.level]["portal"]
-            if portal is not None:
-                ## get portal position [absolute] and size 
-                portal_x, portal_y, portal_w, portal_h = portal
-                ## get center position of player 
-                player_x, player_y = self.player.x + 8, self.player.y + 8  # Player center
-                ## Calculate distance between player and door (center)
-                door_center_x = portal_x + portal_w // 2
-                door_center_y = portal_y + portal_h // 2
-                ## calculate the distance using Euclidean distance formula: sqrt((x2 - x1)^2 + (y2 - y1)^2)
-                distance = ((player_x - door_center_x) ** 2 + (player_y - door_center_y) ** 2) ** 0.5
-                ## Update door state based on proximity
-                self.door_open = distance <= self.door_proximity_distance
-            else:
-                ## door will never open since there is no door 
-                self.door_open = False
-
-    def transition_to_next_level(self):
-        """Transition to the next level"""
-        # increment to game level 
-        self.level += 1
-        self.player.level += 1
-        # print("Function called")
-        # self.player.level += 1
-        # if the level is in the map 
-        if self.level in self.map.structure:
-            ## Clear current enemies
-            self.enemies = []
-            ## Spawn new enemies for the new level
-            for enemy_info in self.map.structure[self.level]["enemies"]:
-                type_index, x, y = enemy_info
-                self.enemies.append(create_enemy(type_index, x, y, self.level))
-            ## Reset player position for new level
-            self.player.resetPlayerPos(self.level)
-        else:
-            ## TODO: If no more levels, go back to level 0
-            self.level = 0
-            self.enemies = []
-            for enemy_info in self.map.structure[self.level]["enemies"]:
-                type_index, x, y = enemy_info
-                self.enemies.append(create_enemy(type_index, x, y, self.level))
-            self.player.resetPlayerPos(self.level)
+        self.pending_inputs = None
+        for i in range(steps):
+            if self.interpolate and i == steps - 1:
+                self.interpolator.capture(self.world)
+            if self.recorder:
+                self.recorder.record(inputs)
+            self.world.step(inputs)
+            if self.world.is_finished():
+                break
+            ## catch-up steps: the keys are still held, the presses were used by the first step
+            inputs = inputs.held_only()
+
+    def export_profile(self):
+        """write the profiler trace of the last frames next to the game (CSV and JSON)"""
+        name = time.strftime("profile_%Y%m%d_%H%M%S")
+        self.world.profiler.export(name + ".csv")
+        self.world.profiler.export(name + ".json")
 
     def draw(self):
         # MAIN DRAWING FUNCTION 
+        ## frame skipping: the simulation is behind, keep the last frame on screen 
+        if self.GAME_STATUS.is_playing() and not self.timestep.should_draw():
+            return
         # clear screen 
         pyxel.cls(0)
 
@@ -263,6 +178,9 @@ class Neurotrace:
         if self.GAME_STATUS.is_menu():
             ## show the game title 
             self.GAME_STATUS.showGameTitle()
+            if not self.first_frame_drawn:
+                self.first_frame_drawn = True
+                STARTUP.mark("first frame")
 
         elif self.GAME_STATUS.is_game_over():
             self.GAME_STATUS.showGameOver()
@@ -275,48 +193,56 @@ class Neurotrace:
 
         # if in the game 
         elif self.GAME_STATUS.is_playing():
+            camera_x = self.world.camera_x
+            player = self.world.player
+            frame_profiler = self.world.profiler
+            culler.begin_frame()
+            ## positions between the last two steps (put back at the end of the draw)
+            if self.interpolate:
+                self.interpolator.apply(self.world, self.timestep.alpha)
+                camera_x = self.world.camera_x
             ## draw the game map (something needs to draw apart from the map itself (most interactable item) such as portal)
-            self.map.drawMap(self.level, self.camera_x, self.door_open)
+            start = frame_profiler.stamp()
+            self.map.drawMap(self.world.level, camera_x, self.world.door_open)
+            frame_profiler.add("map_draw", start)
 
+            start = frame_profiler.stamp()
             ## PLAYER MAIN DRAWING function 
-            self.player.draw(self.camera_x, self.level)
-            ## ENEMIES MAIN DRAWING function 
-            for enemy in self.enemies:
-                enemy.draw(self.camera_x, target=self.player)
+            player.draw(camera_x, self.world.level)
+            ## ENEMIES MAIN DRAWING function: the corpses below the live enemies 
+            for enemy in self.world.corpses:
+                enemy.draw(camera_x, target=player)
+            ## weapon aims of every enemy at once 
+            aims = weapon_aims(self.world.enemies, player)
+            for enemy, aim in zip(self.world.enemies, aims):
+                enemy.draw(camera_x, target=player, aim=aim)
+            ## BULLETS MAIN DRAWING function 
+            self.world.bullets.draw(camera_x)
+            frame_profiler.add("entity_draw", start)
+            frame_profiler.count("draw_culled", culler.culled)
+            frame_profiler.count("hud_renders", hud.frame_renders)
             # Debug 
-            if self.debug_mode:
-                px, py = int(self.player.x), int(self.player.y)
+            if self.world.debug_mode:
+                px, py = int(player.x), int(player.y)
                 pyxel.text(5, 25, f"Player: ({px}, {py})", 11)
-                pyxel.text(5, 35, f"God Mode: {"Yes" if self.god_mode else "No"}", 11)
-                pyxel.text(5, 45, f"Infinite Ammo: {"Yes" if self.infinite_ammo else "No"}", 11)
-                pyxel.text(5, 55, f"Player Speed: {self.player.speed}", 11)
-            
-    def line_intersects_rect(self, x0, y0, x1, y1, rx, ry, rw, rh):
-        """This function checks collision"""
-        # Simple AABB vs line segment check
-        # Check if either endpoint is inside the rect
-        if rx <= x0 <= rx+rw and ry <= y0 <= ry+rh:
-            return True
-        if rx <= x1 <= rx+rw and ry <= y1 <= ry+rh:
-            return True
-        # Check for intersection with each edge
-        ## [CODE referemce from Online]
-        ## "line segment intersection" algorithm using the "counter-clockwise (CCW) test" from computational geometry from internet
-        def ccw(A, B, C):
-            return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
-        def intersect(A,B,C,D):
-            return ccw(A,C,D) != ccw(B,C,D) and ccw(A,B,C) != ccw(A,B,D)
-        rect_edges = [
-            ((rx,ry), (rx+rw,ry)),
-            ((rx+rw,ry), (rx+rw,ry+rh)),
-            ((rx+rw,ry+rh), (rx,ry+rh)),
-            ((rx,ry+rh), (rx,ry)),
-        ]
-        for edge in rect_edges:
-            if intersect((x0,y0), (x1,y1), edge[0], edge[1]):
-                return True
-        return False
+                pyxel.text(5, 35, f"God Mode: {'Yes' if self.world.god_mode else 'No'}", 11)
+                pyxel.text(5, 45, f"Infinite Ammo: {'Yes' if self.world.infinite_ammo else 'No'}", 11)
+                pyxel.text(5, 55, f"Player Speed: {player.speed}", 11)
+                ## profiler: entity counts, then rolling p50/p99 [ms] of each subsystem 
+                alive = len(self.world.enemies) + self.world.chunks.parked_count
+                pyxel.text(5, 65, f"Enemies: {alive}/{alive + len(self.world.corpses)} Bullets: {len(self.world.bullets)}", 10)
+                pyxel.text(5, 71, f"Draws: {culler.drawn} Culled: {culler.culled} HUD/s: {hud.renders_per_second()}", 10)
+                for i, section in enumerate(profiler.OVERLAY_SECTIONS):
+                    p50, p99 = frame_profiler.percentiles(section)
+                    pyxel.text(5, 77 + i * 6, f"{section:<11}{p50:5.2f}{p99:6.2f}", 10)
+            if self.interpolate:
+                self.interpolator.restore(self.world)
 
 if __name__ == "__main__":
-    game = Neurotrace()
+    parser = argparse.ArgumentParser(description=settings.GAME_TITLE)
+    parser.add_argument("--seed", type=int, default=None, help="seed of the world random streams (non-negative integer)")
+    parser.add_argument("--record", default=None, help="record the inputs to a replay file (play it with python -m src.replay)")
+    parser.add_argument("--startup-report", action="store_true", help="print the time of each startup phase")
+    args = parser.parse_args()
+    game = Neurotrace(seed=args.seed, record_path=args.record, startup_report=args.startup_report)
     game.run()
\ No newline at end of file
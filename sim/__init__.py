@@ -0,0 +1,7 @@
+"""
+sim
+Headless batch simulator of the Neurotrace game (neurotrace-sim): balance sweeps of thousands of episodes
+over levels and tuning values (src/settings.py, enemy and player constants), spread over a process pool,
+with the per-episode results (time to clear, damage taken, frames simulated) in a columnar results file.
+Run it with: python -m sim
+"""
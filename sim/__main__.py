@@ -0,0 +1,183 @@
+"""
+__main__.py
+Runner of the batch simulator (neurotrace-sim).
+
+    python -m sim --level 0 --episodes 1000 --out results.npz
+    python -m sim --level 4 --policy random --param BossEnemy.hp=600,700,900 --param BossEnemy.berserk_attack_mult=0.5,0.75
+    python -m sim --level 1 --level 2 --param settings.GRAVITY=0.18,0.2,0.22 --workers 8 --out gravity.csv
+
+Every (level, tuning point) of the sweep gets --episodes episodes, split in tasks of --batch episodes spread over
+a multiprocessing pool: a worker applies the tuning of its task once, plays its episodes and sends their results back.
+Results are streamed to the output file as the tasks finish: .csv files get a row per episode right away,
+.npz files get one NumPy array per column (flushed every --flush episodes, so an interrupted sweep keeps its results).
+Episode seeds only depend on --seed and the episode rank in the sweep, so a sweep gives the same results on any number of workers.
+"""
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import sys
+import time
+import numpy as np
+import src.structure
+from sim.episodes import POLICIES, CLEARED, DEAD, run_episode, tuning
+
+# result columns, the tuning values follow
+COLUMNS = ("level", "seed", "outcome", "clear_frames", "frames", "damage_taken", "health_left")
+
+
+def parse_param(text):
+    """NAME=v1,v2,... -> (NAME, [values])"""
+    name, sep, values = text.partition("=")
+    if not sep or not values:
+        raise argparse.ArgumentTypeError(f"{text} is not NAME=value[,value...]")
+    parsed = []
+    for value in values.split(","):
+        try:
+            parsed.append(int(value))
+        except ValueError:
+            try:
+                parsed.append(float(value))
+            except ValueError:
+                raise argparse.ArgumentTypeError(f"{value} of {name} is not a number")
+    return name, parsed
+
+
+def make_tasks(levels, points, episodes, batch, seed, policy, max_frames):
+    """one task per `batch` episodes of a (level, tuning point), with the seeds of its episodes"""
+    tasks = []
+    rank = 0
+    for level in levels:
+        for point in points:
+            for start in range(0, episodes, batch):
+                count = min(batch, episodes - start)
+                tasks.append((level, point, list(range(seed + rank, seed + rank + count)), policy, max_frames))
+                rank += count
+    return tasks
+
+
+def run_task(task):
+    """worker side: play the episodes of a task with its tuning applied"""
+    level, point, seeds, policy, max_frames = task
+    results = []
+    with tuning(point):
+        for seed in seeds:
+            result = run_episode(level, seed, POLICIES[policy], max_frames)
+            result.update(point)
+            results.append(result)
+    return results
+
+
+class CsvSink:
+    """one row per episode, written as soon as it arrives"""
+    def __init__(self, path, columns):
+        self.file = open(path, "w", newline="")
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, results):
+        self.writer.writerows(results)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class NpzSink:
+    """one array per column, the file is rewritten every `flush` episodes and when the sweep ends"""
+    def __init__(self, path, columns, flush):
+        self.path = path
+        self.columns = {name: [] for name in columns}
+        self.flush = flush
+        self.pending = 0
+
+    def write(self, results):
+        for result in results:
+            for name, values in self.columns.items():
+                values.append(result[name])
+        self.pending += len(results)
+        if self.pending >= self.flush:
+            self.save()
+
+    def save(self):
+        ## write next to the file then rename, a reader never sees half a file
+        temp = self.path + ".tmp.npz"
+        np.savez(temp, **{name: np.array(values) for name, values in self.columns.items()})
+        os.replace(temp, self.path)
+        self.pending = 0
+
+    def close(self):
+        self.save()
+
+
+def open_sink(path, columns, flush):
+    if path.endswith(".csv"):
+        return CsvSink(path, columns)
+    if path.endswith(".npz"):
+        return NpzSink(path, columns, flush)
+    raise ValueError(f"unsupported results file {path} (use .csv or .npz)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="neurotrace-sim", description="Neurotrace headless batch simulator for balance sweeps")
+    parser.add_argument("--level", type=int, action="append", help="level to play (repeatable, default every level)")
+    parser.add_argument("--episodes", type=int, default=100, help="episodes per level and tuning point")
+    parser.add_argument("--policy", choices=sorted(POLICIES), default="scripted", help="player policy")
+    parser.add_argument("--param", type=parse_param, action="append", default=[],
+                        help="tuning values NAME=v1,v2,... (settings.GRAVITY, BossEnemy.hp...), repeatable: the sweep is their grid")
+    parser.add_argument("--max-frames", type=int, default=60 * 120, help="frame budget of an episode")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first episode")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--batch", type=int, default=8, help="episodes per task")
+    parser.add_argument("--out", default="sim_results.npz", help="results file (.npz columns or .csv rows)")
+    parser.add_argument("--flush", type=int, default=500, help="episodes between two writes of an .npz file")
+    args = parser.parse_args(argv)
+
+    levels = args.level or sorted(src.structure.STRUCTURE)
+    for level in levels:
+        if level not in src.structure.STRUCTURE:
+            parser.error(f"unknown level {level}, choose from {', '.join(map(str, sorted(src.structure.STRUCTURE)))}")
+    if args.episodes < 1 or args.batch < 1 or args.workers < 1:
+        parser.error("--episodes, --batch and --workers must be positive")
+    names = [name for name, _ in args.param]
+    if len(set(names)) != len(names):
+        parser.error("a tuning value is given twice")
+    points = [dict(zip(names, values)) for values in itertools.product(*(values for _, values in args.param))]
+    ## check the names here rather than in every worker
+    try:
+        for point in points[:1]:
+            with tuning(point):
+                pass
+    except ValueError as error:
+        parser.error(str(error))
+
+    tasks = make_tasks(levels, points, args.episodes, args.batch, args.seed, args.policy, args.max_frames)
+    total = sum(len(task[2]) for task in tasks)
+    sink = open_sink(args.out, COLUMNS + tuple(names), args.flush)
+    print(f"{total} episodes ({len(levels)} levels x {len(points)} tuning points x {args.episodes}) "
+          f"on {args.workers} workers, {len(tasks)} tasks")
+    outcomes = {CLEARED: 0, DEAD: 0}
+    done = frames = 0
+    start = time.perf_counter()
+    try:
+        with multiprocessing.Pool(args.workers) as pool:
+            ## unordered: a slow task never holds back the results of the others
+            for results in pool.imap_unordered(run_task, tasks):
+                sink.write(results)
+                for result in results:
+                    outcomes[result["outcome"]] = outcomes.get(result["outcome"], 0) + 1
+                    frames += result["frames"]
+                done += len(results)
+                elapsed = time.perf_counter() - start
+                print(f"\r{done}/{total} episodes, {done / elapsed:.1f} episodes/s, {frames / elapsed:.0f} frames/s",
+                      end="", flush=True)
+    finally:
+        sink.close()
+    print(f"\n{outcomes.get(CLEARED, 0)} cleared, {outcomes.get(DEAD, 0)} dead, "
+          f"{done - outcomes.get(CLEARED, 0) - outcomes.get(DEAD, 0)} out of time, results in {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""
+episodes.py
+Headless episodes of the batch simulator: a tuned World played by a player policy until the level is cleared,
+the player dies or the frame budget runs out.
+Tuning values are named "settings.NAME" (src/settings.py) or "Class.attribute" (a class of src/enemy.py or the Player):
+class constants are set on the class (and the subclasses overriding them), values the constructor sets
+(hp, miss_chance...) are set on every instance built while the tuning is applied.
+"""
+import contextlib
+import random
+import types
+import src.settings, src.enemy, src.player
+from src.world import World
+from src.inputs import InputFrame
+
+# settings copied into class constants when the modules are imported: tuning the setting updates them too
+SETTING_BINDINGS = {
+    "GRAVITY": ((src.player.Player, "gravity"), (src.enemy.BaseEnemy, "gravity")),
+    "PLAYER_JUMP_SPEED": ((src.player.Player, "jump_speed"),),
+}
+# marks an attribute the class did not define itself (undo deletes it)
+MISSING = object()
+
+# episode outcomes
+CLEARED = "cleared"
+DEAD = "dead"
+TIMEOUT = "timeout"
+
+
+def tunable_class(name):
+    """the class a tuning value applies to"""
+    if name == "Player":
+        return src.player.Player
+    cls = getattr(src.enemy, name, None)
+    if not isinstance(cls, type):
+        raise ValueError(f"unknown class {name} (use settings.NAME, Player.attribute or an enemy class of src/enemy.py)")
+    return cls
+
+
+def subclasses(cls):
+    """the class and every class deriving from it"""
+    found = [cls]
+    for sub in cls.__subclasses__():
+        found.extend(subclasses(sub))
+    return found
+
+
+def set_attribute(undo, target, name, value):
+    """set an attribute and remember how to restore it"""
+    undo.append((target, name, target.__dict__.get(name, MISSING)))
+    setattr(target, name, value)
+
+
+def instance_tuner(cls, name, value, init):
+    """constructor of `cls` (or of a subclass) that sets the tuned value once the original one ran"""
+    def tuned_init(self, *args, **kwargs):
+        init(self, *args, **kwargs)
+        if isinstance(self, cls):
+            setattr(self, name, value)
+            ## HumanEnemy3 restores its miss chance from this copy after camouflage
+            if hasattr(self, "original_" + name):
+                setattr(self, "original_" + name, value)
+    return tuned_init
+
+
+def apply_tuning(name, value, undo):
+    owner, _, attribute = name.partition(".")
+    if not attribute:
+        raise ValueError(f"tuning value {name} is not settings.NAME or Class.attribute")
+    if owner == "settings":
+        if not hasattr(src.settings, attribute):
+            raise ValueError(f"unknown setting {attribute}")
+        set_attribute(undo, src.settings, attribute, value)
+        for cls, bound in SETTING_BINDINGS.get(attribute, ()):
+            set_attribute(undo, cls, bound, value)
+        return
+    cls = tunable_class(owner)
+    current = getattr(cls, attribute, MISSING)
+    ## the classes use __slots__: an attribute the instances can hold is a class constant or a slot
+    if current is MISSING:
+        raise ValueError(f"unknown attribute {name} ({owner} has no class constant or slot {attribute})")
+    ## slots (the values set by the constructor) live on the instances
+    if isinstance(current, types.MemberDescriptorType):
+        for sub in subclasses(cls):
+            set_attribute(undo, sub, "__init__", instance_tuner(cls, attribute, value, sub.__init__))
+        return
+    for sub in subclasses(cls):
+        if sub is cls or attribute in sub.__dict__:
+            set_attribute(undo, sub, attribute, value)
+
+
+@contextlib.contextmanager
+def tuning(values):
+    """apply the tuning values {name: value} for the worlds built inside the block, then restore the defaults"""
+    undo = []
+    try:
+        for name, value in values.items():
+            apply_tuning(name, value, undo)
+        yield
+    finally:
+        for target, name, old in reversed(undo):
+            if old is MISSING:
+                delattr(target, name)
+            else:
+                setattr(target, name, old)
+
+
+# === PLAYER POLICIES ===
+# a policy gets the world, its random stream and the tick, and returns the InputFrame of the tick
+
+
+def nearest_enemy(world):
+    player = world.player
+    best = None
+    for enemy in world.enemies:
+        if enemy.alive and (best is None or abs(enemy.x - player.x) < abs(best.x - player.x)):
+            best = enemy
+    return best
+
+
+def scripted_policy(world, rng, tick):
+    """walk to the portal, jump now and then, shoot the nearest enemy in range, reload when empty"""
+    player = world.player
+    target = nearest_enemy(world)
+    if target is not None and abs(target.x - player.x) < src.settings.WINDOW_WIDTH // 2:
+        mouse_x, mouse_y = target.x + 8 - world.camera_x, target.y + 8 - world.camera_y
+        fire = tick % 8 == 0
+    else:
+        mouse_x, mouse_y = src.settings.WINDOW_WIDTH - 8, player.y + 8 - world.camera_y
+        fire = False
+    return InputFrame(
+        right=True,
+        jump=tick % 60 == 0 or rng.random() < 0.01,
+        fire=fire,
+        reload=player.ammo[player.current_weapon] == 0,
+        interact=world.door_open,
+        medkit=player.health < player.max_health // 4,
+        mouse_x=mouse_x,
+        mouse_y=mouse_y,
+    )
+
+
+def random_policy(world, rng, tick):
+    """random buttons, leaning right so the episode moves through the level"""
+    return InputFrame(
+        left=rng.random() < 0.2,
+        right=rng.random() < 0.6,
+        jump=rng.random() < 0.03,
+        dash=rng.random() < 0.01,
+        fire=rng.random() < 0.1,
+        reload=rng.random() < 0.01,
+        shield=rng.random() < 0.05,
+        interact=world.door_open,
+        mouse_x=rng.randrange(src.settings.WINDOW_WIDTH),
+        mouse_y=rng.randrange(src.settings.WINDOW_HEIGHT),
+    )
+
+
+POLICIES = {"scripted": scripted_policy, "random": random_policy}
+
+
+def run_episode(level, seed, policy, max_frames):
+    """
+    play one episode of a level (with the tuning of the caller applied)
+    :return dict of the episode results
+    """
+    world = World(level, seed=seed)
+    rng = random.Random(seed)
+    player = world.player
+    health = player.health
+    damage = 0
+    outcome = TIMEOUT
+    while world.frame < max_frames:
+        world.step(policy(world, rng, world.frame))
+        ## med kits heal: only the drops count
+        if player.health < health:
+            damage += health - player.health
+        health = player.health
+        if world.is_player_dead():
+            outcome = DEAD
+            break
+        if world.level != level or world.is_boss_defeated():
+            outcome = CLEARED
+            break
+    return {
+        "level": level,
+        "seed": seed,
+        "outcome": outcome,
+        "clear_frames": world.frame if outcome == CLEARED else -1,
+        "frames": world.frame,
+        "damage_taken": damage,
+        "health_left": player.health,
+    }
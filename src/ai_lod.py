@@ -0,0 +1,113 @@
+"""
+ai_lod.py
+This module provides the AI level-of-detail scheduler of the Neurotrace game.
+Enemies near the camera view run their full update every frame. An enemy away from the view
+that is only patrolling (see BaseEnemy.is_quiescent) while the player is out of attack range of its whole
+patrol envelope goes to sleep: its frames are counted instead of simulated, and replayed in one go
+by BaseEnemy.fast_forward when it wakes up (mid-range enemies every few frames, far ones only on wake-up).
+A sleeping patrol only depends on its own random stream, so the replay gives exactly the state
+the full update would have reached, and gameplay does not change.
+An enemy wakes up (and catches up) before anything can read its position: the player comes in range,
+the envelope nears the view, a player bullet enters the envelope, or the player's fire line is active.
+"""
+import numpy as np
+import src.settings, src.bullet_pool
+
+# enemies whose patrol envelope is within this distance of the view [px] always run the full update
+NEAR_MARGIN = 32
+# asleep enemies within this distance of the view are caught up every MID_INTERVAL frames
+MID_DISTANCE = 256
+MID_INTERVAL = 8
+
+
+class AILodScheduler:
+    def __init__(self):
+        # False: every enemy runs the full update every frame (reference behaviour)
+        self.enabled = True
+        # view of the current frame, expanded by NEAR_MARGIN [absolute x]
+        self.view_left = 0
+        self.view_right = 0
+        # True when every enemy has to be up to date this frame
+        self.hold = False
+        # counters of the current frame (debug overlay / profiler)
+        self.asleep = 0
+        self.woken = 0
+
+    def begin_frame(self, enemies, player, camera_x):
+        """prepare the frame, call it before the player update (the sniper line reads every enemy)"""
+        self.view_left = camera_x - NEAR_MARGIN
+        self.view_right = camera_x + src.settings.WINDOW_WIDTH + NEAR_MARGIN
+        self.asleep = 0
+        self.woken = 0
+        self.hold = not self.enabled or bool(player.is_firing and player.fire_line)
+        if self.hold:
+            self.wake_all(enemies)
+
+    def skip(self, enemy, player):
+        """
+        decide if the enemy sleeps through this frame (call it in place of enemy.update)
+        :return True if the frame was skipped (or already replayed), False if enemy.update has to run
+        """
+        if self.hold:
+            return False
+        envelope = enemy.lod_envelope
+        if envelope is None:
+            ## only a quiescent enemy whose patrol stays on one floor between the walls can fall asleep
+            if not enemy.is_quiescent():
+                return False
+            patrol = enemy.patrol_envelope()
+            if patrol is None:
+                return False
+            left, right = patrol
+            ## the player wakes the enemy up inside [wake left, wake right]: attack range of any x of the envelope
+            attack_max = enemy.ai_thresholds()[2]
+            envelope = (left, right, left - attack_max, right + attack_max)
+        left, right, wake_left, wake_right = envelope
+        ## the player must stay out of attack range, and the envelope out of view
+        if wake_left < player.x < wake_right or (left < self.view_right and self.view_left < right + 16):
+            if enemy.lod_envelope is not None:
+                self.wake(enemy)
+            return False
+        enemy.lod_envelope = envelope
+        enemy.lod_pending += 1
+        self.asleep += 1
+        ## mid-range: catch up every few frames so wake-ups stay small
+        if enemy.lod_pending >= MID_INTERVAL and left - MID_DISTANCE < self.view_right and self.view_left < right + 16 + MID_DISTANCE:
+            enemy.catch_up()
+        return True
+
+    def wake(self, enemy):
+        """catch up an asleep enemy and put it back on the full update"""
+        enemy.catch_up()
+        enemy.lod_envelope = None
+        self.woken += 1
+
+    def wake_all(self, enemies):
+        for enemy in enemies:
+            if enemy.lod_envelope is not None:
+                self.wake(enemy)
+
+    def sync(self, enemies):
+        """bring every asleep enemy up to the current frame (they stay asleep)"""
+        for enemy in enemies:
+            if enemy.lod_pending:
+                enemy.catch_up()
+
+    def sync_for_bullets(self, enemies, bullets):
+        """wake up the asleep enemies a player bullet could hit this frame (bullet inside the patrol envelope)"""
+        if bullets.count == 0:
+            return
+        n = bullets.high
+        player_bullets = bullets.alive[:n] & (bullets.owner[:n] == src.bullet_pool.OWNER_PLAYER)
+        if not player_bullets.any():
+            return
+        ## bullets sorted by x: each enemy only looks at the bullets inside its envelope
+        order = np.argsort(bullets.x[:n][player_bullets])
+        bx = bullets.x[:n][player_bullets][order]
+        by = bullets.y[:n][player_bullets][order]
+        for enemy in enemies:
+            envelope = enemy.lod_envelope
+            if envelope is not None:
+                first, last = np.searchsorted(bx, (envelope[0], envelope[1] + 16), side="right")
+                if first < last and np.any((by[first:last] > enemy.y) & (by[first:last] < enemy.y + 16)):
+                    self.wake(enemy)
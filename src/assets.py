@@ -0,0 +1,125 @@
+"""
+assets.py
+This module provides the asset loader and the on-disk asset cache of the Neurotrace game.
+Decoding assets.pyxres (a zipped toml of number lists) is the slow part of pyxel.load: the image banks and
+tilemaps are decoded once into a NumPy file named after the content hash of the pyxres file, and later runs
+copy them straight into pyxel's buffers (Image.data_ptr / Tilemap.data_ptr). Editing the pyxres file changes
+its hash, so a stale cache is never used. The same cache directory keeps other preprocessed assets
+(the rendered title texts of src/text_cache.py).
+The game has no sound, so sounds and musics are not loaded.
+NumPy is only imported when the banks load: the title screen is drawn before it.
+"""
+import hashlib
+import os
+import tomllib
+import zipfile
+
+ASSETS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets.pyxres")
+# preprocessed assets, per user (the game folder may be read-only, or temporary in the packaged game)
+CACHE_DIR = os.path.join(os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+                         or os.path.join(os.path.expanduser("~"), ".cache"), "neurotrace")
+
+# path -> content hash, files are only hashed once per run
+_hashes = {}
+# path -> decoded assets
+_assets = {}
+
+
+def content_hash(path):
+    """short SHA-1 of a file content"""
+    digest = _hashes.get(path)
+    if digest is None:
+        with open(path, "rb") as file:
+            digest = hashlib.sha1(file.read()).hexdigest()[:16]
+        _hashes[path] = digest
+    return digest
+
+
+def cache_path(name):
+    return os.path.join(CACHE_DIR, name)
+
+
+def read_cache(name):
+    """:return the bytes of a cache file, None if it is missing"""
+    try:
+        with open(cache_path(name), "rb") as file:
+            return file.read()
+    except OSError:
+        return None
+
+
+def write_cache(name, data):
+    """write a cache file (next to it then renamed: a crash never leaves half a file), a failure only costs speed"""
+    path = cache_path(name)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        with open(temp, "wb") as file:
+            file.write(data)
+        os.replace(temp, path)
+    except OSError:
+        pass
+
+
+def expand_rows(rows, width, height):
+    """
+    pyxel stores each row without its trailing repeats, and the rows without the trailing repeated rows:
+    the last value of a row (the last row) fills the rest
+    """
+    rows = [row + [row[-1]] * (width - len(row)) for row in rows]
+    return rows + [rows[-1]] * (height - len(rows))
+
+
+def decode_resource(path=ASSETS_PATH):
+    """
+    read the image banks and tilemaps of a pyxres file (format 4: zipped toml)
+    :return dict of arrays: images [bank, y, x], tilemaps [map, row, column, (u, v)], imgsrc [map]
+    """
+    import numpy as np
+    with zipfile.ZipFile(path) as archive:
+        resource = tomllib.loads(archive.read("pyxel_resource.toml").decode())
+    images = [expand_rows(image["data"], image["width"], image["height"]) for image in resource["images"]]
+    ## tilemap rows are flat (u, v) pairs
+    tilemaps = [expand_rows(tilemap["data"], 2 * tilemap["width"], tilemap["height"]) for tilemap in resource["tilemaps"]]
+    shapes = [(tilemap["height"], tilemap["width"], 2) for tilemap in resource["tilemaps"]]
+    return {
+        "images": np.array(images, dtype=np.uint8),
+        "tilemaps": np.array([np.array(rows, dtype=np.uint16).reshape(shape) for rows, shape in zip(tilemaps, shapes)]),
+        "imgsrc": np.array([tilemap.get("imgsrc", 0) for tilemap in resource["tilemaps"]], dtype=np.int64),
+    }
+
+
+def get_assets(path=ASSETS_PATH):
+    """decoded assets of a pyxres file, from memory, the disk cache, or decoded (and cached) on the first run"""
+    assets = _assets.get(path)
+    if assets is not None:
+        return assets
+    import io
+    import numpy as np
+    name = f"{os.path.splitext(os.path.basename(path))[0]}-{content_hash(path)}.npz"
+    data = read_cache(name)
+    if data is not None:
+        try:
+            with np.load(io.BytesIO(data)) as archive:
+                assets = {key: archive[key] for key in archive.files}
+        except (OSError, ValueError, KeyError):
+            assets = None
+    if assets is None:
+        assets = decode_resource(path)
+        buffer = io.BytesIO()
+        np.savez_compressed(buffer, **assets)
+        write_cache(name, buffer.getvalue())
+    _assets[path] = assets
+    return assets
+
+
+def load_resources(path=ASSETS_PATH):
+    """load the image banks and tilemaps into pyxel, as pyxel.load does (pyxel has to be initialized)"""
+    import numpy as np
+    import pyxel
+    assets = get_assets(path)
+    for image, pixels in zip(pyxel.images, assets["images"]):
+        np.frombuffer(image.data_ptr(), dtype=np.uint8)[:] = pixels.ravel()
+    for tilemap, tiles, imgsrc in zip(pyxel.tilemaps, assets["tilemaps"], assets["imgsrc"]):
+        np.frombuffer(tilemap.data_ptr(), dtype=np.uint16)[:] = tiles.ravel()
+        tilemap.imgsrc = int(imgsrc)
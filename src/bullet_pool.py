@@ -0,0 +1,190 @@
+"""
+bullet_pool.py
+This module provides the projectile pool of the Neurotrace game.
+Every bullet (player, enemies and turrets) lives in one preallocated structure-of-arrays pool:
+moving, bounds culling and floor/wall rejection run as NumPy operations over all bullets at once,
+and dead slots go back to a free list so firing never allocates a new bullet object.
+"""
+import heapq
+import numpy as np
+import pyxel
+import src.settings, src.collision
+from src.culling import culler
+
+# who fired the bullet (decides what it can hit)
+OWNER_PLAYER = 0
+OWNER_ENEMY = 1
+OWNER_TURRET = 2
+
+
+class BulletPool:
+    # slot arrays, in the order save states store them (see src/snapshot.py)
+    ARRAYS = ("x", "y", "vx", "vy", "color", "penetrate", "penetrate_count", "damage", "owner", "alive")
+
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        # slot arrays (structure of arrays)
+        self.x = np.zeros(0)
+        self.y = np.zeros(0)
+        self.vx = np.zeros(0)
+        self.vy = np.zeros(0)
+        self.color = np.zeros(0, dtype=np.int8)
+        self.penetrate = np.zeros(0, dtype=bool)
+        self.penetrate_count = np.zeros(0, dtype=np.int16)  # -1 means no penetration limit
+        self.damage = np.zeros(0, dtype=np.int16)
+        self.owner = np.zeros(0, dtype=np.int8)
+        self.alive = np.zeros(0, dtype=bool)
+        # free slots, always reuse the lowest one so live bullets stay packed at the front
+        self.free_slots = []
+        # one past the highest slot in use, array work only runs on [:high]
+        self.high = 0
+        self.count = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        """enlarge every slot array (only happens when the pool is full)"""
+        old = self.capacity
+        for name in self.ARRAYS:
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+        for slot in range(old, capacity):
+            heapq.heappush(self.free_slots, slot)
+        self.capacity = capacity
+
+    def clear(self):
+        """remove every bullet (level change, restart)"""
+        self.alive[:] = False
+        self.free_slots = list(range(self.capacity))
+        self.high = 0
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def spawn(self, x, y, vx, vy, color, penetrate, damage, owner, penetrate_count=-1):
+        """
+        add a bullet to the pool
+        :return the slot index of the bullet
+        """
+        if not self.free_slots:
+            self.grow(self.capacity * 2)
+        slot = heapq.heappop(self.free_slots)
+        self.x[slot] = x
+        self.y[slot] = y
+        self.vx[slot] = vx
+        self.vy[slot] = vy
+        self.color[slot] = color
+        self.penetrate[slot] = penetrate
+        self.penetrate_count[slot] = penetrate_count
+        self.damage[slot] = damage
+        self.owner[slot] = owner
+        self.alive[slot] = True
+        self.count += 1
+        if slot >= self.high:
+            self.high = slot + 1
+        return slot
+
+    def kill(self, slot):
+        """remove a single bullet and give its slot back"""
+        if self.alive[slot]:
+            self.alive[slot] = False
+            heapq.heappush(self.free_slots, slot)
+            self.count -= 1
+
+    def kill_mask(self, dead):
+        """remove every bullet flagged in the mask (mask covers [:high])"""
+        for slot in np.flatnonzero(dead).tolist():
+            self.kill(slot)
+        # shrink the active range when the last slots are free
+        high = self.high
+        while high > 0 and not self.alive[high - 1]:
+            high -= 1
+        self.high = high
+
+    def integrate(self, level):
+        """move every live bullet one frame, then remove the ones out of bounds or inside a floor/wall"""
+        if self.count == 0:
+            return
+        n = self.high
+        alive = self.alive[:n]
+        x = self.x[:n]
+        y = self.y[:n]
+        ## update linear position
+        np.add(x, self.vx[:n], out=x, where=alive)
+        np.add(y, self.vy[:n], out=y, where=alive)
+        # Remove if out of bounds (has to be full map because rendering in absolute)
+        collision = src.collision.get_compiled_level(level)
+        dead = (x < 0) | (x > collision.bound_x) | (y < 0) | (y > src.settings.WORLD_BOUND_Y)
+        # Bullet collision with map floors and walls (one bitmap lookup per bullet)
+        dead |= collision.points_solid(x, y)
+        dead &= alive
+        if dead.any():
+            self.kill_mask(dead)
+
+    def hit(self, slot):
+        """a bullet hit something: handle penetration, return the damage it deals"""
+        damage = int(self.damage[slot])
+        ## peneration check, if enabled, decrement
+        if self.penetrate_count[slot] >= 0:
+            self.penetrate_count[slot] -= 1
+            ## if no more penetration, eliminate
+            if self.penetrate_count[slot] <= 0:
+                self.kill(slot)
+        ## bullets with no penetration
+        elif not self.penetrate[slot]:
+            self.kill(slot)
+        return damage
+
+    def collide_enemies(self, enemies, enemy_grid):
+        """player bullets vs enemies, only enemies sharing the bullet's cell of the spatial hash are tested"""
+        if self.count == 0:
+            return
+        n = self.high
+        slots = np.flatnonzero(self.alive[:n] & (self.owner[:n] == OWNER_PLAYER))
+        if not slots.size:
+            return
+        ## bucket live enemies first so each bullet only tests the enemies around it
+        enemy_grid.rebuild(enemies)
+        buckets = enemy_grid.buckets
+        if not buckets:
+            return
+        ## cells of every player bullet at once, only the bullets in a cell holding an enemy are tested
+        keys = enemy_grid.cell_keys(self.x[slots], self.y[slots])
+        near = np.isin(keys, enemy_grid.occupied_keys())
+        for slot, key in zip(slots[near].tolist(), keys[near].tolist()):
+            bx = self.x[slot]
+            by = self.y[slot]
+            for enemy in buckets[key]:
+                ## ignore dead enemies and bullets that already stopped
+                if not enemy.alive or not self.alive[slot]:
+                    continue
+                ## collsion check, enemies are 16*16
+                if enemy.x < bx < enemy.x + 16 and enemy.y < by < enemy.y + 16:
+                    enemy.take_damage(self.hit(slot))
+
+    def collide_player(self, player):
+        """enemy and turret bullets vs the player, tested for every bullet at once"""
+        if self.count == 0:
+            return
+        n = self.high
+        x = self.x[:n]
+        y = self.y[:n]
+        hits = (self.alive[:n] & (self.owner[:n] != OWNER_PLAYER)
+                & (player.x < x) & (x < player.x + 16) & (player.y < y) & (y < player.y + 16))
+        for slot in np.flatnonzero(hits).tolist():
+            player.take_damage(self.hit(slot))
+
+    def draw(self, x_offset=0):
+        """draw every live bullet inside the view"""
+        if self.count == 0:
+            return
+        n = self.high
+        slots = np.flatnonzero(self.alive[:n])
+        ## only the bullets inside the view are drawn
+        xs = self.x[slots] - x_offset
+        ys = self.y[slots]
+        shown = culler.visible_points(xs, ys, 1)
+        for bx, by, color in zip(xs[shown].tolist(), ys[shown].tolist(), self.color[slots][shown].tolist()):
+            pyxel.circ(bx, by, 1, color)
@@ -0,0 +1,172 @@
+"""
+chunks.py
+This module provides the chunk streaming of the enemies of the Neurotrace game.
+A level is split into CHUNK_WIDTH px wide columns. Chunks within ACTIVE_MARGIN of the camera view are active:
+their enemies stay in World.enemies. An enemy the AI LOD put to sleep (see src/ai_lod.py) in an inactive chunk
+is parked in its chunk: it leaves World.enemies, so the per-frame loops (LOD checks, spatial hash, batch)
+only walk the enemies around the camera, and its skipped frames are counted from the tick it was parked.
+A chunk is unparked, its enemies going back to World.enemies in spawn order, when the camera approaches
+or before anything could wake one of them: the player in wake range, the view or a player bullet reaching
+a patrol envelope, or the player's fire line. The AI LOD then catches them up exactly, so gameplay does not change.
+Parked enemies do not change until their chunk settles or unparks: a save state (src/snapshot.py) keeps the block of
+a chunk while it stays that way, and a restored chunk decodes its enemies only when they are needed.
+"""
+import heapq
+import numpy as np
+import src.settings, src.bullet_pool
+
+# width of a chunk [px]
+CHUNK_WIDTH = 256
+# chunks within this distance of the camera view are active [px]
+ACTIVE_MARGIN = 256
+
+
+def spawn_order(enemy):
+    return enemy.spawn_order
+
+
+class Chunk:
+    def __init__(self, index):
+        self.index = index
+        # parked enemies and the tick their skipped frames are counted up to: [enemy, tick]
+        self.parked = []
+        # union of the LOD envelopes of the parked enemies (left, right, wake left, wake right)
+        self.left = self.right = self.wake_left = self.wake_right = 0
+        # block of the chunk in a save state, None once its parked enemies changed
+        self.saved = None
+        # chunk put back by a restore: function decoding its [enemy, tick] entries the first time they are needed
+        self.load = None
+
+    def entries(self):
+        """the [enemy, tick] entries of the parked enemies"""
+        if self.load is not None:
+            load = self.load
+            self.load = None
+            self.parked = load()
+        return self.parked
+
+    def park(self, enemy, tick):
+        left, right, wake_left, wake_right = enemy.lod_envelope
+        if not self.entries():
+            self.left, self.right, self.wake_left, self.wake_right = left, right, wake_left, wake_right
+        else:
+            self.left = min(self.left, left)
+            self.right = max(self.right, right)
+            self.wake_left = min(self.wake_left, wake_left)
+            self.wake_right = max(self.wake_right, wake_right)
+        self.parked.append([enemy, tick])
+        self.saved = None
+
+    def settle(self, tick):
+        """count the frames skipped by the parked enemies up to `tick` (included)"""
+        for entry in self.entries():
+            entry[0].lod_pending += tick - entry[1]
+            entry[1] = tick
+        ## the AI LOD catches them up next
+        self.saved = None
+
+
+class ChunkStreamer:
+    def __init__(self):
+        # chunk index -> Chunk holding parked enemies
+        self.chunks = {}
+        # active chunk range of the current frame [chunk index, included]
+        self.first_active = 0
+        self.last_active = -1
+        # frames the enemies were simulated (World.step skips them while the player is dead)
+        self.tick = 0
+        # counters (debug overlay / profiler)
+        self.parked_count = 0
+
+    def clear(self):
+        """forget every chunk (level load)"""
+        self.chunks = {}
+        self.parked_count = 0
+
+    def parked_enemies(self):
+        return [entry[0] for chunk in self.chunks.values() for entry in chunk.entries()]
+
+    def loaded_enemies(self):
+        """the parked enemies of the chunks decoded so far (the ones to give back to the pool)"""
+        return [entry[0] for chunk in self.chunks.values() if chunk.load is None for entry in chunk.parked]
+
+    def begin_frame(self, enemies, camera_x, ai_lod):
+        """start a tick and set its active chunks, call it right after AILodScheduler.begin_frame"""
+        self.tick += 1
+        self.first_active = int((camera_x - ACTIVE_MARGIN) // CHUNK_WIDTH)
+        self.last_active = int((camera_x + src.settings.WINDOW_WIDTH + ACTIVE_MARGIN) // CHUNK_WIDTH)
+        if not self.chunks:
+            return
+        if ai_lod.hold:
+            ## every enemy has to be up to date: the LOD wakes them all
+            self.unpark(enemies, list(self.chunks.values()))
+            ai_lod.wake_all(enemies)
+            return
+        self.unpark(enemies, [chunk for chunk in self.chunks.values() if self.is_active(chunk.index)])
+
+    def wake(self, enemies, player, ai_lod, bullets):
+        """
+        unpark the chunks whose enemies could wake up this frame (player in range, view, player bullets)
+        call it after the bullets moved, before AILodScheduler.sync_for_bullets
+        """
+        if not self.chunks:
+            return
+        bx = None
+        if bullets.count:
+            n = bullets.high
+            player_bullets = bullets.alive[:n] & (bullets.owner[:n] == src.bullet_pool.OWNER_PLAYER)
+            if player_bullets.any():
+                bx = np.sort(bullets.x[:n][player_bullets])
+        woken = []
+        for chunk in self.chunks.values():
+            if chunk.wake_left < player.x < chunk.wake_right:
+                woken.append(chunk)
+            elif chunk.left < ai_lod.view_right and ai_lod.view_left < chunk.right + 16:
+                woken.append(chunk)
+            elif bx is not None:
+                first, last = np.searchsorted(bx, (chunk.left, chunk.right + 16), side="right")
+                if first < last:
+                    woken.append(chunk)
+        self.unpark(enemies, woken)
+
+    def park(self, enemies):
+        """move the asleep enemies of the inactive chunks out of the active list, call it at the end of the frame"""
+        kept = []
+        for enemy in enemies:
+            envelope = enemy.lod_envelope
+            if envelope is not None:
+                index = int(envelope[0] // CHUNK_WIDTH)
+                if not self.is_active(index):
+                    chunk = self.chunks.get(index)
+                    if chunk is None:
+                        chunk = Chunk(index)
+                        self.chunks[index] = chunk
+                    chunk.park(enemy, self.tick)
+                    self.parked_count += 1
+                    continue
+            kept.append(enemy)
+        if len(kept) != len(enemies):
+            ## in place: the boss holds this list
+            enemies[:] = kept
+
+    def unpark(self, enemies, chunks):
+        """put the enemies of the chunks back in the active list, they skipped every tick before the current one"""
+        if not chunks:
+            return
+        back = []
+        for chunk in chunks:
+            chunk.settle(self.tick - 1)
+            back.extend(entry[0] for entry in chunk.parked)
+            del self.chunks[chunk.index]
+        self.parked_count -= len(back)
+        back.sort(key=spawn_order)
+        ## the active list stays in spawn order (update order, bullet hits and the state digest depend on it)
+        enemies[:] = list(heapq.merge(enemies, back, key=spawn_order))
+
+    def sync(self):
+        """count the skipped frames of every parked enemy up to the last tick (then AILodScheduler.sync catches up)"""
+        for chunk in self.chunks.values():
+            chunk.settle(self.tick)
+
+    def is_active(self, index):
+        return self.first_active <= index <= self.last_active
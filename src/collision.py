@@ -0,0 +1,233 @@
+"""
+collision.py
+This module provides the precompiled collision index of each level of the Neurotrace game.
+The floor and wall rectangles of src/structure.py (floors can also come from the solid tiles of the tilemap,
+see src/tilemap.py) are compiled once per level into sorted interval lists (landing checks),
+walkable spans (standing checks) and a solid-occupancy bitmap (point checks),
+so collision queries no longer scan every rectangle of the level.
+"""
+import numpy as np
+import src.settings, src.structure, src.tilemap
+
+# tolerance below the top of a floor where a falling entity still lands on it
+LANDING_TOLERANCE = 5
+# entities (player and enemies) are 16*16
+ENTITY_SIZE = 16
+# size of the coarse cells walked by the raycaster
+RAY_CELL_SIZE = 16
+
+
+class CompiledLevel:
+    def __init__(self, level):
+        info = src.structure.STRUCTURE[level]
+        self.level = level
+        self.width, self.height = info["mapWH"]
+        # bullets and fire lines are removed beyond this x [absolute]
+        self.bound_x = max(src.settings.WORLD_BOUND_X, self.width)
+        self.walls = list(info["mapWall"])
+
+        # Solid-occupancy bitmap: one bool per pixel, rows are y [relative], floors and walls are half open [x, x+w)
+        if info.get("collision") == "tilemap":
+            ## the floors are the solid tiles of the level region of the tilemap (src/tilemap.py)
+            self.floors = src.tilemap.solid_rects(level)
+            self.solid = np.zeros((self.height, self.width), dtype=bool)
+            tiles = src.tilemap.solid_bitmap(level)[:self.height, :self.width]
+            self.solid[:tiles.shape[0], :tiles.shape[1]] = tiles
+            rects = self.walls
+        else:
+            self.floors = list(info["mapFloor"])
+            self.solid = np.zeros((self.height, self.width), dtype=bool)
+            rects = self.floors + self.walls
+        for rx, ry, rw, rh in rects:
+            self.solid[max(0, ry):max(0, ry + rh), max(0, rx):max(0, rx + rw)] = True
+
+        # Coarse cells for the raycaster: cell key -> solid rectangles (x0, y0, x1, y1) overlapping the cell
+        self.cell_size = RAY_CELL_SIZE
+        self.cell_columns = -(-self.width // RAY_CELL_SIZE)
+        self.cell_rows = -(-self.height // RAY_CELL_SIZE)
+        self.cell_rects = {}
+        for rx, ry, rw, rh in self.floors + self.walls:
+            x0, y0 = max(0, rx), max(0, ry)
+            x1, y1 = min(self.width, rx + rw), min(self.height, ry + rh)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            for cy in range(y0 // RAY_CELL_SIZE, (y1 - 1) // RAY_CELL_SIZE + 1):
+                for cx in range(x0 // RAY_CELL_SIZE, (x1 - 1) // RAY_CELL_SIZE + 1):
+                    self.cell_rects.setdefault(cy * self.cell_columns + cx, []).append((x0, y0, x1, y1))
+
+        # Landing index: for each pixel row of the feet, the floors whose landing band [top, top+h+tolerance] holds it
+        ## entries are (floor index, left, right, top, band bottom) sorted by left, the floor index keeps the structure priority
+        band_bottom = max([fy + fh + LANDING_TOLERANCE for fx, fy, fw, fh in self.floors] + [0])
+        self.landing_rows = [[] for _ in range(band_bottom + 1)]
+        for index, (fx, fy, fw, fh) in enumerate(self.floors):
+            for row in range(max(0, fy), fy + fh + LANDING_TOLERANCE + 1):
+                self.landing_rows[row].append((index, fx, fx + fw, fy, fy + fh + LANDING_TOLERANCE))
+        for row in self.landing_rows:
+            row.sort(key=lambda entry: entry[1])
+
+        # Walkable spans: floor top y -> merged [left, right) x spans of the floors with that top (span: (top, left, right))
+        ## plus a table of the span under each pixel column of the top, so the span under a point is found in O(1)
+        tops = {}
+        for fx, fy, fw, fh in self.floors:
+            tops.setdefault(fy, []).append((fx, fx + fw))
+        self.spans = {}
+        self.span_columns = {}
+        for fy, intervals in tops.items():
+            intervals.sort()
+            spans = []
+            for left, right in intervals:
+                if spans and left <= spans[-1][2]:
+                    spans[-1] = (fy, spans[-1][1], max(spans[-1][2], right))
+                else:
+                    spans.append((fy, left, right))
+            self.spans[fy] = spans
+            first = spans[0][1]
+            columns = [None] * (spans[-1][2] - first)
+            for span in spans:
+                columns[span[1] - first:span[2] - first] = [span] * (span[2] - span[1])
+            self.span_columns[fy] = (first, columns)
+
+        # Wall clamp: an entity stays between the right edge of the left wall and the left edge of the right wall
+        if len(self.walls) >= 2:
+            left_wall = self.walls[0]
+            right_wall = self.walls[1]
+            self.min_x = left_wall[0] + left_wall[2]
+            self.max_x = right_wall[0] - ENTITY_SIZE
+        else:
+            self.min_x = None
+            self.max_x = None
+
+    def point_solid(self, x, y):
+        """check if a point [absolute x, relative y] is inside a floor or a wall, O(1)"""
+        ix = int(x // 1)
+        iy = int(y // 1)
+        if 0 <= iy < self.height and 0 <= ix < self.width:
+            return bool(self.solid[iy, ix])
+        return False
+
+    def points_solid(self, xs, ys):
+        """vectorized point_solid for NumPy arrays of points"""
+        ix = np.floor(xs).astype(np.int64)
+        iy = np.floor(ys).astype(np.int64)
+        inside = (ix >= 0) & (ix < self.width) & (iy >= 0) & (iy < self.height)
+        hit = np.zeros(ix.shape, dtype=bool)
+        hit[inside] = self.solid[iy[inside], ix[inside]]
+        return hit
+
+    def rect_solid(self, x, y, w, h):
+        """check if an AABB overlaps any solid pixel"""
+        x0 = max(0, int(x // 1))
+        y0 = max(0, int(y // 1))
+        x1 = min(self.width, int(-(-(x + w) // 1)))
+        y1 = min(self.height, int(-(-(y + h) // 1)))
+        if x0 >= x1 or y0 >= y1:
+            return False
+        return bool(self.solid[y0:y1, x0:x1].any())
+
+    def landing_floor(self, x, y):
+        """
+        find the floor a 16*16 entity at (x, y) stands or lands on
+        :return the top y of the floor, None if the entity is in the air
+        """
+        feet = y + ENTITY_SIZE
+        row = int(feet // 1)
+        if row < 0 or row >= len(self.landing_rows):
+            return None
+        found = None
+        for index, left, right, top, bottom in self.landing_rows[row]:
+            ## sorted by left edge: nothing further right can overlap the entity
+            if left >= x + ENTITY_SIZE:
+                break
+            if x < right and top <= feet <= bottom:
+                if found is None or index < found[0]:
+                    found = (index, top)
+        return found[1] if found is not None else None
+
+    def landing_top_between(self, left, right, y):
+        """
+        top y of the floor a 16*16 entity at height y lands on for every x in [left, right]
+        :return None if it could land on floors with different tops (or on none)
+        """
+        feet = y + ENTITY_SIZE
+        row = int(feet // 1)
+        if row < 0 or row >= len(self.landing_rows):
+            return None
+        found = None
+        for index, floor_left, floor_right, top, bottom in self.landing_rows[row]:
+            if floor_left >= right + ENTITY_SIZE:
+                break
+            if left < floor_right and top <= feet <= bottom:
+                if found is None:
+                    found = top
+                elif top != found:
+                    return None
+        return found
+
+    def walk_span(self, x, feet_y):
+        """
+        find the walkable span under the point x whose top is exactly feet_y, O(1)
+        :return (top, left, right), None if there is no floor with that top under x
+        """
+        columns = self.span_columns.get(feet_y)
+        if columns is None:
+            return None
+        first, table = columns
+        i = int(x // 1) - first
+        if 0 <= i < len(table):
+            return table[i]
+        return None
+
+    def supports(self, x, feet_y):
+        """check if the point x is on top of a floor whose top is exactly feet_y"""
+        return self.walk_span(x, feet_y) is not None
+
+    def supports_many(self, xs, feet_ys):
+        """vectorized supports for NumPy arrays of x and feet y"""
+        supported = np.zeros(xs.shape, dtype=bool)
+        for top, spans in self.spans.items():
+            on_top = feet_ys == top
+            if not on_top.any():
+                continue
+            for top, left, right in spans:
+                supported |= on_top & (xs >= left) & (xs < right)
+        return supported
+
+    def landing_floors(self, xs, ys):
+        """
+        vectorized landing_floor for NumPy arrays of x and y
+        :return float array of the floor tops, NaN where the entity is in the air
+        """
+        feet = ys + ENTITY_SIZE
+        tops = np.full(xs.shape, np.nan)
+        ## rows outside the landing index never land (same as landing_floor)
+        candidates = (feet >= 0) & (feet < len(self.landing_rows))
+        ## structure order: the first floor found wins
+        for fx, fy, fw, fh in self.floors:
+            lands = candidates & (xs < fx + fw) & (fx < xs + ENTITY_SIZE) & (fy <= feet) & (feet <= fy + fh + LANDING_TOLERANCE)
+            if lands.any():
+                tops[lands] = fy
+                candidates &= ~lands
+        return tops
+
+    def clamp_x(self, x):
+        """clamp the x of a 16*16 entity between the walls of the level"""
+        if self.min_x is None:
+            return x
+        if x < self.min_x:
+            x = self.min_x
+        if x > self.max_x:
+            x = self.max_x
+        return x
+
+
+# level index -> CompiledLevel, each level is compiled only once
+_compiled_levels = {}
+
+
+def get_compiled_level(level):
+    """get the compiled collision index of a level, built the first time the level loads"""
+    compiled = _compiled_levels.get(level)
+    if compiled is None:
+        compiled = CompiledLevel(level)
+        _compiled_levels[level] = compiled
+    return compiled
@@ -0,0 +1,59 @@
+"""
+culling.py
+This module provides the view culling of the draw calls of the Neurotrace game.
+Draw code passes the screen-space bounds of a sprite, effect or bullet (position minus the camera offset)
+and skips the pyxel call when they are outside the 128*128 window plus a small margin.
+The shared `culler` counts the drawn and culled calls of the frame for the debug overlay.
+"""
+import numpy as np
+import src.settings
+
+# extra pixels around the window that still count as visible
+MARGIN = 4
+
+
+class ViewCuller:
+    def __init__(self, width=src.settings.WINDOW_WIDTH, height=src.settings.WINDOW_HEIGHT, margin=MARGIN):
+        self.left = -margin
+        self.top = -margin
+        self.right = width + margin
+        self.bottom = height + margin
+        # counters of the current frame
+        self.drawn = 0
+        self.culled = 0
+
+    def begin_frame(self):
+        """reset the counters, call it once at the start of the draw"""
+        self.drawn = 0
+        self.culled = 0
+
+    def visible(self, x, y, w, h):
+        """check if a rectangle [screen coordinates] overlaps the view, and count the draw call"""
+        if x + w > self.left and x < self.right and y + h > self.top and y < self.bottom:
+            self.drawn += 1
+            return True
+        self.culled += 1
+        return False
+
+    def visible_circle(self, cx, cy, r):
+        """check if a circle (circ / circb) [screen coordinates] overlaps the view"""
+        return self.visible(cx - r, cy - r, 2 * r + 1, 2 * r + 1)
+
+    def visible_line(self, x0, y0, x1, y1):
+        """check if the bounding box of a line [screen coordinates] overlaps the view"""
+        return self.visible(min(x0, x1), min(y0, y1), abs(x1 - x0) + 1, abs(y1 - y0) + 1)
+
+    def visible_points(self, xs, ys, r=0):
+        """
+        vectorized check for NumPy arrays of points drawn with radius r [screen coordinates]
+        :return bool mask of the visible points
+        """
+        mask = (xs + r >= self.left) & (xs - r < self.right) & (ys + r >= self.top) & (ys - r < self.bottom)
+        shown = int(np.count_nonzero(mask))
+        self.drawn += shown
+        self.culled += len(mask) - shown
+        return mask
+
+
+# culler shared by every draw function
+culler = ViewCuller()
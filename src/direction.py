@@ -0,0 +1,63 @@
+"""
+direction.py
+This module provides the 8-direction aim quantizer used to draw the weapons of the Neurotrace game.
+An aim vector (dx, dy) [screen coordinates, y down] is mapped to the weapon sprite index and the unit vector
+of the muzzle offset with an octant test (|dy| against |dx| * tan(22.5 deg)) and one square root, no trigonometry.
+Sprite indexes follow the sprite tables of the weapons: [L, R, R45U, L45U, L45D, R45D, D, U] (up and down on the screen).
+"""
+import math
+import numpy as np
+
+# tan(22.5 deg): border between a horizontal (or vertical) octant and a diagonal one
+TAN_22_5 = math.sqrt(2) - 1
+# sprite index of each octant
+LEFT, RIGHT, RIGHT_UP, LEFT_UP, LEFT_DOWN, RIGHT_DOWN, DOWN, UP = range(8)
+# diagonal octants by the signs of (dx, dy): [dx < 0][dy < 0]
+DIAGONALS = ((RIGHT_DOWN, RIGHT_UP), (LEFT_DOWN, LEFT_UP))
+# sprite index of the horizontal, vertical and diagonal octants as looked up by aim_many: [kind, dx < 0, dy < 0]
+OCTANTS = np.array([
+    [[RIGHT, RIGHT], [LEFT, LEFT]],
+    [[DOWN, UP], [DOWN, UP]],
+    [DIAGONALS[0], DIAGONALS[1]],
+])
+
+
+def direction_index(dx, dy):
+    """get the weapon sprite index of an aim vector"""
+    ax = abs(dx)
+    ay = abs(dy)
+    if ay < ax * TAN_22_5 or ax == ay == 0:
+        return LEFT if dx < 0 else RIGHT
+    if ax <= ay * TAN_22_5:
+        return UP if dy < 0 else DOWN
+    return DIAGONALS[dx < 0][dy < 0]
+
+
+def aim(dx, dy):
+    """
+    quantize an aim vector
+    :return (sprite index, unit x, unit y), a zero vector aims right
+    """
+    length = math.sqrt(dx * dx + dy * dy)
+    if length == 0:
+        return RIGHT, 1.0, 0.0
+    return direction_index(dx, dy), dx / length, dy / length
+
+
+def aim_many(dx, dy):
+    """
+    vectorized aim for NumPy arrays of aim vectors
+    :return (sprite indexes, unit x, unit y) arrays
+    """
+    ax = np.abs(dx)
+    ay = np.abs(dy)
+    length = np.sqrt(dx * dx + dy * dy)
+    zero = length == 0
+    horizontal = (ay < ax * TAN_22_5) | zero
+    vertical = ~horizontal & (ax <= ay * TAN_22_5)
+    kind = np.where(horizontal, 0, np.where(vertical, 1, 2))
+    index = OCTANTS[kind, (dx < 0).astype(int), (dy < 0).astype(int)]
+    safe = np.where(zero, 1.0, length)
+    ux = np.where(zero, 1.0, dx / safe)
+    uy = np.where(zero, 0.0, dy / safe)
+    return index, ux, uy
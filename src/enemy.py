@@ -1,73 +1,140 @@
 import pyxel
 import src.settings
 import src.structure
-import src.game_status
+import src.bullet_pool
+import src.collision
+import src.raycast
+import src.geometry
+import src.direction
+import src.streams
+from src.culling import culler
 import math
 import random
+import numpy as np
 # from src.enemy import create_enemy
 
+# below this many enemies the weapon aims of a frame are computed one by one (see weapon_aims)
+MIN_AIM_BATCH = 16
+
+# Weapon system and its corresponding sprites, shared by every enemy
+WEAPON_TYPES = (
+    {
+        'name': 'Pistol',
+        'sprites': (
+            (0, 128), (8, 128), (0, 136), (8, 136), (16, 128), (24, 128), (16, 136), (24, 136)
+        ),
+        'range': 60,
+        'ai': 'default',
+    },
+    {
+        'name': 'Rifle',
+        'sprites': (
+            (0, 160), (8, 160), (0, 168), (8, 168), (16, 160), (24, 160), (16, 168), (24, 168)
+        ),
+        'range': 100,
+        'ai': 'rifle',
+    },
+    {
+        'name': 'Sniper',
+        'sprites': (
+            (0, 176), (8, 176), (0, 184), (8, 184), (16, 176), (24, 176), (16, 184), (24, 184)
+        ),
+        'range': 180,
+        'ai': 'sniper',
+    },
+)
+
+
+# === Thrown objects ===
+class Grenade:
+    """grenade, flashbang or homing grenade in flight"""
+    __slots__ = ('x', 'y', 'vx', 'vy', 'timer', 'alive', 'exploded')
+
+    def __init__(self, x, y, vx, vy, timer):
+        self.x = x
+        self.y = y
+        self.vx = vx
+        self.vy = vy
+        self.timer = timer
+        self.alive = True
+        self.exploded = False
+
+
+class Turret:
+    """turret deployed by HumanEnemy4"""
+    __slots__ = ('x', 'y', 'hp', 'fire_timer', 'fire_cooldown', 'alive')
+
+    def __init__(self, x, y, hp=8, fire_cooldown=30):
+        self.x = x
+        self.y = y
+        self.hp = hp
+        self.fire_timer = 0
+        self.fire_cooldown = fire_cooldown
+        self.alive = True
+
+
 # === Enemy Type ===
 class BaseEnemy:
     """
     This class is the base enemy for all enemies. 
     """
-    def __init__(self, type_index, x, y, level=0):
+    # cooldowns counted down by update_special_ability while no ability is running
+    IDLE_COOLDOWNS = ('special_cooldown',)
+    __slots__ = (
+        'type_index', 'rng', 'x', 'y', 'level', 'collision', 'speed', 'velocity_y', 'is_jumping', 'is_moving',
+        'facing_direction', 'animation_frame', 'animation_timer', 'weapon', 'weapon_sprites', 'weapon_range',
+        'weapon_ai', 'is_firing', 'fire_timer', 'fire_angle', 'fire_line', 'visual_state', 'visual_state_timer',
+        'state', 'alive', 'hp', 'patrol_origin', 'patrol_range', 'patrol_dir', 'stand_timer', 'retreat_timer',
+        'attack_cooldown', 'attack_cooldown_max', 'miss_chance', 'special_cooldown', 'special_active',
+        'special_timer', 'bullet_pool', 'enemy_pool', 'grenades', 'walk_span', 'lod_envelope', 'lod_pending',
+        'spawn_order',
+    )
+    # constants shared by every enemy of a class (class level, subclasses override them)
+    weapon_types = WEAPON_TYPES
+    structure = src.structure.STRUCTURE
+    jump_speed = src.settings.PLAYER_JUMP_SPEED
+    gravity = src.settings.GRAVITY
+    weapon_offset = 5
+    weapon_w = 8
+    weapon_h = 8
+    fire_duration = 6
+    special_ability = None  # Placeholder, override in subclasses
+    special_cooldown_max = 120  # Default, override in subclasses
+    special_duration = 60  # Default, override in subclasses
+    sprite_left = (0, 0)
+    sprite_right = (16, 0)
+    sprite_damage_left = (32, 0)
+    sprite_damage_right = (48, 0)
+    sprite_defeated_left = (64, 0)
+    sprite_defeated_right = (80, 0)
+
+    def __init__(self, type_index, x, y, level=0, rng=None):
         self.type_index = type_index
+        # own random stream, seeded by the world so runs can be reproduced (draw effects keep the global one)
+        self.rng = rng if rng is not None else src.streams.SplitMix()
         self.x = x
         self.y = y
         self.level = level
-        self.structure = src.structure.STRUCTURE
+        # compiled collision index of the level (floors, walls)
+        self.collision = src.collision.get_compiled_level(level)
         self.speed = src.settings.PLAYER_SPEED * 0.8
-        self.jump_speed = src.settings.PLAYER_JUMP_SPEED
-        self.gravity = src.settings.GRAVITY
         self.velocity_y = 0
         self.is_jumping = False
         self.is_moving = False
         self.facing_direction = 1
         self.animation_frame = 0
         self.animation_timer = 0
-        # Weapon system and its corresponding sprites 
-        self.weapon_types = [
-            {
-                'name': 'Pistol',
-                'sprites': [
-                    (0, 128), (8, 128), (0, 136), (8, 136), (16, 128), (24, 128), (16, 136), (24, 136)
-                ],
-                'range': 60,
-                'ai': 'default',
-            },
-            {
-                'name': 'Rifle',
-                'sprites': [
-                    (0, 160), (8, 160), (0, 168), (8, 168), (16, 160), (24, 160), (16, 168), (24, 168)
-                ],
-                'range': 100,
-                'ai': 'rifle',
-            },
-            {
-                'name': 'Sniper',
-                'sprites': [
-                    (0, 176), (8, 176), (0, 184), (8, 184), (16, 176), (24, 176), (16, 184), (24, 184)
-                ],
-                'range': 180,
-                'ai': 'sniper',
-            },
-        ]
 
         # enemy random choose weapons by default 
         ## get information from weapon data 
-        weapon_choice = random.choice(self.weapon_types)
+        weapon_choice = self.rng.choice(self.weapon_types)
         self.weapon = weapon_choice['name']
         self.weapon_sprites = weapon_choice['sprites']
         self.weapon_range = weapon_choice['range']
         self.weapon_ai = weapon_choice['ai']
-        # Weapon system (weapon_sprites will be set in subclasses)
-        self.weapon_offset = 5
-        self.weapon_w = 8
-        self.weapon_h = 8
+        # Firing
         self.is_firing = False
         self.fire_timer = 0
-        self.fire_duration = 6
         self.fire_angle = 0
         self.fire_line = None
         # AI State
@@ -79,9 +146,9 @@ class BaseEnemy:
         # patrol 
         self.patrol_origin = x
         # partrol range 
-        self.patrol_range = 32 + random.randint(0, 32)
+        self.patrol_range = 32 + self.rng.randint(0, 32)
         # enemy facing direction 
-        self.patrol_dir = 1 if random.random() < 0.5 else -1
+        self.patrol_dir = 1 if self.rng.random() < 0.5 else -1
         self.stand_timer = 0
         self.retreat_timer = 0
         # Attack cooldown and miss chance 
@@ -89,22 +156,32 @@ class BaseEnemy:
         self.attack_cooldown_max = 60
         self.miss_chance = 0.2  # Default, override in subclasses
         # Special ability system
-        self.special_ability = None  # Placeholder, override in subclasses
         self.special_cooldown = 0
-        self.special_cooldown_max = 120  # Default, override in subclasses
         self.special_active = False
         self.special_timer = 0
-        self.special_duration = 60  # Default, override in subclasses
-        # Default sprite locations (should be overridden in subclasses)
-        self.sprite_left = (0, 0)
-        self.sprite_right = (16, 0)
-        self.sprite_damage_left = (32, 0)
-        self.sprite_damage_right = (48, 0)
-        self.sprite_defeated_left = (64, 0)
-        self.sprite_defeated_right = (80, 0)
-        self.bullets = []  # List of bullets: {'x', 'y', 'vx', 'vy', 'color', 'penetrate', 'alive'}
+        self.bullet_pool = None  # shared projectile pool (BulletPool), assigned by the world
+        self.enemy_pool = None  # pooled enemy allocator (EnemyPool) of the boss summons, assigned by the world
+        self.spawn_order = 0  # rank of the spawn in the level, assigned by the EnemyPool (chunk streaming keeps this order)
         # Grenade system (deprecated)
-        self.grenades = []  # List of grenades: {'x', 'y', 'vx', 'vy', 'timer', 'alive', 'exploded'}
+        self.grenades = []  # List of Grenade
+        # walkable span (top, left, right) of the last step, see can_step()
+        self.walk_span = None
+        # AI level of detail (see src/ai_lod.py)
+        self.lod_envelope = None  # (left, right, wake left, wake right) of the patrol while the enemy is asleep
+        self.lod_pending = 0  # skipped frames, replayed by catch_up()
+
+    def reset(self, x, y, level=0, rng=None):
+        """reset a released enemy in place, as a new enemy of the same type (see src/enemy_pool.py)"""
+        type_index = self.type_index
+        ## clear every slot first, so no state of the previous life survives
+        for cls in type(self).__mro__:
+            for name in getattr(cls, '__slots__', ()):
+                if hasattr(self, name):
+                    delattr(self, name)
+        if type(self) is BaseEnemy:
+            BaseEnemy.__init__(self, type_index, x, y, level, rng)
+        else:
+            self.__init__(x, y, level, rng)
 
     def take_damage(self, amount):
         """enemy take damage"""
@@ -171,19 +248,11 @@ class BaseEnemy:
                 dy /= distance
             
             # Add some randomness and arc
-            speed = 2.0 + random.uniform(-0.5, 0.5)
+            speed = 2.0 + self.rng.uniform(-0.5, 0.5)
             vx = dx * speed
             vy = dy * speed - 1.0  # Add upward arc
             
-            grenade = {
-                'x': self.x + 8,
-                'y': self.y + 8,
-                'vx': vx,
-                'vy': vy,
-                'timer': 120,  # 2 seconds at 60fps
-                'alive': True,
-                'exploded': False
-            }
+            grenade = Grenade(self.x + 8, self.y + 8, vx, vy, 120)  # 2 seconds at 60fps
             self.grenades.append(grenade)
             self.special_cooldown = self.special_cooldown_max
 
@@ -193,26 +262,26 @@ class BaseEnemy:
         This function is deprecated
         """
         for grenade in self.grenades[:]:
-            if not grenade['alive']:
+            if not grenade.alive:
                 continue
                 
             # Update position
-            grenade['x'] += grenade['vx']
-            grenade['y'] += grenade['vy']
-            grenade['vy'] += 0.1  # Gravity
+            grenade.x += grenade.vx
+            grenade.y += grenade.vy
+            grenade.vy += 0.1  # Gravity
             
             # Update timer
-            grenade['timer'] -= 1
+            grenade.timer -= 1
             
             # Check for explosion
-            if grenade['timer'] <= 0 or grenade['y'] > 128:  # Hit ground or timer expired
-                grenade['exploded'] = True
-                grenade['alive'] = False
+            if grenade.timer <= 0 or grenade.y > 128:  # Hit ground or timer expired
+                grenade.exploded = True
+                grenade.alive = False
                 
                 # Check if player is in explosion radius
                 explosion_radius = 24
-                dx = grenade['x'] - (player.x + 8)
-                dy = grenade['y'] - (player.y + 8)
+                dx = grenade.x - (player.x + 8)
+                dy = grenade.y - (player.y + 8)
                 distance = math.sqrt(dx*dx + dy*dy)
                 
                 if distance <= explosion_radius:
@@ -242,30 +311,8 @@ class BaseEnemy:
         self.update_grenades(player)
         
         distance_to_player = abs(player.x - self.x)
-        # AI logic: check for platform edge before moving
-        def will_fall_off_platform(dx):
-            next_x = self.x + dx
-            for floor in self.structure[self.level]["mapFloor"]:
-                fx, fy, fw, fh = floor
-                if fx <= next_x < fx+fw and self.y+16 == fy:
-                    return False
-            return True
         # Weapon-based AI thresholds
-        if self.weapon_ai == 'sniper':
-            retreat_dist = 120
-            attack_min = 120
-            attack_max = self.weapon_range
-            patrol_dist = 200
-        elif self.weapon_ai == 'rifle':
-            retreat_dist = 40
-            attack_min = 40
-            attack_max = self.weapon_range
-            patrol_dist = 120
-        else:
-            retreat_dist = 40
-            attack_min = 40
-            attack_max = 60
-            patrol_dist = 100
+        retreat_dist, attack_min, attack_max, patrol_dist = self.ai_thresholds()
         # State machine for all weapons
         ## patrol: move back and forth, chase: follow player, attack: shoot player, retreat: move away from player
         ## patrol detect 
@@ -273,31 +320,15 @@ class BaseEnemy:
             ### if the player is close enough, which is inside the maximum attack range, switch to chase mode. 
             if distance_to_player < attack_max:
                 self.state = 'chase'
-            ### enemies randomly stop for a while before moving again
-            elif self.stand_timer > 0:
-                self.is_moving = False
-                self.stand_timer -= 1
             else:
-                ### moving back and forth to simulate patrol 
-                self.is_moving = True
-                ### determine which direction 
-                dx = self.speed * self.patrol_dir
-                ### check if moving will fall off the platform, stopped if will 
-                if not will_fall_off_platform(dx):
-                    ### move the enemy 
-                    self.x += dx
-                    self.facing_direction = self.patrol_dir
-                ### if the enemy is out of patrol range, change direction and reset stand timer
-                if abs(self.x - self.patrol_origin) > self.patrol_range:
-                    self.patrol_dir *= -1
-                    self.stand_timer = random.randint(30, 90)
+                self.patrol_move()
 
         ## chase state 
         elif self.state == 'chase':
             ### if player is too close, retreat
             if distance_to_player < retreat_dist:
                 self.state = 'retreat'
-                self.retreat_timer = random.randint(30, 60)
+                self.retreat_timer = self.rng.randint(30, 60)
             ### if player is in attack range, switch to attack state 
             elif attack_min <= distance_to_player < attack_max:
                 self.state = 'attack'
@@ -308,7 +339,7 @@ class BaseEnemy:
                 ### chase player, move towards player, will stop if player in attack range 
                 self.is_moving = True
                 dx = self.speed if player.x > self.x else -self.speed
-                if not will_fall_off_platform(dx):
+                if self.can_step(dx):
                     self.x += dx
                     self.facing_direction = 1 if player.x > self.x else -1
 
@@ -317,7 +348,7 @@ class BaseEnemy:
             ### if player is too close, retreat
             if distance_to_player < retreat_dist:
                 self.state = 'retreat'
-                self.retreat_timer = random.randint(30, 60)
+                self.retreat_timer = self.rng.randint(30, 60)
             ### if player is too far, switch to chase state
             elif distance_to_player > attack_max:
                 self.state = 'chase'
@@ -330,7 +361,7 @@ class BaseEnemy:
                     self.fire(player, camera_x)
                     self.attack_cooldown = self.attack_cooldown_max
                 # Try to use special ability during attack
-                if random.random() < 0.1:  # 10% chance per frame during attack
+                if self.rng.random() < 0.1:  # 10% chance per frame during attack
                     self.use_special_ability(player)
 
         ## retreat state
@@ -340,7 +371,7 @@ class BaseEnemy:
                 ### keep retreating, moving opposite direction of player
                 self.is_moving = True
                 dx = -self.speed if player.x > self.x else self.speed
-                if not will_fall_off_platform(dx):
+                if self.can_step(dx):
                     self.x += dx
                     self.facing_direction = -1 if player.x > self.x else 1
                 self.retreat_timer -= 1
@@ -353,19 +384,10 @@ class BaseEnemy:
 
         # collision detection 
         ## Clamp enemy x position to map walls
-        map_walls = self.structure[self.level]["mapWall"]
-        if len(map_walls) >= 2:
-            left_wall = map_walls[0]
-            right_wall = map_walls[1]
-            min_x = left_wall[0] + left_wall[2]
-            max_x = right_wall[0] - 16
-            if self.x < min_x:
-                self.x = min_x
-            if self.x > max_x:
-                self.x = max_x
+        self.x = self.collision.clamp_x(self.x)
         ## Clamp y to not fall below map (forced to ground)
         ## protection: possibly block by checkFloorCollision first 
-        map_height = self.structure[self.level]["mapWH"][1]
+        map_height = self.collision.height
         if self.y > map_height:
             self.y = map_height
             self.velocity_y = 0
@@ -382,48 +404,114 @@ class BaseEnemy:
         if self.attack_cooldown > 0:
             self.attack_cooldown -= 1
         
-        # Update bullets
-        ## Same as player bullets logic 
-        for bullet in self.bullets:
-            if not bullet['alive']:
-                continue
-            bullet['x'] += bullet['vx']
-            bullet['y'] += bullet['vy']
-            # Remove if out of bounds: x is 2560 and y is 128 (has to be full map because rendering in absolute) 
-            if bullet['x'] < 0 or bullet['x'] > 2560 or bullet['y'] < 0 or bullet['y'] > 128:
-                bullet['alive'] = False
-            # Bullet collision with map floors
-            for floor in self.structure[self.level]['mapFloor']:
-                fx, fy, fw, fh = floor
-                if fx <= bullet['x'] <= fx+fw and fy <= bullet['y'] <= fy+fh:
-                    bullet['alive'] = False
-            # Bullet collision with map walls
-            for wall in self.structure[self.level]['mapWall']:
-                wx, wy, ww, wh = wall
-                if wx <= bullet['x'] <= wx+ww and wy <= bullet['y'] <= wy+wh:
-                    bullet['alive'] = False
-            # Bullet collision with player
-            if (player.x < bullet['x'] < player.x+16 and player.y < bullet['y'] < player.y+16):
-                if self.weapon == 'Pistol':
-                    player.take_damage(1)
-                elif self.weapon == 'Rifle':
-                    player.take_damage(2)
-                    if bullet.get('penetrate_count') is not None:
-                        bullet['penetrate_count'] -= 1
-                        if bullet['penetrate_count'] <= 0:
-                            bullet['alive'] = False
-                if not bullet['penetrate']:
-                    bullet['alive'] = False
-        
-        # Remove dead bullets
-        self.bullets = [b for b in self.bullets if b['alive']]
+        # bullets are moved and collided by the world's bullet pool
 
         # Sniper line damage
         if self.weapon == 'Sniper' and self.is_firing and self.fire_line:
             x0, y0, x1, y1 = self.fire_line
-            if self.line_intersects_rect(x0, y0, x1, y1, player.x, player.y, 16, 16):
+            if src.geometry.segment_intersects_rect(x0, y0, x1, y1, player.x, player.y, 16, 16):
                 player.take_damage(5)
 
+    def ai_thresholds(self):
+        """
+        Weapon-based AI thresholds
+        :return (retreat distance, attack min, attack max, patrol distance)
+        """
+        if self.weapon_ai == 'sniper':
+            return (120, 120, self.weapon_range, 200)
+        elif self.weapon_ai == 'rifle':
+            return (40, 40, self.weapon_range, 120)
+        else:
+            return (40, 40, 60, 100)
+
+    def can_step(self, dx):
+        """AI logic: check for platform edge before moving, the step must stay on a walkable span of the floor under the feet"""
+        x = self.x + dx
+        span = self.walk_span
+        ## cached span of the last step: a simple bounds check while the enemy stays on it
+        if span is not None and span[0] == self.y + 16 and span[1] <= x < span[2]:
+            return True
+        span = self.collision.walk_span(x, self.y + 16)
+        if span is None:
+            return False
+        self.walk_span = span
+        return True
+
+    def patrol_move(self):
+        """one frame of patrol: stand for a while, or walk back and forth around the patrol origin"""
+        ### enemies randomly stop for a while before moving again
+        if self.stand_timer > 0:
+            self.is_moving = False
+            self.stand_timer -= 1
+        else:
+            ### moving back and forth to simulate patrol 
+            self.is_moving = True
+            ### determine which direction 
+            dx = self.speed * self.patrol_dir
+            ### check if moving will fall off the platform, stopped if will 
+            if self.can_step(dx):
+                ### move the enemy 
+                self.x += dx
+                self.facing_direction = self.patrol_dir
+            ### if the enemy is out of patrol range, change direction and reset stand timer
+            if abs(self.x - self.patrol_origin) > self.patrol_range:
+                self.patrol_dir *= -1
+                self.stand_timer = self.rng.randint(30, 90)
+
+    # === AI LEVEL OF DETAIL ===
+
+    def ability_idle(self):
+        """
+        Check if update_special_ability would only count down the IDLE_COOLDOWNS (no ability running),
+        subclasses add their own ability state
+        """
+        return not self.special_active and not self.grenades
+
+    def is_quiescent(self):
+        """
+        Check if a frame of update would only be patrol movement
+        (patrolling, grounded, no timer or ability running)
+        """
+        return (self.alive and self.state == 'patrol' and self.visual_state == "normal"
+                and not self.is_firing and self.fire_line is None and self.attack_cooldown == 0
+                and self.ability_idle() and not any(getattr(self, name) for name in self.IDLE_COOLDOWNS)
+                and self.velocity_y == 0 and not self.is_jumping)
+
+    def patrol_envelope(self):
+        """
+        x range the enemy can reach while patrolling, if patrolling there never touches a wall
+        and always lands back on the same floor top (then gravity and floor collision leave y unchanged)
+        :return (left, right), None if the enemy has to be updated frame by frame
+        """
+        ## patrol turns around one step past the range, 1 px more covers float rounding
+        left = min(self.x, self.patrol_origin - self.patrol_range) - self.speed - 1
+        right = max(self.x, self.patrol_origin + self.patrol_range) + self.speed + 1
+        collision = self.collision
+        if collision.min_x is not None and (left < collision.min_x or right > collision.max_x):
+            return None
+        ## velocity is 0 on the ground, so next frame gravity moves y by exactly one gravity step
+        if collision.landing_top_between(left, right, self.y + self.gravity) != self.y + 16:
+            return None
+        return (left, right)
+
+    def fast_forward(self, frames):
+        """replay `frames` quiescent frames of update: exact, but stand phases are skipped at once"""
+        while frames > 0:
+            if self.stand_timer > 0:
+                skipped = min(frames, self.stand_timer)
+                self.is_moving = False
+                self.stand_timer -= skipped
+                frames -= skipped
+            else:
+                self.patrol_move()
+                frames -= 1
+
+    def catch_up(self):
+        """bring an asleep enemy up to the current frame"""
+        if self.lod_pending:
+            self.fast_forward(self.lod_pending)
+            self.lod_pending = 0
+
     # Fire logic for enemies
     def fire(self, player, camera_x=0):
         """Fire a bullet towards the player"""
@@ -450,9 +538,9 @@ class BaseEnemy:
             angle = math.atan2(player_screen_y - enemy_screen_y, predicted_x - self.x)
 
             ### there is miss chance for all enemies 
-            if random.random() < self.miss_chance:
+            if self.rng.random() < self.miss_chance:
                 ### intentionally miss the shot
-                angle += random.uniform(-0.4, 0.4)
+                angle += self.rng.uniform(-0.4, 0.4)
 
             ### sniper is special, it will draw a line instead of firing a bullet
             if self.weapon == 'Sniper':
@@ -472,54 +560,33 @@ class BaseEnemy:
                 bx = self.x + 8 + vx * 2
                 by = self.y + 8 + vy * 2
 
-                ## Create bullet dictionary and append it to the collections to wait for rendering 
-                bullet = {'x': bx, 'y': by, 'vx': vx, 'vy': vy, 'color': color, 'penetrate': penetrate, 'alive': True}
-                if self.weapon == 'Rifle':
-                    bullet['penetrate_count'] = 2
-                self.bullets.append(bullet)
+                ## damage dealt to the player depends on the weapon, rifle bullets can penetrate twice 
+                damage = 2 if self.weapon == 'Rifle' else 1
+                penetrate_count = 2 if self.weapon == 'Rifle' else -1
+
+                ## store the bullet into the shared bullet pool to wait for rendering 
+                self.bullet_pool.spawn(bx, by, vx, vy, color, penetrate, damage, src.bullet_pool.OWNER_ENEMY, penetrate_count)
 
     def calculate_fire_line(self, angle):
         """Calculate the muzzle position and the end point of the sniper line"""
         # same as player muzzle position, but with enemy position
         enemy_cx = self.x + 8
         enemy_cy = self.y + 8
-        muzzle_x = int(enemy_cx + math.cos(angle) * 8)
-        muzzle_y = int(enemy_cy + math.sin(angle) * 8)
         max_length = 2560
-        step = 2
-        for l in range(0, max_length, step):
-            tx = int(muzzle_x + math.cos(angle) * l)
-            ty = int(muzzle_y + math.sin(angle) * l)
-            if tx < 0 or tx >= 2560 or ty < 0 or ty >= 128:
-                return (muzzle_x, muzzle_y, tx, ty)
-            for floor in self.structure[self.level]["mapFloor"]:
-                fx, fy, fw, fh = floor
-                if fx <= tx < fx+fw and fy <= ty < fy+fh:
-                    return (muzzle_x, muzzle_y, tx, ty)
-        tx = int(muzzle_x + math.cos(angle) * max_length)
-        ty = int(muzzle_y + math.sin(angle) * max_length)
-        return (muzzle_x, muzzle_y, tx, ty)
+        return src.raycast.fire_line(self.collision, enemy_cx, enemy_cy, angle, max_length)
 
     def checkFloorCollision(self, level):
         """Check if the enemy is on a floor, and adjust position accordingly"""
         # Check if the enemy is on a floor
-        floors = self.structure[level]["mapFloor"]
-        on_floor = False
-        for floor in floors:
-            floor_x, floor_y, floor_w, floor_h = floor
-            if (self.x < floor_x + floor_w and 
-                self.x + 16 > floor_x and 
-                self.y + 16 >= floor_y and 
-                self.y + 16 <= floor_y + floor_h + 5):
-                self.y = floor_y - 16
-                self.velocity_y = 0
-                self.is_jumping = False
-                on_floor = True
-                break
-        if not on_floor:
+        floor_y = src.collision.get_compiled_level(level).landing_floor(self.x, self.y)
+        if floor_y is not None:
+            self.y = floor_y - 16
+            self.velocity_y = 0
+            self.is_jumping = False
+        else:
             self.is_jumping = True
 
-    def draw(self, x_offset=0, target=None):
+    def draw(self, x_offset=0, target=None, aim=None):
         """
         Draw the enemy on the screen
         This method should not be overridden in subclasses, but can be extended
@@ -530,102 +597,63 @@ class BaseEnemy:
             sx, sy = self.sprite_damage_right if self.facing_direction == 1 else self.sprite_damage_left
         else:
             sx, sy = self.sprite_right if self.facing_direction == 1 else self.sprite_left
-        pyxel.blt(self.x - x_offset, self.y, 0, sx, sy, 16, 16, 14)
-        if self.visual_state != "defeated":
-            self.draw_weapon(x_offset, target)
-        # Draw bullets
-        for bullet in self.bullets:
-            if bullet['alive']:
-                pyxel.circ(bullet['x'] - x_offset, bullet['y'], 1, bullet['color'])
+        ## sprite and weapon (the weapon sticks out up to 4 px around the sprite), skipped outside the view
+        if culler.visible(self.x - x_offset - 4, self.y - 4, 24, 24):
+            pyxel.blt(self.x - x_offset, self.y, 0, sx, sy, 16, 16, 14)
+            if self.visual_state != "defeated":
+                self.draw_weapon(x_offset, target, aim)
         # Draw sniper line if active
         if self.weapon == 'Sniper' and self.is_firing and self.fire_line:
             x0, y0, x1, y1 = self.fire_line
-            pyxel.line(x0 - x_offset, y0, x1 - x_offset, y1, 8)
+            if culler.visible_line(x0 - x_offset, y0, x1 - x_offset, y1):
+                pyxel.line(x0 - x_offset, y0, x1 - x_offset, y1, 8)
         
         # Draw grenades
         for grenade in self.grenades:
-            if grenade['alive']:
-                pyxel.blt(grenade['x'] - x_offset - 4, grenade['y'] - 4, 0, 0, 208, 8, 8, 14)
+            if grenade.alive and culler.visible(grenade.x - x_offset - 4, grenade.y - 4, 8, 8):
+                pyxel.blt(grenade.x - x_offset - 4, grenade.y - 4, 0, 0, 208, 8, 8, 14)
         
         # Draw special ability effects
         if self.special_active:
             self.draw_special_effect(x_offset)
 
-    def draw_weapon(self, x_offset=0, target=None):
-        # Use player weapon logic for aiming and facing
-        if target is not None:
-            enemy_screen_x = self.x - x_offset + 8
-            enemy_screen_y = self.y + 8
-            player_screen_x = target.x - x_offset + 8
-            player_screen_y = target.y + 8
-            angle = math.atan2(player_screen_y - enemy_screen_y, player_screen_x - enemy_screen_x)
-        else:
-            angle = 0
-        angle_deg = math.degrees(angle)
-        if angle_deg < 0:
-            angle_deg += 360
-        if 157.5 <= angle_deg < 202.5:
-            idx = 0  # Left
-        elif angle_deg < 22.5 or angle_deg >= 337.5:
-            idx = 1  # Right
-        elif 22.5 <= angle_deg < 67.5:
-            idx = 5  # Right 45 Up
-        elif 112.5 <= angle_deg < 157.5:
-            idx = 4  # Left 45 Up
-        elif 202.5 <= angle_deg < 247.5:
-            idx = 3  # Left 45 Down
-        elif 292.5 <= angle_deg < 337.5:
-            idx = 2  # Right 45 Down
-        elif 247.5 <= angle_deg < 292.5:
-            idx = 7  # Down
-        elif 67.5 <= angle_deg < 112.5:
-            idx = 6  # Up
-        else:
-            idx = 1  # Default to Right
+    def weapon_aim(self, target=None):
+        """
+        aim of the weapon sprite towards the target (see src/direction.py)
+        :return (sprite index, unit x, unit y)
+        """
+        if target is None:
+            return src.direction.RIGHT, 1.0, 0.0
+        return src.direction.aim(target.x - self.x, target.y - self.y)
+
+    def draw_weapon(self, x_offset=0, target=None, aim=None):
+        # Use player weapon logic for aiming and facing (aim: precomputed weapon_aim, see weapon_aims)
+        idx, ux, uy = aim if aim is not None else self.weapon_aim(target)
         sx, sy = self.weapon_sprites[idx]
         enemy_screen_x = self.x - x_offset + 8
         enemy_screen_y = self.y + 8
-        wx = int(enemy_screen_x + math.cos(angle) * 8 - self.weapon_w // 2)
-        wy = int(enemy_screen_y + math.sin(angle) * 8 - self.weapon_h // 2)
+        wx = int(enemy_screen_x + ux * 8 - self.weapon_w // 2)
+        wy = int(enemy_screen_y + uy * 8 - self.weapon_h // 2)
         pyxel.blt(wx, wy, 0, sx, sy, self.weapon_w, self.weapon_h, 14)
 
-    @staticmethod
-    def line_intersects_rect(x0, y0, x1, y1, rx, ry, rw, rh):
-        # Simple AABB vs line segment check
-        if rx <= x0 <= rx+rw and ry <= y0 <= ry+rh:
-            return True
-        if rx <= x1 <= rx+rw and ry <= y1 <= ry+rh:
-            return True
-        def ccw(A, B, C):
-            return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
-        def intersect(A,B,C,D):
-            return ccw(A,C,D) != ccw(B,C,D) and ccw(A,B,C) != ccw(A,B,D)
-        rect_edges = [
-            ((rx,ry), (rx+rw,ry)),
-            ((rx+rw,ry), (rx+rw,ry+rh)),
-            ((rx+rw,ry+rh), (rx,ry+rh)),
-            ((rx,ry+rh), (rx,ry)),
-        ]
-        for edge in rect_edges:
-            if intersect((x0,y0), (x1,y1), edge[0], edge[1]):
-                return True
-        return False
 
 # Robot Enemies
 class RobotEnemy0(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(0, x, y, level)
+    __slots__ = ('original_speed',)
+    special_ability = "Shield"
+    special_cooldown_max = 180  # 3 seconds
+    special_duration = 120  # 2 seconds
+    sprite_left = (0, 16)
+    sprite_right = (16, 16)
+    sprite_damage_left = (32, 16)
+    sprite_damage_right = (48, 16)
+    sprite_defeated_left = (64, 16)
+    sprite_defeated_right = (80, 16)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(0, x, y, level, rng)
         self.miss_chance = 0.75
-        self.special_ability = "Shield"
-        self.special_cooldown_max = 180  # 3 seconds
-        self.special_duration = 120  # 2 seconds
         self.hp = 30
-        self.sprite_left = (0, 16)
-        self.sprite_right = (16, 16)
-        self.sprite_damage_left = (32, 16)
-        self.sprite_damage_right = (48, 16)
-        self.sprite_defeated_left = (64, 16)
-        self.sprite_defeated_right = (80, 16)
         self.original_speed = self.speed
 
     def activate_special_ability(self, player):
@@ -644,43 +672,52 @@ class RobotEnemy0(BaseEnemy):
 
     def draw_special_effect(self, x_offset):
         """Draw shield effect"""
-        if self.special_active:
+        if self.special_active and culler.visible(self.x - x_offset - 4, self.y, 24, 16):
             # Draw shield overlay
             if self.facing_direction == 1:  # Right
                 pyxel.blt(self.x - x_offset + 4, self.y, 0, 32, 144, 16, 16, 14)
             else:  # Left
                 pyxel.blt(self.x - x_offset - 4, self.y, 0, 48, 144, 16, 16, 14)
 class RobotEnemy1(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(1, x, y, level)
+    IDLE_COOLDOWNS = ('special_cooldown', 'laser_sweep_cooldown')
+    __slots__ = (
+        'emp_pulse_timer', 'laser_sweep_cooldown', 'laser_sweep_active', 'laser_sweep_timer', 'laser_sweep_y',
+        'laser_sweep_warning',
+    )
+    special_ability = "EMP"
+    special_cooldown_max = 300  # 5 seconds
+    special_duration = 90  # 1.5 seconds
+    sprite_left = (0, 96)
+    sprite_right = (16, 96)
+    sprite_damage_left = (32, 96)
+    sprite_damage_right = (48, 96)
+    sprite_defeated_left = (64, 96)
+    sprite_defeated_right = (80, 96)
+    laser_sweep_cooldown_max = 360
+    laser_sweep_duration = 40
+    laser_sweep_warning_duration = 30
+    emp_debuff_duration = 60  # 1s
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(1, x, y, level, rng)
         self.miss_chance = 0.7
-        self.special_ability = "EMP"
-        self.special_cooldown_max = 300  # 5 seconds
-        self.special_duration = 90  # 1.5 seconds
         self.hp = 35
-        self.sprite_left = (0, 96)
-        self.sprite_right = (16, 96)
-        self.sprite_damage_left = (32, 96)
-        self.sprite_damage_right = (48, 96)
-        self.sprite_defeated_left = (64, 96)
-        self.sprite_defeated_right = (80, 96)
         self.emp_pulse_timer = 0
         # Laser Sweep
         self.laser_sweep_cooldown = 0
-        self.laser_sweep_cooldown_max = 360
         self.laser_sweep_active = False
         self.laser_sweep_timer = 0
-        self.laser_sweep_duration = 40
         self.laser_sweep_y = 0
         self.laser_sweep_warning = 0
-        self.laser_sweep_warning_duration = 30
-        self.emp_debuff_duration = 60  # 1s
+
+    def ability_idle(self):
+        return super().ability_idle() and self.emp_pulse_timer == 0 and not self.laser_sweep_active
 
     def activate_special_ability(self, player):
         """Activate EMP - creates an electromagnetic pulse that damages and EMPs player"""
         self.emp_pulse_timer = 30  # Create initial pulse
         # 50% chance to do laser sweep instead
-        if self.laser_sweep_cooldown == 0 and random.random() < 0.5:
+        if self.laser_sweep_cooldown == 0 and self.rng.random() < 0.5:
             self.laser_sweep_active = True
             self.laser_sweep_timer = self.laser_sweep_duration
             self.laser_sweep_warning = self.laser_sweep_warning_duration
@@ -717,7 +754,7 @@ class RobotEnemy1(BaseEnemy):
         if self.special_active:
             # Draw EMP pulse
             pulse_radius = 48 - (self.special_timer // 2)
-            if pulse_radius > 0:
+            if pulse_radius > 0 and culler.visible_circle(self.x - x_offset + 8, self.y + 8, pulse_radius):
                 for i in range(0, pulse_radius, 8):
                     alpha = max(0, 15 - (i // 4))
                     pyxel.circb(self.x - x_offset + 8, self.y + 8, i, alpha)
@@ -734,19 +771,21 @@ class RobotEnemy1(BaseEnemy):
                     pyxel.line(0, self.laser_sweep_y + i, 2560, self.laser_sweep_y + i, 8)
                 pyxel.text(self.x - x_offset, self.laser_sweep_y - 12, "LASER SWEEP", 8)
 class RobotEnemy2(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(2, x, y, level)
+    __slots__ = ('rocket_jump_direction',)
+    special_ability = "Rocket Jump"
+    special_cooldown_max = 240  # 4 seconds
+    special_duration = 30  # 0.5 seconds
+    sprite_left = (0, 112)
+    sprite_right = (16, 112)
+    sprite_damage_left = (32, 112)
+    sprite_damage_right = (48, 112)
+    sprite_defeated_left = (64, 112)
+    sprite_defeated_right = (80, 112)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(2, x, y, level, rng)
         self.miss_chance = 0.4
-        self.special_ability = "Rocket Jump"
-        self.special_cooldown_max = 240  # 4 seconds
-        self.special_duration = 30  # 0.5 seconds
         self.hp = 45
-        self.sprite_left = (0, 112)
-        self.sprite_right = (16, 112)
-        self.sprite_damage_left = (32, 112)
-        self.sprite_damage_right = (48, 112)
-        self.sprite_defeated_left = (64, 112)
-        self.sprite_defeated_right = (80, 112)
         self.rocket_jump_direction = 0
 
     def activate_special_ability(self, player):
@@ -762,7 +801,7 @@ class RobotEnemy2(BaseEnemy):
 
     def draw_special_effect(self, x_offset):
         """Draw rocket jump effect"""
-        if self.special_active:
+        if self.special_active and culler.visible(self.x - x_offset + 6, self.y + 16, 5, 3):
             # Draw rocket trail
             trail_x = self.x - x_offset + 8
             trail_y = self.y + 16
@@ -770,19 +809,21 @@ class RobotEnemy2(BaseEnemy):
                 pyxel.pset(trail_x + random.randint(-2, 2), trail_y + i, 8)
 # Human Enemies
 class HumanEnemy0(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(3, x, y, level)
+    __slots__ = ('original_speed', 'roll_direction')
+    special_ability = "Roll"
+    special_cooldown_max = 120  # 2 seconds
+    special_duration = 45  # 0.75 seconds
+    sprite_left = (0, 32)
+    sprite_right = (16, 32)
+    sprite_damage_left = (32, 32)
+    sprite_damage_right = (48, 32)
+    sprite_defeated_left = (64, 32)
+    sprite_defeated_right = (80, 32)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(3, x, y, level, rng)
         self.miss_chance = 0.8
-        self.special_ability = "Roll"
-        self.special_cooldown_max = 120  # 2 seconds
-        self.special_duration = 45  # 0.75 seconds
         self.hp = 20
-        self.sprite_left = (0, 32)
-        self.sprite_right = (16, 32)
-        self.sprite_damage_left = (32, 32)
-        self.sprite_damage_right = (48, 32)
-        self.sprite_defeated_left = (64, 32)
-        self.sprite_defeated_right = (80, 32)
         self.original_speed = self.speed
         self.roll_direction = 0
 
@@ -809,26 +850,28 @@ class HumanEnemy0(BaseEnemy):
 
     def draw_special_effect(self, x_offset):
         """Draw roll effect"""
-        if self.special_active:
+        if self.special_active and culler.visible(self.x - x_offset + 5, self.y + 12, 7, 2):
             # Draw roll dust trail
             trail_x = self.x - x_offset + 8
             trail_y = self.y + 12
             for i in range(2):
                 pyxel.pset(trail_x + random.randint(-3, 3), trail_y + i, 7)
 class HumanEnemy1(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(4, x, y, level)
+    __slots__ = ('original_speed',)
+    special_ability = "Sprint"
+    special_cooldown_max = 180  # 3 seconds
+    special_duration = 90  # 1.5 seconds
+    sprite_left = (0, 48)
+    sprite_right = (16, 48)
+    sprite_damage_left = (32, 48)
+    sprite_damage_right = (48, 48)
+    sprite_defeated_left = (64, 48)
+    sprite_defeated_right = (80, 48)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(4, x, y, level, rng)
         self.miss_chance = 0.6
-        self.special_ability = "Sprint"
-        self.special_cooldown_max = 180  # 3 seconds
-        self.special_duration = 90  # 1.5 seconds
         self.hp = 25
-        self.sprite_left = (0, 48)
-        self.sprite_right = (16, 48)
-        self.sprite_damage_left = (32, 48)
-        self.sprite_damage_right = (48, 48)
-        self.sprite_defeated_left = (64, 48)
-        self.sprite_defeated_right = (80, 48)
         self.original_speed = self.speed
 
     def activate_special_ability(self, player):
@@ -841,30 +884,35 @@ class HumanEnemy1(BaseEnemy):
 
     def draw_special_effect(self, x_offset):
         """Draw sprint effect"""
-        if self.special_active:
+        if self.special_active and culler.visible(self.x - x_offset - 8, self.y, 25, 17):
             # Draw speed lines
             for i in range(3):
                 line_x = self.x - x_offset + random.randint(0, 16)
                 line_y = self.y + random.randint(0, 16)
                 pyxel.line(line_x, line_y, line_x - 8, line_y, 10)
 class HumanEnemy2(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(5, x, y, level)
+    __slots__ = ('flashbangs', 'flashbang_effect_timer')
+    special_ability = "Flashbang"
+    special_cooldown_max = 360  # 6 seconds
+    special_duration = 10  # Short duration
+    sprite_left = (0, 64)
+    sprite_right = (16, 64)
+    sprite_damage_left = (32, 64)
+    sprite_damage_right = (48, 64)
+    sprite_defeated_left = (64, 64)
+    sprite_defeated_right = (80, 64)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(5, x, y, level, rng)
         self.miss_chance = 0.3
-        self.special_ability = "Flashbang"
-        self.special_cooldown_max = 360  # 6 seconds
-        self.special_duration = 10  # Short duration
         self.hp = 35
-        self.sprite_left = (0, 64)
-        self.sprite_right = (16, 64)
-        self.sprite_damage_left = (32, 64)
-        self.sprite_damage_right = (48, 64)
-        self.sprite_defeated_left = (64, 64)
-        self.sprite_defeated_right = (80, 64)
         # TODO Flashbang system: not really working now, need to be fixed
-        self.flashbangs = []  # List of {'x','y','vx','vy','timer','alive','exploded'}
+        self.flashbangs = []  # List of Grenade
         self.flashbang_effect_timer = 0
 
+    def ability_idle(self):
+        return super().ability_idle() and not self.flashbangs
+
     def activate_special_ability(self, player):
         """Activate flashbang throw"""
         # Throw flashbang at player position
@@ -874,66 +922,61 @@ class HumanEnemy2(BaseEnemy):
         if dist > 0:
             dx /= dist
             dy /= dist
-        speed = 2.0 + random.uniform(-0.5, 0.5)
+        speed = 2.0 + self.rng.uniform(-0.5, 0.5)
         vx = dx * speed
         vy = dy * speed - 1.0
-        flashbang = {
-            'x': self.x + 8,
-            'y': self.y + 8,
-            'vx': vx,
-            'vy': vy,
-            'timer': 60,  # 1s fuse
-            'alive': True,
-            'exploded': False
-        }
+        flashbang = Grenade(self.x + 8, self.y + 8, vx, vy, 60)  # 1s fuse
         self.flashbangs.append(flashbang)
 
     def update_special_ability(self, player):
         super().update_special_ability(player)
         # Update flashbangs
         for fb in self.flashbangs:
-            if not fb['alive']:
+            if not fb.alive:
                 continue
-            fb['x'] += fb['vx']
-            fb['y'] += fb['vy']
-            fb['vy'] += 0.1  # Gravity
-            fb['timer'] -= 1
-            if fb['timer'] <= 0 and not fb['exploded']:
-                fb['exploded'] = True
-                fb['alive'] = False
+            fb.x += fb.vx
+            fb.y += fb.vy
+            fb.vy += 0.1  # Gravity
+            fb.timer -= 1
+            if fb.timer <= 0 and not fb.exploded:
+                fb.exploded = True
+                fb.alive = False
                 # Flash effect: if player is in range
-                dx = fb['x'] - (player.x + 8)
-                dy = fb['y'] - (player.y + 8)
+                dx = fb.x - (player.x + 8)
+                dy = fb.y - (player.y + 8)
                 if math.sqrt(dx*dx + dy*dy) <= 40:
                     player.apply_emp_debuff(45)  # 0.75s disable
                     if hasattr(player, 'flashbang_blind_timer'):
                         player.flashbang_blind_timer = 30  # 0.5s whiteout
         # Remove dead flashbangs
-        self.flashbangs = [fb for fb in self.flashbangs if fb['alive']]
+        self.flashbangs = [fb for fb in self.flashbangs if fb.alive]
 
     def draw_special_effect(self, x_offset):
         # Draw flashbangs
         for fb in self.flashbangs:
-            if fb['alive']:
-                pyxel.blt(fb['x'] - x_offset - 4, fb['y'] - 4, 0, 0, 208, 8, 8, 14)
-            elif fb['exploded']:
+            if fb.alive:
+                if culler.visible(fb.x - x_offset - 4, fb.y - 4, 8, 8):
+                    pyxel.blt(fb.x - x_offset - 4, fb.y - 4, 0, 0, 208, 8, 8, 14)
+            elif fb.exploded and culler.visible_circle(fb.x - x_offset, fb.y, 24):
                 # Draw flash
-                pyxel.circ(fb['x'] - x_offset, fb['y'], 20, 7)
-                pyxel.circ(fb['x'] - x_offset, fb['y'], 24, 7)
+                pyxel.circ(fb.x - x_offset, fb.y, 20, 7)
+                pyxel.circ(fb.x - x_offset, fb.y, 24, 7)
 class HumanEnemy3(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(6, x, y, level)
+    __slots__ = ('original_miss_chance',)
+    special_ability = "Camouflage"
+    special_cooldown_max = 420  # 7 seconds
+    special_duration = 150  # 2.5 seconds
+    sprite_left = (0, 80)
+    sprite_right = (16, 80)
+    sprite_damage_left = (32, 80)
+    sprite_damage_right = (48, 80)
+    sprite_defeated_left = (64, 80)
+    sprite_defeated_right = (80, 80)
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(6, x, y, level, rng)
         self.miss_chance = 0.1
-        self.special_ability = "Camouflage"
-        self.special_cooldown_max = 420  # 7 seconds
-        self.special_duration = 150  # 2.5 seconds
         self.hp = 50
-        self.sprite_left = (0, 80)
-        self.sprite_right = (16, 80)
-        self.sprite_damage_left = (32, 80)
-        self.sprite_damage_right = (48, 80)
-        self.sprite_defeated_left = (64, 80)
-        self.sprite_defeated_right = (80, 80)
         self.original_miss_chance = self.miss_chance
 
     def activate_special_ability(self, player):
@@ -946,7 +989,7 @@ class HumanEnemy3(BaseEnemy):
 
     def draw_special_effect(self, x_offset):
         """Draw camouflage effect"""
-        if self.special_active:
+        if self.special_active and culler.visible(self.x - x_offset, self.y, 16, 16):
             # Draw camouflage overlay (semi-transparent)
             if self.facing_direction == 1:  # Right
                 pyxel.blt(self.x - x_offset, self.y, 0, 0, 80, 16, 16, 14)
@@ -954,34 +997,32 @@ class HumanEnemy3(BaseEnemy):
                 pyxel.blt(self.x - x_offset, self.y, 0, 16, 80, 16, 16, 14)
 
 class HumanEnemy4(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(7, x, y, level)
+    IDLE_COOLDOWNS = ('special_cooldown', 'turret_cooldown')
+    __slots__ = ('turrets', 'turret_cooldown')
+    special_ability = "Deploy Turret"
+    sprite_left = (0, 80)
+    sprite_right = (16, 80)
+    sprite_damage_left = (32, 80)
+    sprite_damage_right = (48, 80)
+    sprite_defeated_left = (64, 80)
+    sprite_defeated_right = (80, 80)
+    turret_cooldown_max = 600
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(7, x, y, level, rng)
         self.miss_chance = 0.1
-        self.special_ability = "Deploy Turret"
         self.hp = 20
-        self.sprite_left = (0, 80)
-        self.sprite_right = (16, 80)
-        self.sprite_damage_left = (32, 80)
-        self.sprite_damage_right = (48, 80)
-        self.sprite_defeated_left = (64, 80)
-        self.sprite_defeated_right = (80, 80)
         # TODO Turret system: not really working now, need to fix
-        self.turrets = []  # List of turrets
+        self.turrets = []  # List of Turret
         self.turret_cooldown = 0
-        self.turret_cooldown_max = 600
+
+    def ability_idle(self):
+        return super().ability_idle() and not self.turrets
 
     def activate_special_ability(self, player):
         """Deploy a turret near self"""
         if self.turret_cooldown == 0 and len(self.turrets) < 2:
-            turret = {
-                'x': self.x + random.randint(-8, 8),
-                'y': self.y + 12,
-                'hp': 8,
-                'fire_timer': 0,
-                'fire_cooldown': 30,
-                'alive': True,
-                'bullets': []
-            }
+            turret = Turret(self.x + self.rng.randint(-8, 8), self.y + 12)
             self.turrets.append(turret)
             self.turret_cooldown = self.turret_cooldown_max
 
@@ -989,98 +1030,94 @@ class HumanEnemy4(BaseEnemy):
         super().update_special_ability(player)
         # Update turrets
         for turret in self.turrets:
-            if not turret['alive']:
+            if not turret.alive:
                 continue
             # Fire at player
-            if turret['fire_timer'] <= 0:
-                dx = (player.x + 8) - turret['x']
-                dy = (player.y + 8) - turret['y']
+            if turret.fire_timer <= 0:
+                dx = (player.x + 8) - turret.x
+                dy = (player.y + 8) - turret.y
                 angle = math.atan2(dy, dx)
                 speed = 5
                 vx = math.cos(angle) * speed
                 vy = math.sin(angle) * speed
-                bullet = {'x': turret['x'], 'y': turret['y'], 'vx': vx, 'vy': vy, 'alive': True}
-                turret['bullets'].append(bullet)
-                turret['fire_timer'] = turret['fire_cooldown']
+                # turret bullets hit the player for 2 damage and stop
+                self.bullet_pool.spawn(turret.x, turret.y, vx, vy, 10, False, 2, src.bullet_pool.OWNER_TURRET)
+                turret.fire_timer = turret.fire_cooldown
             else:
-                turret['fire_timer'] -= 1
-            # Update bullets
-            for bullet in turret['bullets']:
-                if not bullet['alive']:
-                    continue
-                bullet['x'] += bullet['vx']
-                bullet['y'] += bullet['vy']
-                # Out of bounds
-                if bullet['x'] < 0 or bullet['x'] > 2560 or bullet['y'] < 0 or bullet['y'] > 128:
-                    bullet['alive'] = False
-                # Hit player
-                if (player.x < bullet['x'] < player.x+16 and player.y < bullet['y'] < player.y+16):
-                    player.take_damage(2)
-                    bullet['alive'] = False
-            turret['bullets'] = [b for b in turret['bullets'] if b['alive']]
+                turret.fire_timer -= 1
         # Remove dead turrets
-        self.turrets = [t for t in self.turrets if t['alive']]
+        self.turrets = [t for t in self.turrets if t.alive]
         if self.turret_cooldown > 0:
             self.turret_cooldown -= 1
 
     def draw_special_effect(self, x_offset):
         # Draw turrets
         for turret in self.turrets:
-            if turret['alive']:
-                pyxel.blt(turret['x'] - x_offset, turret['y'], 0, 0, 216, 8, 8, 14)
-                pyxel.rectb(turret['x'] - x_offset, turret['y'] - 4, 8, 2, 8)  # Health bar
-                pyxel.rect(turret['x'] - x_offset, turret['y'] - 4, int(8 * turret['hp'] / 8), 2, 11)
-                for bullet in turret['bullets']:
-                    if bullet['alive']:
-                        pyxel.circ(bullet['x'] - x_offset, bullet['y'], 1, 10)
+            if turret.alive and culler.visible(turret.x - x_offset, turret.y - 4, 8, 12):
+                pyxel.blt(turret.x - x_offset, turret.y, 0, 0, 216, 8, 8, 14)
+                pyxel.rectb(turret.x - x_offset, turret.y - 4, 8, 2, 8)  # Health bar
+                pyxel.rect(turret.x - x_offset, turret.y - 4, int(8 * turret.hp / 8), 2, 11)
 class BossEnemy(BaseEnemy):
-    def __init__(self, x, y, level=0):
-        super().__init__(8, x, y, level)
+    __slots__ = (
+        'walk_anim_timer', 'walk_anim_index', 'teleport_cooldown', 'teleporting', 'teleport_timer',
+        'teleport_flash_timer', 'last_damage_time', 'emp_cooldown', 'emp_active', 'emp_wave_timer', 'emp_radius',
+        'emp_hit', 'shield_cooldown', 'shield_active', 'shield_timer', 'summon_cooldown', 'summon_active',
+        'summon_timer', 'summon_flash', 'summon_minions', '_teleport_new_x', '_teleport_new_y', 'grenade_cooldown',
+        'grenade_active', 'grenade_timer', 'homing_grenades', 'berserk', 'gravitywell_cooldown',
+        'gravitywell_active', 'gravitywell_timer', 'gravitywell_point', '_teleport_old_pos',
+    )
+    sprite_left = (0, 224)
+    sprite_right = (16, 224)
+    sprite_damage_left = (96, 224)
+    sprite_damage_right = (112, 224)
+    sprite_defeated_left = (128, 224)
+    sprite_defeated_right = (144, 224)
+    walk_left = ((32, 224), (48, 224))
+    walk_right = ((64, 224), (80, 224))
+    teleport_cooldown_max = 360
+    teleport_duration = 20
+    teleport_flash_duration = 8
+    emp_cooldown_max = 420
+    emp_wave_time = 30
+    emp_max_radius = 96
+    shield_cooldown_max = 480  # 8 seconds
+    shield_duration = 90  # 1.5 seconds
+    summon_cooldown_max = 600  # 10 seconds
+    grenade_cooldown_max = 360  # 6 seconds
+    berserk_speed_mult = 1.7
+    berserk_attack_mult = 0.5  # 2x faster
+    gravitywell_cooldown_max = 540  # 9 seconds
+    gravitywell_duration = 60  # 1 second
+    gravitywell_radius = 64
+    gravitywell_pull_strength = 2.0
+
+    def __init__(self, x, y, level=0, rng=None):
+        super().__init__(8, x, y, level, rng)
         self.hp = 700
         self.weapon = 'Rifle'
-        self.weapon_sprites = [
-            (0, 160), (8, 160), (0, 168), (8, 168), (16, 160), (24, 160), (16, 168), (24, 168)
-        ]
+        self.weapon_sprites = WEAPON_TYPES[1]['sprites']
         self.weapon_range = 100
         self.weapon_ai = 'rifle'
-        # Sprite locations
-        self.sprite_left = (0, 224)
-        self.sprite_right = (16, 224)
-        self.sprite_damage_left = (96, 224)
-        self.sprite_damage_right = (112, 224)
-        self.sprite_defeated_left = (128, 224)
-        self.sprite_defeated_right = (144, 224)
         # Walking animation
-        self.walk_left = [(32, 224), (48, 224)]
-        self.walk_right = [(64, 224), (80, 224)]
         self.walk_anim_timer = 0
         self.walk_anim_index = 0
         # Teleport ability
-        self.teleport_cooldown_max = 360
         self.teleport_cooldown = 0
         self.teleporting = False
         self.teleport_timer = 0
-        self.teleport_duration = 20
         self.teleport_flash_timer = 0
-        self.teleport_flash_duration = 8
         self.last_damage_time = -999
         # EMP ability
-        self.emp_cooldown_max = 420
         self.emp_cooldown = 0
         self.emp_active = False
-        self.emp_wave_time = 30
         self.emp_wave_timer = 0
         self.emp_radius = 0
-        self.emp_max_radius = 96
         self.emp_hit = False
         # Shield Overload ability
-        self.shield_cooldown_max = 480  # 8 seconds
         self.shield_cooldown = 0
         self.shield_active = False
-        self.shield_duration = 90  # 1.5 seconds
         self.shield_timer = 0
         # Summon Minions ability
-        self.summon_cooldown_max = 600  # 10 seconds
         self.summon_cooldown = 0
         self.summon_active = False
         self.summon_timer = 0
@@ -1090,24 +1127,21 @@ class BossEnemy(BaseEnemy):
         self._teleport_new_x = self.x
         self._teleport_new_y = self.y
         # Homing Grenades ability
-        self.grenade_cooldown_max = 360  # 6 seconds
         self.grenade_cooldown = 0
         self.grenade_active = False
         self.grenade_timer = 0
-        self.homing_grenades = []  # List of {'x','y','vx','vy','timer','alive'}
+        self.homing_grenades = []  # List of Grenade
         # Berserk state
         self.berserk = False
-        self.berserk_speed_mult = 1.7
-        self.berserk_attack_mult = 0.5  # 2x faster
         # Gravity Well ability
-        self.gravitywell_cooldown_max = 540  # 9 seconds
         self.gravitywell_cooldown = 0
         self.gravitywell_active = False
         self.gravitywell_timer = 0
-        self.gravitywell_duration = 60  # 1 second
         self.gravitywell_point = (self.x, self.y)
-        self.gravitywell_radius = 64
-        self.gravitywell_pull_strength = 2.0
+
+    def is_quiescent(self):
+        """the boss always runs its full update (abilities, summons)"""
+        return False
 
     def take_damage(self, amount):
         # If shield is active, ignore damage
@@ -1125,11 +1159,11 @@ class BossEnemy(BaseEnemy):
         self.teleport_cooldown = self.teleport_cooldown_max
         self.visual_state = "damage"
         self._teleport_old_pos = (self.x, self.y)
-        main_floor = self.structure[self.level]["mapFloor"][0]
+        main_floor = self.collision.floors[0]
         fx, fy, fw, fh = main_floor
         min_x = fx + 8
         max_x = fx + fw - 24
-        self._teleport_new_x = random.randint(min_x, max_x)
+        self._teleport_new_x = self.rng.randint(min_x, max_x)
         self._teleport_new_y = fy - 16
 
     def update(self, player, camera_x=0, enemies=None):
@@ -1166,12 +1200,12 @@ class BossEnemy(BaseEnemy):
             self.grenade_timer -= 1
             if self.grenade_timer == 10:
                 # Launch 2-3 grenades
-                for i in range(random.randint(2, 3)):
-                    angle = random.uniform(-0.5, 0.5) + math.atan2(player.y - self.y, player.x - self.x)
+                for i in range(self.rng.randint(2, 3)):
+                    angle = self.rng.uniform(-0.5, 0.5) + math.atan2(player.y - self.y, player.x - self.x)
                     speed = 2.0
                     vx = math.cos(angle) * speed
                     vy = math.sin(angle) * speed
-                    grenade = {'x': self.x + 8, 'y': self.y + 8, 'vx': vx, 'vy': vy, 'timer': 90, 'alive': True}
+                    grenade = Grenade(self.x + 8, self.y + 8, vx, vy, 90)
                     self.homing_grenades.append(grenade)
             if self.grenade_timer <= 0:
                 self.grenade_active = False
@@ -1180,45 +1214,49 @@ class BossEnemy(BaseEnemy):
             self.attack_cooldown = self.attack_cooldown_max
         # Update homing grenades
         for grenade in self.homing_grenades:
-            if not grenade['alive']:
+            if not grenade.alive:
                 continue
             # Home in on player
-            dx = (player.x + 8) - grenade['x']
-            dy = (player.y + 8) - grenade['y']
+            dx = (player.x + 8) - grenade.x
+            dy = (player.y + 8) - grenade.y
             dist = math.hypot(dx, dy)
             if dist > 0:
                 dx /= dist
                 dy /= dist
-                grenade['vx'] += dx * 0.1
-                grenade['vy'] += dy * 0.1
+                grenade.vx += dx * 0.1
+                grenade.vy += dy * 0.1
                 # Clamp speed
-                speed = math.hypot(grenade['vx'], grenade['vy'])
+                speed = math.hypot(grenade.vx, grenade.vy)
                 max_speed = 2.5
                 if speed > max_speed:
-                    grenade['vx'] *= max_speed / speed
-                    grenade['vy'] *= max_speed / speed
-            grenade['x'] += grenade['vx']
-            grenade['y'] += grenade['vy']
-            grenade['timer'] -= 1
+                    grenade.vx *= max_speed / speed
+                    grenade.vy *= max_speed / speed
+            grenade.x += grenade.vx
+            grenade.y += grenade.vy
+            grenade.timer -= 1
             # Explosion on timer or close to player
-            if grenade['timer'] <= 0 or math.hypot(grenade['x'] - (player.x + 8), grenade['y'] - (player.y + 8)) < 12:
-                grenade['alive'] = False
+            if grenade.timer <= 0 or math.hypot(grenade.x - (player.x + 8), grenade.y - (player.y + 8)) < 12:
+                grenade.alive = False
                 # Damage player if close
-                if math.hypot(grenade['x'] - (player.x + 8), grenade['y'] - (player.y + 8)) < 20:
+                if math.hypot(grenade.x - (player.x + 8), grenade.y - (player.y + 8)) < 20:
                     player.take_damage(12)
         # Remove dead grenades
-        self.homing_grenades = [g for g in self.homing_grenades if g['alive']]
+        self.homing_grenades = [g for g in self.homing_grenades if g.alive]
         # Summon Minions logic
         if self.summon_active:
             self.summon_timer -= 1
             self.summon_flash += 1
             if self.summon_timer == 10 and enemies is not None:
                 # Actually spawn minions (2-3 minions)
-                for i in range(random.randint(2, 3)):
-                    mx = self.x + random.randint(-24, 24)
+                for i in range(self.rng.randint(2, 3)):
+                    mx = self.x + self.rng.randint(-24, 24)
                     my = self.y
-                    minion_type = random.choice([0, 3])  # Robot or Human
-                    minion = create_enemy(minion_type, mx, my, self.level)
+                    minion_type = self.rng.choice([0, 3])  # Robot or Human
+                    minion_rng = src.streams.SplitMix(self.rng.getrandbits(64))
+                    if self.enemy_pool is not None:
+                        minion = self.enemy_pool.acquire(minion_type, mx, my, self.level, self.bullet_pool, minion_rng)
+                    else:
+                        minion = create_enemy(minion_type, mx, my, self.level, self.bullet_pool, minion_rng)
                     enemies.append(minion)
                     self.summon_minions.append((mx, my))
             if self.summon_timer <= 0:
@@ -1279,37 +1317,37 @@ class BossEnemy(BaseEnemy):
                 self.gravitywell_cooldown -= 1
             # AI: Homing Grenades
             if not self.grenade_active and not self.teleporting and self.grenade_cooldown == 0:
-                if random.random() < 0.01:
+                if self.rng.random() < 0.01:
                     self.grenade_active = True
                     self.grenade_timer = 30
             # AI: Summon Minions
             elif not self.summon_active and not self.teleporting and self.summon_cooldown == 0:
-                if random.random() < 0.01:
+                if self.rng.random() < 0.01:
                     self.summon_active = True
                     self.summon_timer = 30
                     self.summon_flash = 0
                     self.summon_minions = []
             # AI: Shield Overload
             elif not self.shield_active and not self.teleporting and self.shield_cooldown == 0:
-                if random.random() < 0.01:
+                if self.rng.random() < 0.01:
                     self.shield_active = True
                     self.shield_timer = self.shield_duration
             # AI: EMP wave
             elif not self.emp_active and not self.teleporting and self.emp_cooldown == 0:
-                if random.random() < 0.01:
+                if self.rng.random() < 0.01:
                     self.emp_active = True
                     self.emp_wave_timer = self.emp_wave_time
                     self.emp_radius = 0
                     self.emp_hit = False
             # AI: Gravity Well
             elif not self.gravitywell_active and not self.teleporting and self.gravitywell_cooldown == 0:
-                if random.random() < 0.01:
+                if self.rng.random() < 0.01:
                     self.gravitywell_active = True
                     self.gravitywell_timer = self.gravitywell_duration
                     # Target a point near the player (but not directly on top)
                     px, py = player.x + 8, player.y + 8
-                    angle = random.uniform(0, 2 * math.pi)
-                    radius = random.randint(24, 48)
+                    angle = self.rng.uniform(0, 2 * math.pi)
+                    radius = self.rng.randint(24, 48)
                     gx = px + int(math.cos(angle) * radius)
                     gy = py + int(math.sin(angle) * radius)
                     self.gravitywell_point = (gx, gy)
@@ -1321,34 +1359,35 @@ class BossEnemy(BaseEnemy):
                 self.walk_anim_timer = 0
                 self.walk_anim_index = (self.walk_anim_index + 1) % 2
 
-    def draw(self, x_offset=0, target=None):
+    def draw(self, x_offset=0, target=None, aim=None):
         # Berserk visual effect
-        if self.berserk:
+        if self.berserk and culler.visible_circle(self.x - x_offset + 8, self.y + 8, 18):
             px = self.x - x_offset
             py = self.y
             pyxel.circb(px + 8, py + 8, 18, 8)
         # Homing Grenades visual
         for grenade in self.homing_grenades:
-            if grenade['alive']:
-                pyxel.blt(grenade['x'] - x_offset - 4, grenade['y'] - 4, 0, 0, 208, 8, 8, 14)
-                pyxel.circb(grenade['x'] - x_offset + 0, grenade['y'] + 0, 10, 10)
+            if grenade.alive and culler.visible_circle(grenade.x - x_offset, grenade.y, 10):
+                pyxel.blt(grenade.x - x_offset - 4, grenade.y - 4, 0, 0, 208, 8, 8, 14)
+                pyxel.circb(grenade.x - x_offset + 0, grenade.y + 0, 10, 10)
         # Summon Minions visual effect
         if self.summon_active:
             for mx, my in self.summon_minions:
                 color = 10 if (self.summon_flash // 4) % 2 == 0 else 7
-                pyxel.circb(mx - x_offset + 8, my + 8, 12, color)
+                if culler.visible_circle(mx - x_offset + 8, my + 8, 12):
+                    pyxel.circb(mx - x_offset + 8, my + 8, 12, color)
         # Shield Overload effect
-        if self.shield_active:
+        if self.shield_active and culler.visible_circle(self.x - x_offset + 8, self.y + 8, 16):
             px = self.x - x_offset
             py = self.y
             pyxel.circb(px + 8, py + 8, 14, 12)
             pyxel.circb(px + 8, py + 8, 16, 7)
         # EMP wave effect
-        if self.emp_active:
+        if self.emp_active and culler.visible_circle(self.x - x_offset + 8, self.y + 8, self.emp_radius):
             pyxel.circ(self.x - x_offset + 8, self.y + 8, self.emp_radius, 9)
             pyxel.circb(self.x - x_offset + 8, self.y + 8, self.emp_radius, 7)
         # Gravity Well visual effect
-        if self.gravitywell_active:
+        if self.gravitywell_active and culler.visible_circle(self.gravitywell_point[0] - x_offset, self.gravitywell_point[1], self.gravitywell_radius):
             gx, gy = self.gravitywell_point
             color = 13 if (self.gravitywell_timer // 4) % 2 == 0 else 7
             pyxel.circ(gx - x_offset, gy, self.gravitywell_radius, color)
@@ -1361,17 +1400,21 @@ class BossEnemy(BaseEnemy):
             bar_x = self.x - x_offset + 8 - bar_w // 2
             bar_y = self.y - 18
             pct = max(0, self.hp / 700)
-            pyxel.rect(bar_x, bar_y, bar_w, bar_h, 1)
-            pyxel.rect(bar_x, bar_y, int(bar_w * pct), bar_h, 8)
-            percent_text = f"BOSS {int(pct*100)}%"
-            pyxel.text(bar_x, bar_y - 7, percent_text, 8)
+            ## bar and the text above it
+            if culler.visible(bar_x, bar_y - 7, bar_w, 12):
+                pyxel.rect(bar_x, bar_y, bar_w, bar_h, 1)
+                pyxel.rect(bar_x, bar_y, int(bar_w * pct), bar_h, 8)
+                percent_text = f"BOSS {int(pct*100)}%"
+                pyxel.text(bar_x, bar_y - 7, percent_text, 8)
         # Teleport flash effect
         if self.teleporting and self.teleport_flash_timer > 0:
             ox, oy = getattr(self, '_teleport_old_pos', (self.x, self.y))
             nx = getattr(self, '_teleport_new_x', self.x)
             ny = getattr(self, '_teleport_new_y', self.y)
-            pyxel.circ(ox - x_offset + 8, oy + 8, 12, 10)
-            pyxel.circ(nx - x_offset + 8, ny + 8, 12, 10)
+            if culler.visible_circle(ox - x_offset + 8, oy + 8, 12):
+                pyxel.circ(ox - x_offset + 8, oy + 8, 12, 10)
+            if culler.visible_circle(nx - x_offset + 8, ny + 8, 12):
+                pyxel.circ(nx - x_offset + 8, ny + 8, 12, 10)
         # Draw boss as usual
         if self.visual_state == "defeated":
             sx, sy = self.sprite_defeated_right if self.facing_direction == 1 else self.sprite_defeated_left
@@ -1384,73 +1427,11 @@ class BossEnemy(BaseEnemy):
                 sx, sy = self.walk_left[self.walk_anim_index]
         else:
             sx, sy = self.sprite_right if self.facing_direction == 1 else self.sprite_left
-        pyxel.blt(self.x - x_offset, self.y, 0, sx, sy, 16, 16, 14)
-        if self.visual_state != "defeated":
-            self.draw_weapon(x_offset, target)
-        # Draw bullets
-        for bullet in self.bullets:
-            if bullet['alive']:
-                pyxel.circ(bullet['x'] - x_offset, bullet['y'], 1, bullet['color'])
-
-    def draw_weapon(self, x_offset=0, target=None):
-        # Use player weapon logic for aiming and facing
-        if target is not None:
-            enemy_screen_x = self.x - x_offset + 8
-            enemy_screen_y = self.y + 8
-            player_screen_x = target.x - x_offset + 8
-            player_screen_y = target.y + 8
-            angle = math.atan2(player_screen_y - enemy_screen_y, player_screen_x - enemy_screen_x)
-        else:
-            angle = 0
-        angle_deg = math.degrees(angle)
-        if angle_deg < 0:
-            angle_deg += 360
-        if 157.5 <= angle_deg < 202.5:
-            idx = 0  # Left
-        elif angle_deg < 22.5 or angle_deg >= 337.5:
-            idx = 1  # Right
-        elif 22.5 <= angle_deg < 67.5:
-            idx = 5  # Right 45 Up
-        elif 112.5 <= angle_deg < 157.5:
-            idx = 4  # Left 45 Up
-        elif 202.5 <= angle_deg < 247.5:
-            idx = 3  # Left 45 Down
-        elif 292.5 <= angle_deg < 337.5:
-            idx = 2  # Right 45 Down
-        elif 247.5 <= angle_deg < 292.5:
-            idx = 7  # Down
-        elif 67.5 <= angle_deg < 112.5:
-            idx = 6  # Up
-        else:
-            idx = 1  # Default to Right
-        sx, sy = self.weapon_sprites[idx]
-        enemy_screen_x = self.x - x_offset + 8
-        enemy_screen_y = self.y + 8
-        wx = int(enemy_screen_x + math.cos(angle) * 8 - self.weapon_w // 2)
-        wy = int(enemy_screen_y + math.sin(angle) * 8 - self.weapon_h // 2)
-        pyxel.blt(wx, wy, 0, sx, sy, self.weapon_w, self.weapon_h, 14)
+        if culler.visible(self.x - x_offset - 4, self.y - 4, 24, 24):
+            pyxel.blt(self.x - x_offset, self.y, 0, sx, sy, 16, 16, 14)
+            if self.visual_state != "defeated":
+                self.draw_weapon(x_offset, target, aim)
 
-    @staticmethod
-    def line_intersects_rect(x0, y0, x1, y1, rx, ry, rw, rh):
-        # Simple AABB vs line segment check
-        if rx <= x0 <= rx+rw and ry <= y0 <= ry+rh:
-            return True
-        if rx <= x1 <= rx+rw and ry <= y1 <= ry+rh:
-            return True
-        def ccw(A, B, C):
-            return (C[1]-A[1]) * (B[0]-A[0]) > (B[1]-A[1]) * (C[0]-A[0])
-        def intersect(A,B,C,D):
-            return ccw(A,C,D) != ccw(B,C,D) and ccw(A,B,C) != ccw(A,B,D)
-        rect_edges = [
-            ((rx,ry), (rx+rw,ry)),
-            ((rx+rw,ry), (rx+rw,ry+rh)),
-            ((rx+rw,ry+rh), (rx,ry+rh)),
-            ((rx,ry+rh), (rx,ry)),
-        ]
-        for edge in rect_edges:
-            if intersect((x0,y0), (x1,y1), edge[0], edge[1]):
-                return True
-        return False
 
     # This function is deprecated 
     def wide_laser_intersects_player(self, x0, y0, x1, y1, player):
@@ -1467,24 +1448,42 @@ class BossEnemy(BaseEnemy):
                 return True
         return False
 
-def create_enemy(type_index, x, y, level=0):
+def weapon_aims(enemies, target):
+    """
+    weapon aims of every enemy towards the target (see BaseEnemy.weapon_aim), in one vectorized call
+    :return list of (sprite index, unit x, unit y) in the order of the enemies
+    """
+    if target is None or len(enemies) < MIN_AIM_BATCH:
+        return [enemy.weapon_aim(target) for enemy in enemies]
+    dx = np.array([target.x - enemy.x for enemy in enemies], dtype=float)
+    dy = np.array([target.y - enemy.y for enemy in enemies], dtype=float)
+    index, ux, uy = src.direction.aim_many(dx, dy)
+    return list(zip(index.tolist(), ux.tolist(), uy.tolist()))
+
+def create_enemy(type_index, x, y, level=0, bullet_pool=None, rng=None):
+    """
+    create the enemy of the given type, its bullets go into the shared bullet pool
+    rng is the random stream of the enemy (src.streams.SplitMix), pass a seeded one for reproducible runs
+    """
     if type_index == 0:
-        return RobotEnemy0(x, y, level)
+        enemy = RobotEnemy0(x, y, level, rng)
     elif type_index == 1:
-        return RobotEnemy1(x, y, level)
+        enemy = RobotEnemy1(x, y, level, rng)
     elif type_index == 2:
-        return RobotEnemy2(x, y, level)
+        enemy = RobotEnemy2(x, y, level, rng)
     elif type_index == 3:
-        return HumanEnemy0(x, y, level)
+        enemy = HumanEnemy0(x, y, level, rng)
     elif type_index == 4:
-        return HumanEnemy1(x, y, level)
+        enemy = HumanEnemy1(x, y, level, rng)
     elif type_index == 5:
-        return HumanEnemy2(x, y, level)
+        enemy = HumanEnemy2(x, y, level, rng)
     elif type_index == 6:
-        return HumanEnemy3(x, y, level)
+        enemy = HumanEnemy3(x, y, level, rng)
     elif type_index == 7:
-        return HumanEnemy4(x, y, level)
+        enemy = HumanEnemy4(x, y, level, rng)
     elif type_index == 8:
-        return BossEnemy(x, y, level)
+        enemy = BossEnemy(x, y, level, rng)
     else:
-        return BaseEnemy(type_index, x, y, level) 
\ No newline at end of file
+        enemy = BaseEnemy(type_index, x, y, level, rng)
+    enemy.bullet_pool = bullet_pool
+    return enemy
@@ -0,0 +1,205 @@
+"""
+enemy_batch.py
+This module provides the batched enemy update of the Neurotrace game (optional, see World.enemy_batch).
+Most enemies spend their frames patrolling, chasing or retreating: those frames only change the enemy itself
+(and its own random stream), so they are run together as masked NumPy operations over arrays gathered
+from the enemies: state transitions, movement with the platform edge check, gravity, wall clamp and floor landing.
+An enemy runs its own update (BaseEnemy.update or the boss one) when the frame can touch anything else:
+an ability running, firing, or an attack that shoots. Those scalar updates keep the order of the enemy list,
+and a batch never spans the boss (whose gravity well moves the player), so the result is exactly
+the one of the per-enemy loop, down to the int / float type of the coordinates.
+"""
+import numpy as np
+from src.enemy import BaseEnemy
+
+# state machine of BaseEnemy.update
+STATES = ('patrol', 'chase', 'attack', 'retreat')
+PATROL, CHASE, ATTACK, RETREAT = range(len(STATES))
+STATE_CODES = {name: code for code, name in enumerate(STATES)}
+# below this many enemies the array overhead costs more than the scalar updates
+MIN_BATCH = 64
+
+
+class EnemyBatch:
+    def __init__(self):
+        # counters of the last frame (profiler)
+        self.batched = 0
+        self.scalar = 0
+
+    def update(self, enemies, player, camera_x, ai_lod, profiler):
+        """one frame of every enemy, in place of the per-enemy update loop of World.step"""
+        self.batched = 0
+        self.scalar = 0
+        batch = []
+        ## the boss appends its minions while it updates: they are iterated in the same frame
+        for enemy in enemies:
+            ## asleep enemies skip the frame (replayed when they wake up)
+            if ai_lod.skip(enemy, player):
+                continue
+            if enemy.visual_state == "defeated":
+                ## the update of a defeated enemy does nothing
+                continue
+            if self.can_batch(enemy, player):
+                batch.append(enemy)
+                continue
+            if hasattr(enemy, 'summon_active'):
+                ## the boss moves the player: the enemies before it see the player where it was
+                self.run(batch, player, camera_x)
+                batch = []
+            start = profiler.stamp()
+            if hasattr(enemy, 'summon_active'):
+                enemy.update(player, camera_x, enemies)
+            else:
+                enemy.update(player, camera_x)
+            self.scalar += 1
+            if profiler.enabled:
+                profiler.add("enemy." + enemy.__class__.__name__, start)
+        self.run(batch, player, camera_x)
+
+    @staticmethod
+    def can_batch(enemy, player):
+        """check if this frame of the enemy only changes the enemy itself"""
+        if type(enemy).update is not BaseEnemy.update or not enemy.alive or enemy.is_firing:
+            return False
+        if not enemy.ability_idle():
+            return False
+        if enemy.state == 'attack':
+            ## an attack frame that stays in attack shoots and may start the special ability
+            retreat_dist, attack_min, attack_max, patrol_dist = enemy.ai_thresholds()
+            return not retreat_dist <= abs(player.x - enemy.x) <= attack_max
+        return enemy.state in STATE_CODES
+
+    def run(self, batch, player, camera_x):
+        """the BaseEnemy.update frame of every enemy of the batch, as array operations"""
+        n = len(batch)
+        if n < MIN_BATCH:
+            ## these frames only change their own enemy: running them after the others keeps the result
+            for enemy in batch:
+                enemy.update(player, camera_x)
+            self.scalar += n
+            return
+        self.batched += n
+        collision = batch[0].collision
+        player_x = player.x
+
+        ## gather
+        x = np.array([enemy.x for enemy in batch], dtype=float)
+        y = np.array([enemy.y for enemy in batch], dtype=float)
+        velocity_y = np.array([enemy.velocity_y for enemy in batch], dtype=float)
+        gravity = np.array([enemy.gravity for enemy in batch], dtype=float)
+        speed = np.array([enemy.speed for enemy in batch], dtype=float)
+        state = np.array([STATE_CODES[enemy.state] for enemy in batch])
+        patrol_dir = np.array([enemy.patrol_dir for enemy in batch])
+        patrol_origin = np.array([enemy.patrol_origin for enemy in batch], dtype=float)
+        patrol_range = np.array([enemy.patrol_range for enemy in batch], dtype=float)
+        stand_timer = np.array([enemy.stand_timer for enemy in batch])
+        retreat_timer = np.array([enemy.retreat_timer for enemy in batch])
+        thresholds = np.array([enemy.ai_thresholds() for enemy in batch], dtype=float).reshape(n, 4)
+        retreat_dist, attack_min, attack_max, patrol_dist = thresholds.T
+
+        distance = np.abs(player_x - x)
+        new_state = state.copy()
+
+        ## patrol: chase the player in attack range, else stand or walk back and forth
+        patrol = state == PATROL
+        new_state[patrol & (distance < attack_max)] = CHASE
+        patrolling = patrol & (distance >= attack_max)
+        standing = patrolling & (stand_timer > 0)
+        walking = patrolling & ~standing
+
+        ## chase: retreat when too close, attack in range, give up when too far, else move towards the player
+        chase = state == CHASE
+        chase_retreat = chase & (distance < retreat_dist)
+        chase_attack = chase & ~chase_retreat & (attack_min <= distance) & (distance < attack_max)
+        chase_patrol = chase & ~chase_retreat & ~chase_attack & (distance > patrol_dist)
+        chasing = chase & ~(chase_retreat | chase_attack | chase_patrol)
+        new_state[chase_patrol] = PATROL
+        new_state[chase_attack] = ATTACK
+
+        ## attack (batched only when it ends): retreat when too close, else chase
+        attack = state == ATTACK
+        attack_retreat = attack & (distance < retreat_dist)
+        new_state[attack & ~attack_retreat] = CHASE
+        to_retreat = chase_retreat | attack_retreat
+        new_state[to_retreat] = RETREAT
+
+        ## retreat: move away from the player until the timer ends
+        retreat = state == RETREAT
+        retreating = retreat & (retreat_timer > 0)
+        new_state[retreat & ~retreating] = PATROL
+
+        ## movement of the walking, chasing and retreating enemies, stopped at the platform edges
+        toward = np.where(player_x > x, speed, -speed)
+        dx = np.where(walking, speed * patrol_dir, np.where(chasing, toward, -toward))
+        movers = walking | chasing | retreating
+        moved = movers & collision.supports_many(x + dx, y + 16)
+        x = np.where(moved, x + dx, x)
+        facing_chase = np.where(player_x > x, 1, -1)
+        facing = np.where(walking, patrol_dir, np.where(chasing, facing_chase, -facing_chase))
+        stand_timer = np.where(standing, stand_timer - 1, stand_timer)
+        retreat_timer = np.where(retreating, retreat_timer - 1, retreat_timer)
+        ## out of the patrol range: turn around and stand for a while (timer drawn at the scatter)
+        turns = walking & (np.abs(x - patrol_origin) > patrol_range)
+        patrol_dir = np.where(turns, -patrol_dir, patrol_dir)
+
+        ## gravity, wall clamp, map bottom and floor landing
+        velocity_y = velocity_y + gravity
+        y = y + velocity_y
+        clamped = np.zeros(n, dtype=bool)
+        if collision.min_x is not None:
+            clamped = (x < collision.min_x) | (x > collision.max_x)
+            x = np.clip(x, collision.min_x, collision.max_x)
+        below = y > collision.height
+        y = np.where(below, collision.height, y)
+        velocity_y = np.where(below, 0.0, velocity_y)
+        tops = collision.landing_floors(x, y)
+        landed = ~np.isnan(tops)
+        y = np.where(landed, tops - 16, y)
+        velocity_y = np.where(landed, 0.0, velocity_y)
+
+        ## scatter, writing the same int / float values the scalar update would
+        min_x, max_x, height = collision.min_x, collision.max_x, collision.height
+        columns = zip(batch, new_state.tolist(), x.tolist(), y.tolist(), velocity_y.tolist(), np.nan_to_num(tops).tolist(),
+                      clamped.tolist(), moved.tolist(), landed.tolist(), below.tolist(), movers.tolist(), standing.tolist(),
+                      retreating.tolist(), turns.tolist(), to_retreat.tolist(), facing.tolist(), stand_timer.tolist(),
+                      retreat_timer.tolist(), patrol_dir.tolist())
+        for (enemy, code, new_x, new_y, new_velocity, top, is_clamped, has_moved, has_landed, is_below, is_mover,
+             is_standing, is_retreating, turned, starts_retreat, new_facing, new_stand, new_retreat, new_dir) in columns:
+            ## damage flash
+            if enemy.visual_state == "damage":
+                enemy.visual_state_timer -= 1
+                if enemy.visual_state_timer <= 0 and enemy.hp > 0:
+                    enemy.visual_state = "normal"
+            ## update_special_ability with no ability running
+            for name in enemy.IDLE_COOLDOWNS:
+                if getattr(enemy, name) > 0:
+                    setattr(enemy, name, getattr(enemy, name) - 1)
+            enemy.state = STATES[code]
+            if is_clamped:
+                enemy.x = min_x if new_x == min_x else max_x
+            elif has_moved:
+                enemy.x = new_x
+            if has_landed:
+                enemy.y = int(top) - 16
+                enemy.velocity_y = 0
+                enemy.is_jumping = False
+            else:
+                enemy.y = height if is_below else new_y
+                enemy.velocity_y = 0 if is_below else new_velocity
+                enemy.is_jumping = True
+            if is_mover:
+                enemy.is_moving = True
+                if has_moved:
+                    enemy.facing_direction = new_facing
+                if is_retreating:
+                    enemy.retreat_timer = new_retreat
+            elif is_standing:
+                enemy.is_moving = False
+                enemy.stand_timer = new_stand
+            if turned:
+                enemy.patrol_dir = new_dir
+                enemy.stand_timer = enemy.rng.randint(30, 90)
+            elif starts_retreat:
+                enemy.retreat_timer = enemy.rng.randint(30, 60)
+            if enemy.attack_cooldown > 0:
+                enemy.attack_cooldown -= 1
@@ -0,0 +1,61 @@
+"""
+enemy_pool.py
+This module provides the pooled enemy allocator of the Neurotrace game.
+Enemies leaving the game (level transition, restart, old corpses) are released to a free list per type_index
+and reset in place the next time an enemy of that type spawns (level load, boss summons),
+so a long boss fight or many restarts do not keep allocating enemies.
+"""
+from src.enemy import create_enemy
+
+# defeated enemies kept on screen as corpses, the oldest ones go back to the pool
+MAX_CORPSES = 32
+
+
+class EnemyPool:
+    def __init__(self):
+        # type_index -> released enemies, ready to be reset in place
+        self.free = {}
+        # counters (debug overlay / profiler)
+        self.created = 0
+        self.reused = 0
+        # number of enemies handed out, the rank of the next spawn
+        self.spawned = 0
+
+    def acquire(self, type_index, x, y, level=0, bullet_pool=None, rng=None):
+        """
+        get an enemy of the given type, fresh as create_enemy would build it
+        rng is the random stream of the enemy (src.streams.SplitMix), pass a seeded one for reproducible runs
+        """
+        free = self.free.get(type_index)
+        if free:
+            enemy = free.pop()
+            enemy.reset(x, y, level, rng)
+            enemy.bullet_pool = bullet_pool
+            self.reused += 1
+        else:
+            enemy = create_enemy(type_index, x, y, level, bullet_pool, rng)
+            self.created += 1
+        enemy.enemy_pool = self
+        self.spawned += 1
+        enemy.spawn_order = self.spawned
+        return enemy
+
+    def take(self, type_index):
+        """a released enemy of the given type as it is (not reset: its state is about to be overwritten), None if there is none"""
+        free = self.free.get(type_index)
+        if free:
+            self.reused += 1
+            return free.pop()
+        return None
+
+    def release(self, enemy):
+        """give an enemy back, it must not be used by the game anymore"""
+        self.free.setdefault(enemy.type_index, []).append(enemy)
+
+    def release_all(self, enemies):
+        for enemy in enemies:
+            self.release(enemy)
+
+    def __len__(self):
+        """number of enemies waiting in the pool"""
+        return sum(len(free) for free in self.free.values())
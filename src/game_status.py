@@ -2,7 +2,8 @@
 game_status_helper.py
 This module provides helper functions to manage the game status in the Neurotrace game.
 """
-import pyxel, src.settings, PyxelUniversalFont as pul
+import pyxel, src.settings
+from src.text_cache import text_cache, TrueTypeFont
 class GameStatus:
     status = 0
     def __init__(self):
@@ -62,7 +63,8 @@ class GameStatus:
         return self.status
     
     def initFonts(self):
-        self.title_writer = pul.Writer("misaki_gothic.ttf")
+        # PyxelUniversalFont is imported on first use, the title texts come from the disk cache
+        self.title_writer = TrueTypeFont("misaki_gothic.ttf")
     
     def showGameTitle(self):
         """
@@ -80,8 +82,8 @@ class GameStatus:
         subtitle_x = 15
         subtitle_y = 85
         # Draw the title text in the center of the window
-        self.title_writer.draw(title_x, title_y, title_content, title_size, 7)
-        self.title_writer.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 7) 
+        text_cache.draw(title_x, title_y, title_content, title_size, 7, self.title_writer)
+        text_cache.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 7, self.title_writer) 
 
     def showGameOver(self):
         """
@@ -96,8 +98,8 @@ class GameStatus:
         subtitle_x = 15
         subtitle_y = 85
 
-        self.title_writer.draw(x, y, content, size, 8) 
-        self.title_writer.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 8) 
+        text_cache.draw(x, y, content, size, 8, self.title_writer) 
+        text_cache.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 8, self.title_writer) 
 
     def showWinning(self):
         """
@@ -112,7 +114,7 @@ class GameStatus:
         subtitle_x = 15
         subtitle_y = 85
 
-        self.title_writer.draw(x, y, content, size, 10) 
-        self.title_writer.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 10) 
+        text_cache.draw(x, y, content, size, 10, self.title_writer) 
+        text_cache.draw(subtitle_x, subtitle_y, subtitle_content, subtitle_size, 10, self.title_writer) 
 
     
\ No newline at end of file
@@ -0,0 +1,75 @@
+"""
+geometry.py
+This module provides the segment vs rectangle tests used by the sniper fire lines of the Neurotrace game.
+The tests clip the segment (x0, y0) + t * (x1 - x0, y1 - y0), t in [0, 1], against the x and y slabs of the
+rectangle (Liang-Barsky): the segment hits when the clipped range is not empty. Rectangles are closed,
+a segment touching an edge or a corner counts as a hit.
+The scalar test allocates nothing, the batched one tests one segment against an N*4 array of rectangles.
+"""
+import numpy as np
+
+
+def segment_intersects_rect(x0, y0, x1, y1, rx, ry, rw, rh):
+    """check if the segment (x0, y0) - (x1, y1) touches the rectangle [rx, rx+rw] * [ry, ry+rh]"""
+    t_near = 0.0
+    t_far = 1.0
+    dx = x1 - x0
+    if dx != 0:
+        t1 = (rx - x0) / dx
+        t2 = (rx + rw - x0) / dx
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_near:
+            t_near = t1
+        if t2 < t_far:
+            t_far = t2
+        if t_near > t_far:
+            return False
+    ## vertical segment: it has to be inside the x slab
+    elif not rx <= x0 <= rx + rw:
+        return False
+    dy = y1 - y0
+    if dy != 0:
+        t1 = (ry - y0) / dy
+        t2 = (ry + rh - y0) / dy
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_near:
+            t_near = t1
+        if t2 < t_far:
+            t_far = t2
+        return t_near <= t_far
+    ## horizontal segment: it has to be inside the y slab
+    return ry <= y0 <= ry + rh
+
+
+def segment_intersects_rects(x0, y0, x1, y1, rects):
+    """
+    vectorized segment_intersects_rect for a NumPy array of rectangles, one (x, y, w, h) per row
+    :return bool mask of the rectangles touched by the segment
+    """
+    rx, ry, rw, rh = rects[:, 0], rects[:, 1], rects[:, 2], rects[:, 3]
+    t_near = np.zeros(len(rects))
+    t_far = np.ones(len(rects))
+    hit = np.ones(len(rects), dtype=bool)
+    for start, delta, low, size in ((x0, x1 - x0, rx, rw), (y0, y1 - y0, ry, rh)):
+        if delta != 0:
+            t1 = (low - start) / delta
+            t2 = (low + size - start) / delta
+            t_near = np.maximum(t_near, np.minimum(t1, t2))
+            t_far = np.minimum(t_far, np.maximum(t1, t2))
+        else:
+            hit &= (low <= start) & (start <= low + size)
+    return hit & (t_near <= t_far)
+
+
+def segment_hits(x0, y0, x1, y1, entities, size=16):
+    """
+    the live entities (player, enemies) whose size*size box is touched by the segment, in list order
+    """
+    live = [entity for entity in entities if entity.alive]
+    if not live:
+        return []
+    rects = np.array([(entity.x, entity.y, size, size) for entity in live], dtype=float)
+    mask = segment_intersects_rects(x0, y0, x1, y1, rects)
+    return [entity for entity, hit in zip(live, mask.tolist()) if hit]
@@ -0,0 +1,187 @@
+"""
+hud.py
+This module provides the HUD compositor of the Neurotrace game.
+The HUD (health text, weapon icon, ammo count or reload bar, shield icon and bar, medkit icon and count) is a list
+of retained widgets drawn into an offscreen layer image. Each frame a widget reports the state it shows
+(only what changes its pixels: the bar widths, not the raw stamina); the widgets whose state changed, plus the
+widgets overlapping them, are cleared and re-rendered in the layer, then the layer is blitted in one call.
+The shared `hud` counts the widget re-renders for the debug overlay and the profiler.
+"""
+import collections
+import pyxel
+import src.settings
+
+# transparent color of the layer (the transparent color of the HUD sprites, never drawn by a widget)
+HUD_COLKEY = 14
+
+# weapon icons (u, v) in image bank 0
+WEAPON_ICONS = {"Sniper": (8, 192), "Rifle": (0, 200)}
+PISTOL_ICON = (8, 200)
+
+
+class HudWidget:
+    def __init__(self, x, y, w, h):
+        # rectangle of the widget in the layer [screen]
+        self.x = x
+        self.y = y
+        self.w = w
+        self.h = h
+
+    def state(self, player):
+        """what the widget shows for the player, None when hidden (the widget is re-rendered when it changes)"""
+        return None
+
+    def render(self, layer, state):
+        """draw the widget state into the layer"""
+
+    def overlaps(self, other):
+        return (self.x < other.x + other.w and other.x < self.x + self.w and
+                self.y < other.y + other.h and other.y < self.y + self.h)
+
+
+class HealthText(HudWidget):
+    def __init__(self):
+        super().__init__(5, 2, 64, 6)
+
+    def state(self, player):
+        return player.health if player.alive else 0, player.max_health
+
+    def render(self, layer, state):
+        layer.text(self.x, self.y, f"HP: {state[0]}/{state[1]}", 7)
+
+
+class WeaponIcon(HudWidget):
+    def __init__(self, height):
+        super().__init__(12, height - 12, 8, 8)
+
+    def state(self, player):
+        if not player.alive:
+            return None
+        return WEAPON_ICONS.get(player.weapons[player.current_weapon]['name'], PISTOL_ICON)
+
+    def render(self, layer, state):
+        layer.blt(self.x, self.y, 0, state[0], state[1], 8, 8, 14)
+
+
+class AmmoCounter(HudWidget):
+    """the ammo count, the reload progress bar while reloading"""
+    def __init__(self, height):
+        super().__init__(12, height - 4, 12, 6)
+
+    def state(self, player):
+        if not player.alive:
+            return None
+        if player.is_reloading:
+            reload_progress = 1.0 - (player.reload_cooldown / player.reload_cooldown_max)
+            return "reload", int(8 * reload_progress)
+        ammo = player.ammo[player.current_weapon]
+        return "ammo", ammo
+
+    def render(self, layer, state):
+        kind, value = state
+        if kind == "reload":
+            bar_y = self.y + 1
+            layer.rect(self.x, bar_y, 8, 2, 8)  # Background
+            layer.rect(self.x, bar_y, value, 2, 10)  # Progress
+        else:
+            # White if has ammo, red if empty
+            layer.text(self.x, self.y, f"{value}", 7 if value > 0 else 8)
+
+
+class ShieldGauge(HudWidget):
+    """the shield icon and its stamina / cooldown bar"""
+    def __init__(self, height):
+        super().__init__(2, height - 12, 8, 11)
+
+    def state(self, player):
+        if not player.alive:
+            return None
+        stamina = int(8 * (player.shield_stamina / player.shield_stamina_max))
+        cooldown = int(8 * (player.shield_cooldown / player.shield_cooldown_max)) if player.shield_cooldown > 0 else None
+        return stamina, cooldown
+
+    def render(self, layer, state):
+        stamina, cooldown = state
+        layer.blt(self.x, self.y, 0, 0, 192, 8, 8, 0)
+        bar_y = self.y + 9
+        layer.rect(self.x, bar_y, stamina, 2, 11)
+        if cooldown is not None:
+            layer.rect(self.x, bar_y, cooldown, 2, 8)
+
+
+class MedkitCounter(HudWidget):
+    def __init__(self, height):
+        super().__init__(20, height - 12, 12, 14)
+
+    def state(self, player):
+        return player.medkits if player.alive else None
+
+    def render(self, layer, state):
+        layer.blt(self.x + 2, self.y, 0, 8, 208, 8, 8, 14)  # Med kit icon
+        layer.text(self.x, self.y + 8, f"x{state}", 7)
+
+
+class HudCompositor:
+    def __init__(self, width=src.settings.WINDOW_WIDTH, height=src.settings.WINDOW_HEIGHT):
+        self.width = width
+        self.height = height
+        # in draw order: a later widget is drawn over an earlier one
+        self.widgets = [HealthText(), WeaponIcon(height), AmmoCounter(height), ShieldGauge(height), MedkitCounter(height)]
+        # state of each widget in the layer (a missing state forces the first render)
+        self.states = [object()] * len(self.widgets)
+        # layer image, created on the first draw (pyxel has to be initialized)
+        self.layer = None
+        # counters (debug overlay / profiler): widget re-renders, total and of each of the last FPS frames
+        self.renders = 0
+        self.frame_renders = 0
+        self.history = collections.deque(maxlen=src.settings.FPS)
+        # bounding box of the widgets, the part of the layer blitted each frame
+        self.left = min(widget.x for widget in self.widgets)
+        self.top = min(widget.y for widget in self.widgets)
+        self.right = max(widget.x + widget.w for widget in self.widgets)
+        self.bottom = max(widget.y + widget.h for widget in self.widgets)
+
+    def invalidate(self):
+        """re-render every widget on the next draw"""
+        self.states = [object()] * len(self.widgets)
+
+    def renders_per_second(self):
+        """widget re-renders over the last second of frames"""
+        return sum(self.history)
+
+    def draw(self, player):
+        """update the dirty widgets of the layer, then blit it"""
+        if self.layer is None:
+            self.layer = pyxel.Image(self.width, self.height)
+            self.layer.cls(HUD_COLKEY)
+        states = [widget.state(player) for widget in self.widgets]
+        dirty = [state != old for state, old in zip(states, self.states)]
+        self.frame_renders = 0
+        if any(dirty):
+            self.render(states, dirty)
+        self.history.append(self.frame_renders)
+        pyxel.blt(self.left, self.top, self.layer, self.left, self.top,
+                  self.right - self.left, self.bottom - self.top, HUD_COLKEY)
+
+    def render(self, states, dirty):
+        ## clearing a widget erases the overlapping part of its neighbours: re-render them as well
+        changed = True
+        while changed:
+            changed = False
+            for i, widget in enumerate(self.widgets):
+                if not dirty[i] and any(dirty[j] and widget.overlaps(other) for j, other in enumerate(self.widgets)):
+                    dirty[i] = changed = True
+        for widget, is_dirty in zip(self.widgets, dirty):
+            if is_dirty:
+                self.layer.rect(widget.x, widget.y, widget.w, widget.h, HUD_COLKEY)
+        for i, widget in enumerate(self.widgets):
+            if dirty[i]:
+                self.states[i] = states[i]
+                if states[i] is not None:
+                    widget.render(self.layer, states[i])
+                    self.frame_renders += 1
+        self.renders += self.frame_renders
+
+
+# HUD shared by the draw functions
+hud = HudCompositor()
@@ -0,0 +1,104 @@
+"""
+inputs.py
+This module provides the input frame that drives one simulation step of the Neurotrace game.
+The game loop fills it from pyxel, headless runs can build it by hand,
+and replays rebuild it from the bitmask written by src/replay.py.
+"""
+import pyxel
+
+
+class InputFrame:
+    """
+    Snapshot of every player input for a single frame.
+    Held keys (left, right, shield) are True while the key is down,
+    the other keys are only True on the frame they are pressed.
+    mouse_x and mouse_y are screen (relative) coordinates.
+    The debug keys (F3/F4/F5, speed 0/9) are inputs too, so a replay toggles cheats on the same frames.
+    """
+    # every button, in bit order of the packed mask (append new buttons at the end to keep old replays valid)
+    BUTTONS = ("left", "right", "jump", "dash", "fire", "interact", "prev_weapon", "next_weapon", "reload",
+               "shield", "medkit", "toggle_debug", "toggle_god_mode", "toggle_infinite_ammo", "speed_up", "speed_down")
+    # buttons held down (the others are presses)
+    HELD = ("left", "right", "shield")
+
+    def __init__(self, left=False, right=False, jump=False, dash=False, fire=False,
+                 interact=False, prev_weapon=False, next_weapon=False, reload=False,
+                 shield=False, medkit=False, mouse_x=0, mouse_y=0,
+                 toggle_debug=False, toggle_god_mode=False, toggle_infinite_ammo=False,
+                 speed_up=False, speed_down=False):
+        # movement
+        self.left = left
+        self.right = right
+        self.jump = jump
+        self.dash = dash
+        # weapon
+        self.fire = fire
+        self.prev_weapon = prev_weapon
+        self.next_weapon = next_weapon
+        self.reload = reload
+        # utility
+        self.interact = interact
+        self.shield = shield
+        self.medkit = medkit
+        # cursor position [relative]
+        self.mouse_x = mouse_x
+        self.mouse_y = mouse_y
+        # debug / cheats
+        self.toggle_debug = toggle_debug
+        self.toggle_god_mode = toggle_god_mode
+        self.toggle_infinite_ammo = toggle_infinite_ammo
+        self.speed_up = speed_up
+        self.speed_down = speed_down
+
+    @classmethod
+    def from_pyxel(cls):
+        """read the current keyboard and mouse state from pyxel"""
+        return cls(
+            left=pyxel.btn(pyxel.KEY_A),
+            right=pyxel.btn(pyxel.KEY_D),
+            jump=pyxel.btnp(pyxel.KEY_SPACE),
+            dash=pyxel.btnp(pyxel.KEY_CTRL),
+            fire=pyxel.btnp(pyxel.MOUSE_BUTTON_LEFT),
+            interact=pyxel.btnp(pyxel.KEY_Z),
+            prev_weapon=pyxel.btnp(pyxel.KEY_Q),
+            next_weapon=pyxel.btnp(pyxel.KEY_E),
+            reload=pyxel.btnp(pyxel.KEY_R),
+            shield=pyxel.btn(pyxel.KEY_SHIFT),
+            medkit=pyxel.btnp(pyxel.KEY_X),
+            mouse_x=pyxel.mouse_x,
+            mouse_y=pyxel.mouse_y,
+            toggle_debug=pyxel.btnp(pyxel.KEY_F3),
+            toggle_god_mode=pyxel.btnp(pyxel.KEY_F4),
+            toggle_infinite_ammo=pyxel.btnp(pyxel.KEY_F5),
+            speed_up=pyxel.btnp(pyxel.KEY_0),
+            speed_down=pyxel.btnp(pyxel.KEY_9),
+        )
+
+    def to_mask(self):
+        """pack every button into an integer, bit i is BUTTONS[i]"""
+        mask = 0
+        for bit, name in enumerate(self.BUTTONS):
+            if getattr(self, name):
+                mask |= 1 << bit
+        return mask
+
+    @classmethod
+    def from_mask(cls, mask, mouse_x=0, mouse_y=0):
+        """rebuild an input frame from a packed button mask and the cursor position"""
+        frame = cls(mouse_x=mouse_x, mouse_y=mouse_y)
+        for bit, name in enumerate(cls.BUTTONS):
+            setattr(frame, name, bool(mask >> bit & 1))
+        return frame
+
+    def latch(self, earlier):
+        """add the presses of an earlier input frame no simulation step consumed yet (held keys and cursor stay the latest)"""
+        for name in self.BUTTONS:
+            if name not in self.HELD and getattr(earlier, name):
+                setattr(self, name, True)
+
+    def held_only(self):
+        """copy of the frame with only the held keys and the cursor, for extra steps of the same frame"""
+        frame = InputFrame(mouse_x=self.mouse_x, mouse_y=self.mouse_y)
+        for name in self.HELD:
+            setattr(frame, name, getattr(self, name))
+        return frame
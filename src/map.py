@@ -1,20 +1,22 @@
-import pyxel, src.structure
+import pyxel, src.structure, src.settings
+from src.culling import culler
 
 class Map():
     def __init__(self):
         self.structure = src.structure.STRUCTURE
 
     def drawMap(self, level=0, camera_x=0, door_open=False):
-        pyxel.bltm(-camera_x, 0, 0, 
-                   self.structure[level]["mapUV"][0], 
-                   self.structure[level]["mapUV"][1], 
-                   self.structure[level]["mapWH"][0], 
-                   self.structure[level]["mapWH"][1], 0)
+        # only the part of the tilemap under the window is drawn (same pixels as drawing the whole map at -camera_x)
+        map_u, map_v = self.structure[level]["mapUV"]
+        map_w, map_h = self.structure[level]["mapWH"]
+        view_w = min(src.settings.WINDOW_WIDTH, map_w - camera_x)
+        if view_w > 0:
+            pyxel.bltm(0, 0, 0, map_u + camera_x, map_v, view_w, map_h, 0)
         
         # Draw portal if it exists in this level
         if "portal" in self.structure[level]:
             portal = self.structure[level]["portal"]
-            if portal is not None:
+            if portal is not None and culler.visible(portal[0] - camera_x, portal[1], portal[2], portal[3]):
                 portal_x, portal_y, portal_w, portal_h = portal
                 # Draw closed door sprite at (0, 72) - always visible
                 if door_open:
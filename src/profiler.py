@@ -0,0 +1,130 @@
+"""
+profiler.py
+This module provides the frame-time profiler of the Neurotrace game.
+Subsystems (camera, player, each enemy type, bullets, sniper line, map and entity draw) wrap their work
+between stamp() and add(); the times of a frame are summed per subsystem, kept in a rolling window
+for the p50/p99 shown in the F3 overlay, and in a longer trace that can be exported to CSV or JSON.
+When the profiler is disabled stamp() and add() return right away, so the timers can stay in the hot loops.
+"""
+import collections
+import csv
+import json
+import time
+
+# subsystems shown in the debug overlay, in this order (per enemy type timings are only exported)
+OVERLAY_SECTIONS = ("step", "camera", "player", "bullets", "enemies", "sniper", "map_draw", "entity_draw")
+
+
+class Profiler:
+    def __init__(self, window=120, trace_length=3600):
+        # timers only run when enabled (the game enables it with the debug overlay)
+        self.enabled = False
+        # number of frames in the rolling p50/p99 window
+        self.window = window
+        # subsystem -> last `window` frame times [ms]
+        self.samples = {}
+        # per frame records {frame, counts..., subsystem: ms} for the export, oldest are dropped
+        self.trace = collections.deque(maxlen=trace_length)
+        # times and counts of the frame being measured
+        self.current = {}
+        self.counts = {}
+        self.frame = 0
+
+    def stamp(self):
+        """start a timer, pass the result to add()"""
+        if not self.enabled:
+            return 0.0
+        return time.perf_counter()
+
+    def add(self, name, start):
+        """add the time elapsed since stamp() to the subsystem of the current frame"""
+        if not self.enabled:
+            return
+        elapsed = (time.perf_counter() - start) * 1000.0
+        self.current[name] = self.current.get(name, 0.0) + elapsed
+
+    def count(self, name, value):
+        """record a counter of the current frame (entities, bullets...)"""
+        if self.enabled:
+            self.counts[name] = value
+
+    def next_frame(self, frame):
+        """close the current frame: push its times to the rolling window and the trace"""
+        if self.current or self.counts:
+            record = {"frame": self.frame}
+            record.update(self.counts)
+            for name, elapsed in self.current.items():
+                samples = self.samples.get(name)
+                if samples is None:
+                    samples = collections.deque(maxlen=self.window)
+                    self.samples[name] = samples
+                samples.append(elapsed)
+                record[name] = round(elapsed, 4)
+            self.trace.append(record)
+            self.current = {}
+            self.counts = {}
+        self.frame = frame
+
+    def percentiles(self, name):
+        """
+        rolling percentiles of a subsystem
+        :return (p50, p99) in milliseconds, (0, 0) when never measured
+        """
+        samples = self.samples.get(name)
+        if not samples:
+            return (0.0, 0.0)
+        ordered = sorted(samples)
+        last = len(ordered) - 1
+        return (ordered[int(last * 0.5)], ordered[int(last * 0.99 + 0.5)])
+
+    def summary(self):
+        """subsystem -> {"p50": ms, "p99": ms} for every measured subsystem"""
+        result = {}
+        for name in sorted(self.samples):
+            p50, p99 = self.percentiles(name)
+            result[name] = {"p50": round(p50, 4), "p99": round(p99, 4)}
+        return result
+
+    def export(self, path):
+        """write the trace to a .csv file (one row per frame) or a .json file (summary + frames)"""
+        ## include the frame still being measured
+        self.next_frame(self.frame)
+        records = list(self.trace)
+        if path.endswith(".csv"):
+            columns = ["frame"]
+            for record in records:
+                for key in record:
+                    if key not in columns:
+                        columns.append(key)
+            with open(path, "w", newline="") as file:
+                writer = csv.DictWriter(file, fieldnames=columns, restval=0)
+                writer.writeheader()
+                writer.writerows(records)
+        else:
+            with open(path, "w") as file:
+                json.dump({"window": self.window, "summary": self.summary(), "frames": records}, file)
+        return path
+
+
+class StartupTimer:
+    """phases of the game startup (imports, window, first frame, deferred loading) for the startup report"""
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.last = self.start
+        # (phase, ms) in order
+        self.phases = []
+
+    def mark(self, name):
+        """end a phase, it lasted since the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self.last) * 1000.0))
+        self.last = now
+
+    def elapsed(self):
+        """ms since the start"""
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def report(self):
+        lines = [f"{name:<16}{ms:8.1f} ms" for name, ms in self.phases]
+        lines.append(f"{'total':<16}{(self.last - self.start) * 1000.0:8.1f} ms")
+        return "\n".join(lines)
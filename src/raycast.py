@@ -0,0 +1,166 @@
+"""
+raycast.py
+This module provides the raycaster used by sniper fire lines in the Neurotrace game.
+The ray walks the coarse cells of a CompiledLevel with a DDA (Amanatides & Woo) and only runs a
+slab intersection against the floor/wall rectangles of the cells it crosses,
+so one shot costs O(cells crossed) and returns the exact point where the ray enters solid geometry.
+"""
+import math
+import src.settings
+
+INF = float("inf")
+
+
+def slab_entry(ox, oy, dx, dy, x0, y0, x1, y1):
+    """
+    slab test of the ray (ox, oy) + t * (dx, dy) against the box [x0, x1] * [y0, y1]
+    :return the distance t >= 0 where the ray enters the box, None if it misses
+    """
+    t_near = 0.0
+    t_far = INF
+    if dx != 0:
+        t1 = (x0 - ox) / dx
+        t2 = (x1 - ox) / dx
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_near:
+            t_near = t1
+        if t2 < t_far:
+            t_far = t2
+    elif not x0 <= ox <= x1:
+        return None
+    if dy != 0:
+        t1 = (y0 - oy) / dy
+        t2 = (y1 - oy) / dy
+        if t1 > t2:
+            t1, t2 = t2, t1
+        if t1 > t_near:
+            t_near = t1
+        if t2 < t_far:
+            t_far = t2
+    elif not y0 <= oy <= y1:
+        return None
+    ## touching an edge without crossing the inside is not a hit
+    if t_near >= t_far:
+        return None
+    return t_near
+
+
+def slab_exit(ox, oy, dx, dy, x0, y0, x1, y1):
+    """
+    distance where a ray starting inside the box [x0, x1) * [y0, y1) leaves it
+    :return None if the start is already outside
+    """
+    if not (x0 <= ox < x1 and y0 <= oy < y1):
+        return None
+    t_exit = INF
+    if dx > 0:
+        t_exit = (x1 - ox) / dx
+    elif dx < 0:
+        t_exit = (x0 - ox) / dx
+    if dy > 0:
+        t_exit = min(t_exit, (y1 - oy) / dy)
+    elif dy < 0:
+        t_exit = min(t_exit, (y0 - oy) / dy)
+    return t_exit
+
+
+def cast_ray(collision, ox, oy, dx, dy, max_length):
+    """
+    cast a ray against the solid geometry of a level
+    :param collision: CompiledLevel - the level to cast in
+    :param ox, oy: start of the ray [absolute]
+    :param dx, dy: unit direction of the ray
+    :param max_length: the ray stops after this distance
+    :return (x, y, hit) - the end of the ray and whether it stopped on a floor/wall
+    """
+    # a ray starting inside a floor/wall stops right away
+    if collision.point_solid(ox, oy):
+        return (ox, oy, True)
+    # the ray also stops when it leaves the world bounds
+    t_end = slab_exit(ox, oy, dx, dy, 0, 0, collision.bound_x, src.settings.WORLD_BOUND_Y)
+    if t_end is None:
+        ## already outside the world: the line ends at its start
+        t_end = 0
+    if t_end > max_length:
+        t_end = max_length
+
+    cs = collision.cell_size
+    columns = collision.cell_columns
+    rows = collision.cell_rows
+    cell_rects = collision.cell_rects
+
+    # move the start onto the cell grid if it begins outside of it
+    t = slab_entry(ox, oy, dx, dy, 0, 0, columns * cs, rows * cs)
+    if t is None or t > t_end:
+        return (ox + dx * t_end, oy + dy * t_end, False)
+    px = ox + dx * t
+    py = oy + dy * t
+    cx = min(columns - 1, int(px // cs))
+    cy = min(rows - 1, int(py // cs))
+
+    # DDA setup: distance to the next vertical / horizontal cell border and the distance between borders
+    if dx > 0:
+        step_x = 1
+        t_max_x = ((cx + 1) * cs - ox) / dx
+        t_delta_x = cs / dx
+    elif dx < 0:
+        step_x = -1
+        t_max_x = (cx * cs - ox) / dx
+        t_delta_x = -cs / dx
+    else:
+        step_x = 0
+        t_max_x = INF
+        t_delta_x = INF
+    if dy > 0:
+        step_y = 1
+        t_max_y = ((cy + 1) * cs - oy) / dy
+        t_delta_y = cs / dy
+    elif dy < 0:
+        step_y = -1
+        t_max_y = (cy * cs - oy) / dy
+        t_delta_y = -cs / dy
+    else:
+        step_y = 0
+        t_max_y = INF
+        t_delta_y = INF
+
+    while t <= t_end:
+        t_cell_out = t_max_x if t_max_x < t_max_y else t_max_y
+        rects = cell_rects.get(cy * columns + cx)
+        if rects:
+            ## nearest entry among the rectangles of this cell
+            best = INF
+            for x0, y0, x1, y1 in rects:
+                entry = slab_entry(ox, oy, dx, dy, x0, y0, x1, y1)
+                if entry is not None and entry < best:
+                    best = entry
+            ## a rectangle entered after this cell will be found again in a later cell
+            if best <= t_cell_out and best <= t_end:
+                return (ox + dx * best, oy + dy * best, True)
+        # step into the next cell
+        if t_max_x < t_max_y:
+            cx += step_x
+            t = t_max_x
+            t_max_x += t_delta_x
+        else:
+            cy += step_y
+            t = t_max_y
+            t_max_y += t_delta_y
+        if not (0 <= cx < columns and 0 <= cy < rows):
+            break
+    return (ox + dx * t_end, oy + dy * t_end, False)
+
+
+def fire_line(collision, center_x, center_y, angle, max_length):
+    """
+    compute a sniper fire line from the center of a 16*16 shooter
+    :return (muzzle x, muzzle y, end x, end y) as integers, the end is where the line first hits a floor/wall
+    """
+    dx = math.cos(angle)
+    dy = math.sin(angle)
+    ## muzzle is 8 px away from the center, in the aiming direction
+    muzzle_x = int(center_x + dx * 8)
+    muzzle_y = int(center_y + dy * 8)
+    end_x, end_y, hit = cast_ray(collision, muzzle_x, muzzle_y, dx, dy, max_length)
+    return (muzzle_x, muzzle_y, int(end_x), int(end_y))
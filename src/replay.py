@@ -0,0 +1,152 @@
+"""
+replay.py
+This module provides the input recorder and the replay runner of the Neurotrace game.
+A replay file holds the seed and start level of a World plus the packed inputs of every simulated frame,
+so the same run can be replayed headless at uncapped speed and checked bit for bit
+against the state digest written at the end of the recording.
+
+File layout (little endian):
+    header  : magic b"NTRP", version (uint16), seed (uint64), start level (uint8)
+    records : button mask (uint32), mouse x (int16), mouse y (int16), one per simulated frame
+    trailer : a record with the END flag, followed by the 20 bytes sha1 state digest of the world
+A record with the RESET flag restarts the world (game restart) instead of stepping it.
+
+Run a replay from the command line:
+    python -m src.replay run.ntr
+"""
+import struct
+import sys
+import time
+import src.world, src.inputs
+
+MAGIC = b"NTRP"
+# 2: the state digest covers the live enemies and the corpses (defeated enemies leave World.enemies)
+# 3: a restart rolls a new seed from the previous run (World.reset)
+# 4: the enemies draw from SplitMix streams (src/streams.py), their rolls differ
+VERSION = 4
+HEADER = struct.Struct("<4sHQB")
+RECORD = struct.Struct("<Ihh")
+# flags stored in the high bits of the button mask
+FLAG_RESET = 1 << 30
+FLAG_END = 1 << 31
+# number of buffered records written to the file at once
+FLUSH_EVERY = 600
+
+
+class ReplayError(Exception):
+    """the replay file is broken or the replayed run does not match the recording"""
+
+
+class ReplayRecorder:
+    def __init__(self, path, seed, level=0):
+        self.path = path
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, VERSION, seed, level))
+        # packed records not written yet
+        self.buffer = []
+        self.frames = 0
+        self.closed = False
+
+    def record(self, inputs):
+        """record the inputs of one simulated frame"""
+        self.buffer.append(RECORD.pack(inputs.to_mask(), inputs.mouse_x, inputs.mouse_y))
+        self.frames += 1
+        if len(self.buffer) >= FLUSH_EVERY:
+            self.flush()
+
+    def mark_reset(self):
+        """record a restart of the world"""
+        self.buffer.append(RECORD.pack(FLAG_RESET, 0, 0))
+
+    def flush(self):
+        """write the buffered records so a crash loses at most FLUSH_EVERY frames"""
+        if self.buffer:
+            self.file.write(b"".join(self.buffer))
+            self.buffer = []
+        self.file.flush()
+
+    def close(self, world=None):
+        """
+        finish the recording
+        :param world: World - when given, its state digest is written so a replay can be verified
+        """
+        if self.closed:
+            return
+        if world is not None:
+            self.buffer.append(RECORD.pack(FLAG_END, 0, 0))
+            self.buffer.append(bytes.fromhex(world.state_digest()))
+        self.flush()
+        self.file.close()
+        self.closed = True
+
+
+def load_replay(path):
+    """
+    read a replay file
+    :return (seed, level, records, digest) - records are (mask, mouse x, mouse y), digest is None when the recording has no trailer
+    """
+    with open(path, "rb") as file:
+        data = file.read()
+    if len(data) < HEADER.size:
+        raise ReplayError(f"{path}: file too short")
+    magic, version, seed, level = HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ReplayError(f"{path}: not a replay file")
+    if version != VERSION:
+        raise ReplayError(f"{path}: unsupported replay version {version}")
+    records = []
+    digest = None
+    offset = HEADER.size
+    ## a file cut by a crash may end in the middle of a record, the partial record is ignored
+    while offset + RECORD.size <= len(data):
+        mask, mouse_x, mouse_y = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if mask & FLAG_END:
+            digest = data[offset:offset + 20].hex()
+            break
+        records.append((mask, mouse_x, mouse_y))
+    return seed, level, records, digest
+
+
+def run_replay(path, verify=True):
+    """
+    replay a recording headless, as fast as possible
+    :param verify: raise ReplayError when the final state does not match the recorded digest
+    :return the World at the end of the replay
+    """
+    seed, level, records, digest = load_replay(path)
+    world = src.world.World(level, seed)
+    for mask, mouse_x, mouse_y in records:
+        if mask & FLAG_RESET:
+            world.reset(level)
+        else:
+            world.step(src.inputs.InputFrame.from_mask(mask, mouse_x, mouse_y))
+    if verify and digest is not None and world.state_digest() != digest:
+        raise ReplayError(f"{path}: replay diverged from the recording at frame {world.frame}")
+    return world
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m src.replay <replay file>")
+        return 2
+    path = argv[0]
+    seed, level, records, digest = load_replay(path)
+    start = time.perf_counter()
+    try:
+        world = run_replay(path)
+    except ReplayError as error:
+        print(error)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"seed {seed}, level {level}, {len(records)} records, {elapsed:.2f}s ({len(records) / max(elapsed, 1e-9):.0f} frames/s)")
+    if digest is None:
+        print("no state digest in the recording, not verified")
+    else:
+        print(f"state digest {world.state_digest()} matches")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -9,7 +9,10 @@ WINDOW_WIDTH = 128
 WINDOW_HEIGHT = 128
 CURSOR = True
 # Frame Rate
-FPS = 60
+FPS = 60  # draws per second of the window
+SIM_FPS = 60  # simulation steps per second (every per-frame speed is tuned for 60), independent of FPS
+MAX_CATCH_UP_STEPS = 5  # steps run at most in one window frame after a hitch, the rest is dropped
+RENDER_INTERPOLATION = True  # draw between the last two steps when FPS differs from SIM_FPS
 
 # Camera Settings
 CAMERA_DEADZONE = 16  # Reduced deadzone for more responsive camera
@@ -19,4 +22,9 @@ CAMERA_SMOOTHING = 0.2  # Increased smoothing for less jitter
 PLAYER_SPEED = 1
 PLAYER_JUMP_SPEED = -3
 GRAVITY = 0.2
-ANIMATION_SPEED = 8  # Frames per animation cycle
\ No newline at end of file
+ANIMATION_SPEED = 8  # Frames per animation cycle
+
+# World Settings
+WORLD_BOUND_X = 2560  # Bullets and fire lines are removed beyond this x [absolute], or the map width if it is wider
+WORLD_BOUND_Y = 128   # Bullets and fire lines are removed below this y
+SPATIAL_CELL_SIZE = 16  # Cell size of the spatial hash used for bullet hit tests
@@ -0,0 +1,631 @@
+"""
+snapshot.py
+This module provides the save states of the Neurotrace game.
+snapshot(world) packs the whole simulation state into a compact binary blob, restore(world, blob) puts it back
+in place: the world goes on exactly as it would have from that frame (same state digest, same random rolls).
+A save state holds the world counters, flags and random stream, the camera, the player, every enemy
+(live, parked in a chunk, corpse) with its random stream (not for corpses, never updated again), ability timers, grenades, flashbangs and turrets,
+and the live range of the bullet pool. Asleep and parked enemies are saved with their skipped frames, as they are:
+the AI LOD catches them up after a restore exactly as it would have (src/ai_lod.py), saving never simulates.
+
+Blob layout (little endian):
+    header  : magic b"NTSS", version (uint16), schema crc32 (uint32), seed (uint64)
+    strings : count (uint16), then length (uint16) and UTF-8 bytes of each string of the records
+    body    : world, camera, chunk streamer, enemy pool, player, enemies, parked chunks, corpses, bullets
+    chunk   : index (int64), parked count (uint16), block size (uint32), envelope union (4 float64), then a block with
+              its own string table and records: it is kept by the chunk until its enemies change (a parked chunk
+              costs nothing to save again) and a restore only decodes it when the chunk is needed
+An object is a record: a layout index (uint16), the layout itself the first time it is used (schema id, one type
+code per field), the numbers and string indexes of the layout in one struct, then the other fields (tuples, lists,
+random streams, grenades) as tagged values. Objects of a class share one or two layouts, so packing and
+unpacking an enemy is one struct call plus a handful of tagged values. The random stream of an enemy
+(src.streams.SplitMix) is one uint64, only the master stream of the world is a full Mersenne Twister state.
+The schema crc covers the saved field names: a save state of a build whose classes changed is refused.
+
+Check save states against a recording (restores checkpoints, replays the rest and compares the final digest):
+    python -m src.snapshot run.ntr
+"""
+import functools
+import itertools
+import operator
+import struct
+import sys
+import time
+import zlib
+import numpy as np
+import src.collision, src.spatial_hash, src.chunks, src.player, src.enemy, src.inputs, src.streams
+
+MAGIC = b"NTSS"
+# 2: the random stream of an enemy is a SplitMix state, parked chunks are blocks of their own
+VERSION = 2
+HEADER = struct.Struct("<4sHIQ")
+COUNT = struct.Struct("<H")
+INT = struct.Struct("<q")
+FLOAT = struct.Struct("<d")
+CHUNK = struct.Struct("<qHI4d")
+BULLETS = struct.Struct("<III")
+LAYOUT = struct.Struct("<BH")
+# state of a random.Random (the master stream of the world): version, Mersenne Twister words and position
+RANDOM = struct.Struct("<B625I")
+# state of the random stream of an enemy
+STREAM = struct.Struct("<Q")
+# slots restore() puts back from the world instead of the blob
+REFERENCES = ("collision", "bullet_pool", "enemy_pool")
+
+
+class SnapshotError(Exception):
+    """the blob is not a save state of this build of the game"""
+
+
+class Missing:
+    """value of a slot that was never set (BossEnemy._teleport_old_pos before the first teleport)"""
+
+
+MISSING = Missing()
+
+
+def slot_names(cls):
+    """every slot of a class and its bases, minus the references"""
+    names = []
+    for klass in reversed(cls.__mro__):
+        names.extend(name for name in getattr(klass, '__slots__', ()) if name not in REFERENCES)
+    return tuple(names)
+
+
+# enemy classes in type_index order
+ENEMY_CLASSES = (
+    src.enemy.RobotEnemy0, src.enemy.RobotEnemy1, src.enemy.RobotEnemy2, src.enemy.HumanEnemy0, src.enemy.HumanEnemy1,
+    src.enemy.HumanEnemy2, src.enemy.HumanEnemy3, src.enemy.HumanEnemy4, src.enemy.BossEnemy,
+)
+# schema id -> (name, saved fields), the enemy classes follow in type_index order
+SCHEMAS = (
+    ("World", ("level", "frame", "defeated", "door_open", "boss_defeated", "god_mode", "infinite_ammo",
+               "debug_mode", "camera_x", "camera_y")),
+    ("Camera", ("x", "y", "target_x", "target_y")),
+    ("ChunkStreamer", ("tick", "first_active", "last_active")),
+    ("EnemyPool", ("spawned",)),
+    ("Player", slot_names(src.player.Player)),
+    ("Grenade", slot_names(src.enemy.Grenade)),
+    ("Turret", slot_names(src.enemy.Turret)),
+    ("BaseEnemy", slot_names(src.enemy.BaseEnemy)),
+) + tuple((cls.__name__, slot_names(cls)) for cls in ENEMY_CLASSES)
+WORLD, CAMERA, STREAMER, POOL, PLAYER, GRENADE, TURRET, BASE_ENEMY = range(8)
+# classes a restore creates objects of (grenades, turrets, enemies) -> schema id
+SCHEMA_IDS = {src.enemy.Grenade: GRENADE, src.enemy.Turret: TURRET, src.enemy.BaseEnemy: BASE_ENEMY}
+SCHEMA_IDS.update((cls, BASE_ENEMY + 1 + type_index) for type_index, cls in enumerate(ENEMY_CLASSES))
+CLASSES = {schema: cls for cls, schema in SCHEMA_IDS.items()}
+SCHEMA_CRC = zlib.crc32(repr(SCHEMAS).encode())
+# tuples shared by every entity (weapon sprites, player frames), saved as an index
+SHARED = tuple(weapon['sprites'] for weapon in src.enemy.WEAPON_TYPES) + tuple(src.player.WEAPON_SPRITES.values()) \
+    + tuple(src.player.WEAPON_FIRE_SPRITES.values()) + (src.player.Player.playerLeft, src.player.Player.playerRight)
+SHARED_INDEX = {id(value): index for index, value in enumerate(SHARED)}
+
+# type codes of a layout: numbers and string indexes go in the struct of the layout, None and unset slots take
+# no room, the other values are tagged
+KINDS = {bool: ord("?"), int: ord("q"), float: ord("d"), str: ord("s"), type(None): ord("n"), Missing: ord("m")}
+TAGGED = ord("c")
+NUMBERS = b"?qd"
+
+
+def picker(indices):
+    """function of a list returning the tuple of its items at `indices`"""
+    if len(indices) == 1:
+        index = indices[0]
+        return lambda values: (values[index],)
+    if not indices:
+        return lambda values: ()
+    return operator.itemgetter(*indices)
+
+
+def fields_getter(names):
+    """function of an object returning the tuple of its fields (AttributeError when a slot is not set)"""
+    if len(names) == 1:
+        name = names[0]
+        return lambda obj: (getattr(obj, name),)
+    return operator.attrgetter(*names)
+
+
+# schema id -> fields getter
+GETTERS = tuple(fields_getter(names) for _, names in SCHEMAS)
+# tuples and lists of numbers of one type are packed in one struct: (container, item type) -> tag
+PACKED_TAGS = {(tuple, int): b"a", (tuple, float): b"b", (list, int): b"A", (list, float): b"B"}
+PACKED_CODES = {ord("a"): "q", ord("b"): "d", ord("A"): "q", ord("B"): "d"}
+# (item code, length) -> Struct of a packed tuple
+_packed = {}
+
+
+def packed_struct(code, n):
+    packed = _packed.get((code, n))
+    if packed is None:
+        packed = _packed[(code, n)] = struct.Struct(f"<{n}{code}")
+    return packed
+
+
+class Layout:
+    """the fields of a schema with a given type code each"""
+    def __init__(self, schema, kinds):
+        if schema >= len(SCHEMAS) or len(kinds) != len(SCHEMAS[schema][1]):
+            raise SnapshotError("broken save state layout")
+        names = SCHEMAS[schema][1]
+        numbers = [i for i, kind in enumerate(kinds) if kind in NUMBERS]
+        strings = [i for i, kind in enumerate(kinds) if kind == KINDS[str]]
+        tagged = [i for i, kind in enumerate(kinds) if kind == TAGGED]
+        self.schema = schema
+        self.kinds = kinds
+        ## the numbers, then the indexes of the strings in the string table of the blob
+        self.struct = struct.Struct("<" + bytes(kinds[i] for i in numbers).decode() + "H" * len(strings))
+        self.packed = picker(numbers + strings)
+        self.tagged = picker(tagged)
+        self.string_positions = strings
+        self.number_names = [names[i] for i in numbers]
+        self.string_names = [names[i] for i in strings]
+        self.tagged_names = [names[i] for i in tagged]
+        self.none_names = [name for name, kind in zip(names, kinds) if kind == KINDS[type(None)]]
+        self.missing_names = [name for name, kind in zip(names, kinds) if kind == KINDS[Missing]]
+
+
+# (schema, type codes) -> Layout, shared by every save and restore
+_layouts = {}
+# (schema, types of the values) -> Layout, the lookup of a save
+_type_layouts = {}
+
+
+def get_layout(schema, kinds):
+    layout = _layouts.get((schema, kinds))
+    if layout is None:
+        layout = Layout(schema, kinds)
+        _layouts[(schema, kinds)] = layout
+    return layout
+
+
+class Writer:
+    def __init__(self):
+        self.out = bytearray()
+        # layout -> layout index in this blob
+        self.indexes = {}
+        # string -> index in the string table of the blob
+        self.strings = {}
+
+    def count(self, n):
+        self.out += COUNT.pack(n)
+
+    def string_table(self):
+        """:return the string table of the records written so far"""
+        table = bytearray(COUNT.pack(len(self.strings)))
+        for text in self.strings:
+            encoded = text.encode()
+            table += COUNT.pack(len(encoded))
+            table += encoded
+        return table
+
+    def record(self, obj, schema, unsaved=None):
+        """write the fields of obj, the field `unsaved` is written as None"""
+        try:
+            values = GETTERS[schema](obj)
+        except AttributeError:
+            values = [getattr(obj, name, MISSING) for name in SCHEMAS[schema][1]]
+        if unsaved is not None:
+            values = list(values)
+            values[SCHEMAS[schema][1].index(unsaved)] = None
+        types = (schema, *map(type, values))
+        layout = _type_layouts.get(types)
+        if layout is None:
+            kinds = bytes(map(KINDS.get, types[1:], itertools.repeat(TAGGED)))
+            layout = _type_layouts[types] = get_layout(schema, kinds)
+        index = self.indexes.get(layout)
+        out = self.out
+        if index is None:
+            ## first object of this layout: the layout follows its index
+            index = self.indexes[layout] = len(self.indexes)
+            out += COUNT.pack(index)
+            out += LAYOUT.pack(schema, len(layout.kinds))
+            out += layout.kinds
+        else:
+            out += COUNT.pack(index)
+        if layout.string_positions:
+            values = list(values)
+            strings = self.strings
+            for i in layout.string_positions:
+                string_index = strings.get(values[i])
+                if string_index is None:
+                    string_index = strings[values[i]] = len(strings)
+                values[i] = string_index
+        out += layout.struct.pack(*layout.packed(values))
+        for value in layout.tagged(values):
+            self.value(value)
+
+    def value(self, value):
+        out = self.out
+        kind = type(value)
+        if value is None:
+            out += b"N"
+        elif kind is str:
+            encoded = value.encode()
+            out += b"s"
+            out += COUNT.pack(len(encoded))
+            out += encoded
+        elif kind is tuple or kind is list:
+            shared = SHARED_INDEX.get(id(value))
+            if shared is not None:
+                out += b"k"
+                out += COUNT.pack(shared)
+                return
+            item_kinds = set(map(type, value))
+            if len(item_kinds) == 1:
+                tag = PACKED_TAGS.get((kind, item_kinds.pop()))
+                if tag is not None:
+                    out += tag
+                    out += COUNT.pack(len(value))
+                    out += packed_struct(PACKED_CODES[tag[0]], len(value)).pack(*value)
+                    return
+            out += b"t" if kind is tuple else b"l"
+            out += COUNT.pack(len(value))
+            for item in value:
+                self.value(item)
+        elif kind is bool:
+            out += b"T" if value else b"F"
+        elif kind is int:
+            out += b"i"
+            out += INT.pack(value)
+        elif kind is float:
+            out += b"f"
+            out += FLOAT.pack(value)
+        elif kind is src.streams.SplitMix:
+            state, gauss = value.getstate()
+            out += b"r"
+            out += STREAM.pack(state)
+            self.value(gauss)
+        elif kind in SCHEMA_IDS:
+            out += b"o"
+            self.record(value, SCHEMA_IDS[kind])
+        else:
+            raise SnapshotError(f"cannot save a {kind.__name__}")
+
+    def random(self, rng):
+        version, words, gauss = rng.getstate()
+        self.out += RANDOM.pack(version, *words)
+        self.value(gauss)
+
+    def enemy(self, enemy):
+        self.record(enemy, SCHEMA_IDS[type(enemy)])
+
+    def corpse(self, enemy):
+        """a corpse is never updated again: its random stream is not saved (the pool gives a reused enemy a new one)"""
+        self.record(enemy, SCHEMA_IDS[type(enemy)], unsaved="rng")
+
+    def bullets(self, pool):
+        high = pool.high
+        self.out += BULLETS.pack(high, pool.count, pool.capacity)
+        for name in pool.ARRAYS:
+            self.out += getattr(pool, name)[:high].tobytes()
+
+
+class Reader:
+    def __init__(self, data, offset, enemy_pool):
+        self.data = data
+        self.pos = offset
+        # layouts of the blob, in index order
+        self.layouts = []
+        # string table of the blob
+        self.strings = [self.text() for _ in range(self.count())]
+        # released enemies are reused for the enemies of the save state
+        self.enemy_pool = enemy_pool
+
+    def count(self):
+        (n,) = COUNT.unpack_from(self.data, self.pos)
+        self.pos += 2
+        return n
+
+    def layout(self):
+        index = self.count()
+        if index == len(self.layouts):
+            schema, n = LAYOUT.unpack_from(self.data, self.pos)
+            self.pos += LAYOUT.size
+            kinds = bytes(self.data[self.pos:self.pos + n])
+            self.pos += n
+            self.layouts.append(get_layout(schema, kinds))
+        elif index > len(self.layouts):
+            raise SnapshotError("broken save state layout")
+        return self.layouts[index]
+
+    def record(self, obj=None):
+        """read a record into obj (None: a new object of the record class)"""
+        layout = self.layout()
+        if obj is None:
+            obj = self.new(layout.schema)
+        values = layout.struct.unpack_from(self.data, self.pos)
+        self.pos += layout.struct.size
+        for name, value in zip(layout.number_names, values):
+            setattr(obj, name, value)
+        if layout.string_names:
+            strings = self.strings
+            for name, index in zip(layout.string_names, values[len(layout.number_names):]):
+                setattr(obj, name, strings[index])
+        for name in layout.none_names:
+            setattr(obj, name, None)
+        for name in layout.tagged_names:
+            setattr(obj, name, self.value(getattr(obj, name, None)))
+        for name in layout.missing_names:
+            if hasattr(obj, name):
+                delattr(obj, name)
+        return obj
+
+    def new(self, schema):
+        cls = CLASSES.get(schema)
+        if cls is None:
+            raise SnapshotError(f"broken save state: no {SCHEMAS[schema][0]} object expected")
+        if schema > BASE_ENEMY:
+            ## a released enemy of the type when there is one, every slot is overwritten
+            enemy = self.enemy_pool.take(schema - BASE_ENEMY - 1)
+            if enemy is not None:
+                return enemy
+        return cls.__new__(cls)
+
+    def value(self, current=None):
+        """read a tagged value, a random stream is restored into `current` when it is one"""
+        data = self.data
+        tag = data[self.pos]
+        self.pos += 1
+        if tag == 78:  # N
+            return None
+        if tag == 115:  # s
+            return self.text()
+        if tag == 107:  # k
+            return SHARED[self.count()]
+        code = PACKED_CODES.get(tag)
+        if code is not None:
+            n = self.count()
+            packed = packed_struct(code, n)
+            values = packed.unpack_from(data, self.pos)
+            self.pos += packed.size
+            ## lower case tags are tuples
+            return values if tag > 96 else list(values)
+        if tag == 116:  # t
+            return tuple([self.value() for _ in range(self.count())])
+        if tag == 108:  # l
+            return [self.value() for _ in range(self.count())]
+        if tag == 84:  # T
+            return True
+        if tag == 70:  # F
+            return False
+        if tag == 105:  # i
+            (value,) = INT.unpack_from(data, self.pos)
+            self.pos += 8
+            return value
+        if tag == 102:  # f
+            (value,) = FLOAT.unpack_from(data, self.pos)
+            self.pos += 8
+            return value
+        if tag == 114:  # r
+            (state,) = STREAM.unpack_from(data, self.pos)
+            self.pos += STREAM.size
+            rng = current if type(current) is src.streams.SplitMix else src.streams.SplitMix(0)
+            rng.setstate((state, self.value()))
+            return rng
+        if tag == 111:  # o
+            return self.record()
+        raise SnapshotError(f"broken save state value (tag {tag})")
+
+    def text(self):
+        n = self.count()
+        text = bytes(self.data[self.pos:self.pos + n]).decode()
+        self.pos += n
+        return text
+
+    def random(self, rng):
+        state = RANDOM.unpack_from(self.data, self.pos)
+        self.pos += RANDOM.size
+        rng.setstate((state[0], state[1:], self.value()))
+        return rng
+
+    def bullets(self, pool):
+        high, count, capacity = BULLETS.unpack_from(self.data, self.pos)
+        self.pos += BULLETS.size
+        if pool.capacity < capacity:
+            pool.grow(capacity)
+        for name in pool.ARRAYS:
+            array = getattr(pool, name)
+            array[:high] = np.frombuffer(self.data, dtype=array.dtype, count=high, offset=self.pos)
+            self.pos += high * array.itemsize
+        pool.alive[high:] = False
+        pool.high = high
+        pool.count = count
+        ## free slots: the dead ones below high, then the rest (a sorted list is a heap)
+        pool.free_slots = np.flatnonzero(~pool.alive[:high]).tolist() + list(range(high, pool.capacity))
+
+
+def snapshot(world):
+    """:return the save state of the world (bytes)"""
+    writer = Writer()
+    writer.record(world, WORLD)
+    writer.random(world.rng)
+    writer.record(world.camera, CAMERA)
+    writer.record(world.chunks, STREAMER)
+    writer.record(world.enemy_pool, POOL)
+    writer.record(world.player, PLAYER)
+    writer.count(len(world.enemies))
+    for enemy in world.enemies:
+        writer.enemy(enemy)
+    ## parked enemies stay in their chunk, in the order they were parked
+    chunks = world.chunks.chunks
+    writer.count(len(chunks))
+    for chunk in chunks.values():
+        writer.out += chunk_block(chunk)
+    writer.count(len(world.corpses))
+    for enemy in world.corpses:
+        writer.corpse(enemy)
+    writer.bullets(world.bullets)
+    ## the string table goes before the body
+    head = bytearray(HEADER.pack(MAGIC, VERSION, SCHEMA_CRC, world.seed))
+    head += writer.string_table()
+    return bytes(head + writer.out)
+
+
+def chunk_block(chunk):
+    """the save state block of a parked chunk (see the blob layout), written again only after its enemies changed"""
+    if chunk.saved is None:
+        writer = Writer()
+        for enemy, tick in chunk.parked:
+            writer.out += INT.pack(tick)
+            writer.enemy(enemy)
+        body = writer.string_table() + writer.out
+        chunk.saved = CHUNK.pack(chunk.index, len(chunk.parked), len(body),
+                                 chunk.left, chunk.right, chunk.wake_left, chunk.wake_right) + body
+    return chunk.saved
+
+
+def load_chunk(world, block):
+    """decode the parked enemies of a chunk block, :return its [enemy, tick] entries"""
+    n = CHUNK.unpack_from(block, 0)[1]
+    reader = Reader(block, CHUNK.size, world.enemy_pool)
+    entries = []
+    try:
+        for _ in range(n):
+            (tick,) = INT.unpack_from(block, reader.pos)
+            reader.pos += INT.size
+            entries.append([restore_enemy(reader, world), tick])
+    except (struct.error, IndexError, ValueError) as error:
+        raise SnapshotError(f"broken save state chunk: {error}") from None
+    return entries
+
+
+def restore(world, blob):
+    """
+    put the world back in the state of a save state of the same build
+    raise SnapshotError for a blob of another build (the world is untouched) or a broken one (the world has to be reset)
+    """
+    if len(blob) < HEADER.size:
+        raise SnapshotError("save state too short")
+    magic, version, crc, seed = HEADER.unpack_from(blob, 0)
+    if magic != MAGIC:
+        raise SnapshotError("not a save state")
+    if version != VERSION:
+        raise SnapshotError(f"unsupported save state version {version}")
+    if crc != SCHEMA_CRC:
+        raise SnapshotError("save state of another build of the game (saved fields differ)")
+    pool = world.enemy_pool
+    ## the enemies of the current state go back to the pool, the save state reuses them
+    pool.release_all(world.enemies)
+    pool.release_all(world.chunks.loaded_enemies())
+    pool.release_all(world.corpses)
+    world.chunks.clear()
+    level = world.level
+    reader = Reader(blob, HEADER.size, pool)
+    try:
+        world.seed = seed
+        reader.record(world)
+        reader.random(world.rng)
+        reader.record(world.camera)
+        reader.record(world.chunks)
+        reader.record(pool)
+        reader.record(world.player)
+        enemies = [restore_enemy(reader, world) for _ in range(reader.count())]
+        for _ in range(reader.count()):
+            index, n, size, left, right, wake_left, wake_right = CHUNK.unpack_from(blob, reader.pos)
+            end = reader.pos + CHUNK.size + size
+            if end > len(blob):
+                raise SnapshotError("broken save state: chunk past the end")
+            chunk = src.chunks.Chunk(index)
+            chunk.left, chunk.right, chunk.wake_left, chunk.wake_right = left, right, wake_left, wake_right
+            ## the enemies are decoded when the chunk is needed, the block is saved again as it is
+            chunk.saved = bytes(blob[reader.pos:end])
+            chunk.load = functools.partial(load_chunk, world, chunk.saved)
+            reader.pos = end
+            world.chunks.chunks[index] = chunk
+            world.chunks.parked_count += n
+        world.corpses = [restore_enemy(reader, world) for _ in range(reader.count())]
+        reader.bullets(world.bullets)
+    except (struct.error, IndexError, ValueError) as error:
+        raise SnapshotError(f"broken save state: {error}") from None
+    ## in place: the boss appends its summons to this list
+    world.enemies[:] = enemies
+    if world.level != level:
+        compiled = src.collision.get_compiled_level(world.level)
+        world.enemy_grid = src.spatial_hash.SpatialHash(width=compiled.bound_x)
+
+
+def restore_enemy(reader, world):
+    enemy = reader.record()
+    enemy.collision = src.collision.get_compiled_level(enemy.level)
+    enemy.bullet_pool = world.bullets
+    enemy.enemy_pool = world.enemy_pool
+    return enemy
+
+
+class Checkpoints:
+    """rolling save states of a world: one every `every` frames, the last `keep` ones (rewind, bisect)"""
+    def __init__(self, every=60, keep=60):
+        self.every = every
+        self.keep = keep
+        # (frame, save state), oldest first
+        self.states = []
+
+    def update(self, world):
+        """call it after each step"""
+        if world.frame % self.every == 0:
+            self.states.append((world.frame, snapshot(world)))
+            if len(self.states) > self.keep:
+                del self.states[0]
+
+    def rewind(self, world, frame):
+        """restore the last checkpoint at or before `frame`, :return its frame (None when there is none)"""
+        for saved_frame, state in reversed(self.states):
+            if saved_frame <= frame:
+                restore(world, state)
+                return saved_frame
+        return None
+
+
+def main(argv=None):
+    """replay a recording with checkpoints, then restore each one into a fresh world and replay the rest from it"""
+    import src.replay, src.world
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("usage: python -m src.snapshot <replay file> [frames between checkpoints]")
+        return 2
+    path = argv[0]
+    every = int(argv[1]) if len(argv) > 1 else 300
+    seed, level, records, digest = src.replay.load_replay(path)
+    world = src.world.World(level, seed)
+    ## checkpoints keep the record index they were taken at, a restart record is replayed too
+    checkpoints = []
+    save_times = []
+    for index, (mask, mouse_x, mouse_y) in enumerate(records):
+        if index % every == 0:
+            start = time.perf_counter()
+            checkpoints.append((index, snapshot(world)))
+            save_times.append(time.perf_counter() - start)
+        if mask & src.replay.FLAG_RESET:
+            world.reset(level)
+        else:
+            world.step(src.inputs.InputFrame.from_mask(mask, mouse_x, mouse_y))
+    final = world.state_digest()
+    if digest is not None and final != digest:
+        print(f"{path}: replay diverged from the recording")
+        return 1
+    load_times = []
+    failed = 0
+    for index, state in checkpoints:
+        other = src.world.World(level, seed)
+        start = time.perf_counter()
+        restore(other, state)
+        load_times.append(time.perf_counter() - start)
+        for mask, mouse_x, mouse_y in records[index:]:
+            if mask & src.replay.FLAG_RESET:
+                other.reset(level)
+            else:
+                other.step(src.inputs.InputFrame.from_mask(mask, mouse_x, mouse_y))
+        if other.state_digest() != final:
+            print(f"checkpoint at record {index} (frame {other.frame}) diverged")
+            failed += 1
+    sizes = [len(state) for _, state in checkpoints]
+    save_times.sort()
+    load_times.sort()
+    print(f"{len(checkpoints)} checkpoints, {len(checkpoints) - failed} replayed to the same final state, {min(sizes)}-{max(sizes)} bytes")
+    print(f"save {save_times[len(save_times) // 2] * 1000:.3f} ms (median), {save_times[-1] * 1000:.3f} ms (max), "
+          f"restore {load_times[len(load_times) // 2] * 1000:.3f} ms (median), {load_times[-1] * 1000:.3f} ms (max)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
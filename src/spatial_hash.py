@@ -0,0 +1,80 @@
+"""
+spatial_hash.py
+This module provides a uniform spatial hash grid for the Neurotrace game.
+Entities are bucketed by the cells their bounding box covers, so a bullet only has to be tested
+against the few entities that share its cell instead of every entity of the level.
+"""
+import numpy as np
+import src.settings
+
+
+class SpatialHash:
+    def __init__(self, cell_size=src.settings.SPATIAL_CELL_SIZE, width=src.settings.WORLD_BOUND_X):
+        # size of one square cell in pixels
+        self.cell_size = cell_size
+        # number of cell columns, used to turn (column, row) into a single integer key
+        self.columns = width // cell_size + 1
+        # cell key -> entities in insertion order
+        self.buckets = {}
+
+    def clear(self):
+        self.buckets.clear()
+
+    def cell_key(self, x, y):
+        """get the integer key of the cell containing a point [absolute]"""
+        return int(y // self.cell_size) * self.columns + int(x // self.cell_size)
+
+    def cell_keys(self, x, y):
+        """cell_key of many points at once (NumPy arrays [absolute], non-negative coordinates)"""
+        cs = self.cell_size
+        return (y // cs).astype(np.int64) * self.columns + (x // cs).astype(np.int64)
+
+    def occupied_keys(self):
+        """keys of the cells holding at least one entity (NumPy array)"""
+        return np.fromiter(self.buckets, dtype=np.int64, count=len(self.buckets))
+
+    def insert(self, item, x, y, w=16, h=16):
+        """add an entity to every cell covered by its bounding box (edges included)"""
+        cs = self.cell_size
+        col_start = int(x // cs)
+        col_end = int((x + w) // cs)
+        row_start = int(y // cs)
+        row_end = int((y + h) // cs)
+        buckets = self.buckets
+        for row in range(row_start, row_end + 1):
+            base = row * self.columns
+            for col in range(col_start, col_end + 1):
+                key = base + col
+                bucket = buckets.get(key)
+                if bucket is None:
+                    buckets[key] = [item]
+                else:
+                    bucket.append(item)
+
+    def rebuild(self, entities, w=16, h=16):
+        """clear the grid and insert every live entity, call it once per tick"""
+        self.buckets.clear()
+        for entity in entities:
+            if entity.alive:
+                self.insert(entity, entity.x, entity.y, w, h)
+
+    def query_point(self, x, y):
+        """
+        get the entities whose cells contain the point
+        :return list of candidates, in insertion order, each entity at most once
+        """
+        return self.buckets.get(self.cell_key(x, y), ())
+
+    def query_rect(self, x, y, w, h):
+        """get the entities whose cells overlap the rectangle, each entity at most once"""
+        cs = self.cell_size
+        found = []
+        seen = set()
+        for row in range(int(y // cs), int((y + h) // cs) + 1):
+            base = row * self.columns
+            for col in range(int(x // cs), int((x + w) // cs) + 1):
+                for item in self.buckets.get(base + col, ()):
+                    if id(item) not in seen:
+                        seen.add(id(item))
+                        found.append(item)
+        return found
@@ -0,0 +1,57 @@
+"""
+streams.py
+This module provides the per-enemy random streams of the Neurotrace game.
+SplitMix is a random.Random drawing from a SplitMix64 generator: its whole state is one 64 bit integer,
+so saving and restoring the stream of an enemy (src/snapshot.py) costs a single struct field instead of
+the 625 words of a Mersenne Twister. Every method of random.Random (random, randint, choice, uniform...)
+works on top of random() and getrandbits().
+"""
+import os
+import random
+
+MASK = (1 << 64) - 1
+# SplitMix64 constants (golden ratio increment, then the two multipliers of the output mix)
+GAMMA = 0x9E3779B97F4A7C15
+MIX1 = 0xBF58476D1CE4E5B9
+MIX2 = 0x94D049BB133111EB
+# 2 ** -53: a 53 bit integer to a float in [0, 1)
+FLOAT_STEP = 1.0 / (1 << 53)
+
+
+class SplitMix(random.Random):
+    """random stream of an enemy, saved and restored as one integer"""
+    def seed(self, a=None, version=2):
+        """seed from an integer (the 64 low bits), None picks a fresh one from the OS"""
+        if a is None:
+            a = int.from_bytes(os.urandom(8), "little")
+        elif not isinstance(a, int):
+            raise TypeError("a SplitMix stream is seeded from an integer")
+        self.state = a & MASK
+        self.gauss_next = None
+
+    def next64(self):
+        """advance the stream, :return the next 64 bit output"""
+        self.state = z = (self.state + GAMMA) & MASK
+        z = ((z ^ (z >> 30)) * MIX1) & MASK
+        z = ((z ^ (z >> 27)) * MIX2) & MASK
+        return z ^ (z >> 31)
+
+    def random(self):
+        return (self.next64() >> 11) * FLOAT_STEP
+
+    def getrandbits(self, k):
+        if k < 0:
+            raise ValueError("number of bits must be non-negative")
+        if k <= 64:
+            return self.next64() >> (64 - k)
+        ## the low words first
+        bits = 0
+        for shift in range(0, k, 64):
+            bits |= self.next64() << shift
+        return bits & ((1 << k) - 1)
+
+    def getstate(self):
+        return self.state, self.gauss_next
+
+    def setstate(self, state):
+        self.state, self.gauss_next = state
@@ -25,11 +25,7 @@ STRUCTURE = {
         "playerInitPos": (0, 112),  # Relative Position 
         "mapUV": (0, 256),
         "mapWH": (128*6, 128),
-        "mapFloor": [
-            (0, 112, 128*6, 16),  # Main floor: (x, y, width, height) / Relative Position
-            # (200, 296, 75, 16),   # Platform 1
-            # (400, 240, 75, 16),   # Platform 2
-        ],
+        "collision": "tilemap",  # floors are the solid tiles of the map (src/tilemap.py)
         "enemies": [
             (2, 100, 112),  # type 0 at (100, 352)
             (4, 300, 112),  # type 1 at (300, 352)
@@ -104,9 +100,7 @@ STRUCTURE = {
         "playerInitPos": (0, 112),
         "mapUV": (0, 640),
         "mapWH": (128*6, 128),
-        "mapFloor": [
-            (0, 112, 128*6, 16),  # Main floor
-        ],
+        "collision": "tilemap",  # floors are the solid tiles of the map (src/tilemap.py)
         "enemies": [
             (8, 600, 112),  # Boss enemy with sniper weapon at center-ish
         ],
@@ -0,0 +1,219 @@
+"""
+text_cache.py
+This module provides the text cache of the draw code of the Neurotrace game.
+A string is rendered once per (text, font size, color) into image bank TEXT_BANK (free in assets.pyxres),
+then every frame only blits it from there: the TrueType texts of PyxelUniversalFont (menu, game over, win screens)
+no longer set every glyph pixel each frame, and HUD strings are rendered again only when their value changes.
+The bank is packed in shelves (rows of entries of the same rounded height); when it is full,
+the least recently drawn entries are evicted until the new one fits.
+The pixels of the TrueType texts are also kept in the asset cache directory (src/assets.py), keyed by font file,
+text, size and color: the title screen of a later run needs neither PyxelUniversalFont nor NumPy, and its first frame
+is drawn before they load.
+"""
+import hashlib
+import importlib.util
+import os
+import struct
+from collections import OrderedDict
+import pyxel
+import src.assets
+
+# image bank holding the rendered texts
+TEXT_BANK = 2
+BANK_SIZE = 256
+# shelf heights are rounded up to this many pixels
+SHELF_STEP = 4
+# size of a character of the pyxel font
+FONT_WIDTH = 4
+FONT_HEIGHT = 6
+# cached TrueType texts: width, height, then a byte per pixel (TRANSPARENT for -1)
+TEXT_HEADER = struct.Struct("<HH")
+TRANSPARENT = 255
+
+
+class Shelf:
+    def __init__(self, y, height):
+        self.y = y
+        self.height = height
+        # used [left, right) spans of the shelf, sorted by left
+        self.spans = []
+
+    def allocate(self, width):
+        """first free gap of the shelf at least `width` wide, :return its x, None if there is none"""
+        x = 0
+        for index, (left, right) in enumerate(self.spans):
+            if left - x >= width:
+                self.spans.insert(index, (x, x + width))
+                return x
+            x = right
+        if BANK_SIZE - x >= width:
+            self.spans.append((x, x + width))
+            return x
+        return None
+
+    def free(self, x):
+        self.spans = [span for span in self.spans if span[0] != x]
+
+
+class TextCache:
+    def __init__(self, bank=TEXT_BANK):
+        self.bank = bank
+        # (text, font size, color) -> (shelf, x, width, height, color key), least recently drawn first
+        self.entries = OrderedDict()
+        self.shelves = []
+        # counters (debug)
+        self.rendered = 0
+        self.evicted = 0
+
+    def clear(self):
+        self.entries.clear()
+        self.shelves = []
+
+    def text(self, x, y, s, col):
+        """pyxel.text through the cache (pyxel font)"""
+        self.draw(x, y, s, None, col, None)
+
+    def draw(self, x, y, s, size, col, font):
+        """
+        draw a string at (x, y) [screen]
+        :param size: size of the TrueTypeFont `font`, None for the pyxel font
+        """
+        if not s:
+            return
+        key = (s, size, col)
+        entry = self.entries.get(key)
+        if entry is None:
+            entry = self.render(key, font)
+            if entry is None:
+                ## no room even in an empty bank (or random colors): draw it directly
+                if font is None:
+                    pyxel.text(x, y, s, col)
+                else:
+                    font.draw(x, y, s, size, col)
+                return
+        else:
+            self.entries.move_to_end(key)
+        shelf, u, width, height, colkey = entry
+        pyxel.blt(x, y, self.bank, u, shelf.y, width, height, colkey)
+
+    def render(self, key, font):
+        """render a string into the bank, :return its entry, None if it can not be cached"""
+        s, size, col = key
+        if font is None:
+            lines = s.split("\n")
+            pixels = None
+            width = max(len(line) for line in lines) * FONT_WIDTH
+            height = len(lines) * FONT_HEIGHT
+        else:
+            ## 16 draws each pixel in a random color every frame
+            if col == 16:
+                return None
+            pixels = font.pixels(s, size, col)
+            if pixels is None:
+                return None
+            ## the bitmap of a TrueType string is size * len wide: the transparent right part is never drawn
+            width = max(max((x for x, color in enumerate(row) if color != -1), default=0) for row in pixels) + 1
+            height = len(pixels)
+        placed = self.allocate(width, height)
+        if placed is None:
+            return None
+        shelf, u = placed
+        colkey = 0 if col != 0 else 1
+        image = pyxel.images[self.bank]
+        image.rect(u, shelf.y, width, height, colkey)
+        if pixels is None:
+            image.text(u, shelf.y, s, col)
+        else:
+            for row, line in enumerate(pixels):
+                for column, color in enumerate(line[:width]):
+                    if color != -1:
+                        image.pset(u + column, shelf.y + row, color)
+        entry = (shelf, u, width, height, colkey)
+        self.entries[key] = entry
+        self.rendered += 1
+        return entry
+
+    def allocate(self, width, height):
+        """room for a width * height entry, evicting the least recently drawn entries if needed"""
+        if width > BANK_SIZE or height > BANK_SIZE:
+            return None
+        shelf_height = -(-height // SHELF_STEP) * SHELF_STEP
+        while True:
+            for shelf in self.shelves:
+                if shelf.height == shelf_height:
+                    u = shelf.allocate(width)
+                    if u is not None:
+                        return shelf, u
+            top = self.shelves[-1].y + self.shelves[-1].height if self.shelves else 0
+            if top + shelf_height <= BANK_SIZE:
+                shelf = Shelf(top, shelf_height)
+                self.shelves.append(shelf)
+                return shelf, shelf.allocate(width)
+            if not self.entries:
+                return None
+            self.evict()
+
+    def evict(self):
+        """drop the least recently drawn entry, an emptied last shelf gives its rows back"""
+        key, (shelf, u, width, height, colkey) = self.entries.popitem(last=False)
+        shelf.free(u)
+        self.evicted += 1
+        while self.shelves and not self.shelves[-1].spans:
+            self.shelves.pop()
+
+
+class TrueTypeFont:
+    """
+    a TrueType font of PyxelUniversalFont, imported on first use (with PIL and NumPy, slow to import)
+    the pixels of each string are cached on disk (keyed by the content hash of the font), so the title screen
+    is drawn on the first frame without them
+    """
+    def __init__(self, font_name):
+        self.font_name = font_name
+        self.font_path = None
+        self.writer = None
+        # "text|size|color" -> rows of pixels (color, -1 for transparent), None if the font can not draw it
+        self.lib = {}
+
+    def get_writer(self):
+        if self.writer is None:
+            import PyxelUniversalFont as pul
+            self.writer = pul.Writer(self.font_name)
+        return self.writer
+
+    def get_font_path(self):
+        """path of the font file, found without importing PyxelUniversalFont"""
+        if self.font_path is None:
+            package = importlib.util.find_spec("PyxelUniversalFont").submodule_search_locations[0]
+            self.font_path = os.path.join(package, "fonts", self.font_name)
+        return self.font_path
+
+    def pixels(self, s, size, col):
+        """rows of pixels of a string as PyxelUniversalFont draws it"""
+        key = f"{s}|{size}|{col}"
+        if key in self.lib:
+            return self.lib[key]
+        name = "text/" + hashlib.sha1(f"{src.assets.content_hash(self.get_font_path())}|{key}".encode()).hexdigest() + ".bin"
+        data = src.assets.read_cache(name)
+        if data is not None:
+            width, height = TEXT_HEADER.unpack_from(data)
+            body = data[TEXT_HEADER.size:]
+            rows = [[-1 if color == TRANSPARENT else color for color in body[y * width:(y + 1) * width]] for y in range(height)]
+        else:
+            import PyxelUniversalFont as pul
+            pixels = pul.get_pixel_representation(text=s, font_path=self.get_writer().font_path, font_size=size,
+                                                  font_color=col, background_color=-1)
+            rows = None if pixels is None else pixels.tolist()
+            if rows:
+                body = bytes(TRANSPARENT if color == -1 else color for row in rows for color in row)
+                src.assets.write_cache(name, TEXT_HEADER.pack(len(rows[0]), len(rows)) + body)
+        self.lib[key] = rows
+        return rows
+
+    def draw(self, x, y, s, size, col):
+        """draw a string directly (pixel by pixel)"""
+        self.get_writer().draw(x, y, s, size, col)
+
+
+# cache shared by every draw function
+text_cache = TextCache()
@@ -0,0 +1,104 @@
+"""
+tilemap.py
+This module provides the tilemap collision loader of the Neurotrace game.
+The level region of tilemap 0 (mapUV, mapWH of src/structure.py, the one drawn by pyxel.bltm) is read once
+through the asset cache of src/assets.py (no pyxel window needed, so headless runs and replays can use it),
+each tile is classified with TILE_ATTRIBUTES, and the solid tiles become a per-pixel bool bitmap
+plus the floor rectangles (runs of solid tiles) the landing / walking indexes of src/collision.py are built from.
+A level opts in with "collision": "tilemap" in its structure, in place of the hand-written "mapFloor" rectangles.
+
+Print where the hand-written floors and the solid tiles disagree:
+    python -m src.tilemap
+"""
+import sys
+import numpy as np
+import src.structure, src.assets
+
+ASSETS_PATH = src.assets.ASSETS_PATH
+# tilemap drawn by Map.drawMap
+TILEMAP = 0
+# tiles are 8*8 pixels
+TILE_SIZE = 8
+
+# tile attributes: (u, v) of the tile in its image bank [tiles] -> attribute, tiles not listed are EMPTY
+EMPTY = 0
+SOLID = 1
+TILE_ATTRIBUTES = {
+    (0, 2): SOLID, (1, 2): SOLID,  # ground, top row
+    (0, 3): SOLID, (1, 3): SOLID,  # ground, bottom row
+}
+
+
+def get_tilemap(path=ASSETS_PATH):
+    """the (u, v) of each tile of the tilemap drawn by Map.drawMap [rows, columns, 2], decoded once (see src/assets.py)"""
+    return src.assets.get_assets(path)["tilemaps"][TILEMAP]
+
+
+def level_tiles(level):
+    """the (u, v) of the tiles under the level [rows, columns, 2]"""
+    info = src.structure.STRUCTURE[level]
+    map_u, map_v = info["mapUV"]
+    map_w, map_h = info["mapWH"]
+    u, v = map_u // TILE_SIZE, map_v // TILE_SIZE
+    return get_tilemap()[v:v + map_h // TILE_SIZE, u:u + map_w // TILE_SIZE]
+
+
+def solid_tiles(level):
+    """bool array [rows, columns] of the solid tiles of the level"""
+    tiles = level_tiles(level)
+    ## attribute table indexed by the tile (v, u): one lookup for the whole level
+    table = np.zeros((tiles[..., 1].max() + 1, tiles[..., 0].max() + 1), dtype=np.uint8)
+    for (u, v), attribute in TILE_ATTRIBUTES.items():
+        if v < table.shape[0] and u < table.shape[1]:
+            table[v, u] = attribute
+    return table[tiles[..., 1], tiles[..., 0]] == SOLID
+
+
+def solid_bitmap(level):
+    """bool array [y, x] of the solid pixels of the level, one per pixel as CompiledLevel.solid"""
+    solid = solid_tiles(level)
+    return np.repeat(np.repeat(solid, TILE_SIZE, axis=0), TILE_SIZE, axis=1)
+
+
+def solid_rects(level):
+    """
+    the solid tiles of the level as floor rectangles (x, y, w, h) [absolute x, relative y]
+    horizontal runs of solid tiles, stacked runs with the same x extent are merged, sorted by top then left
+    """
+    solid = solid_tiles(level)
+    rects = []
+    ## (left, right) -> index in rects of the run that ends on the previous row
+    open_runs = {}
+    for row in range(solid.shape[0]):
+        padded = np.concatenate(([False], solid[row], [False]))
+        edges = np.flatnonzero(padded[1:] != padded[:-1]).tolist()
+        runs = {}
+        for left, right in zip(edges[::2], edges[1::2]):
+            index = open_runs.get((left, right))
+            if index is None:
+                index = len(rects)
+                rects.append([left, row, right - left, 0])
+            rects[index][3] += 1
+            runs[(left, right)] = index
+        open_runs = runs
+    rects.sort(key=lambda rect: (rect[1], rect[0]))
+    return [(x * TILE_SIZE, y * TILE_SIZE, w * TILE_SIZE, h * TILE_SIZE) for x, y, w, h in rects]
+
+
+def main():
+    """compare the hand-written floors of each level with its solid tiles"""
+    for level, info in src.structure.STRUCTURE.items():
+        tiles = solid_bitmap(level)
+        if "mapFloor" not in info:
+            print(f"level {level}: tilemap collision, {len(solid_rects(level))} floor rectangles")
+            continue
+        floors = np.zeros(tiles.shape, dtype=bool)
+        for rx, ry, rw, rh in info["mapFloor"]:
+            floors[max(0, ry):max(0, ry + rh), max(0, rx):max(0, rx + rw)] = True
+        print(f"level {level}: {int(np.count_nonzero(floors & ~tiles))} floor pixels without a solid tile, "
+              f"{int(np.count_nonzero(tiles & ~floors))} solid tile pixels without a floor")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
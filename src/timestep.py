@@ -0,0 +1,140 @@
+"""
+timestep.py
+This module provides the fixed-timestep loop of the game window of the Neurotrace game.
+The simulation always advances in steps of 1/SIM_FPS s (every per-frame speed of the game is tuned for one step),
+whatever the render rate: FixedTimestep adds the real time of each window frame to an accumulator and runs
+the steps it holds, up to MAX_CATCH_UP_STEPS after a hitch (the extra time is dropped and the next draws
+can be skipped), or none when the window draws faster than the simulation.
+RenderInterpolator draws the camera, the player, the enemies and the bullets between their positions before
+and after the last step (when the render rate differs from SIM_FPS), and puts the exact positions back
+after the draw: the simulation only ever sees its own steps, so its results do not depend on the frame rate.
+"""
+import time
+import src.settings
+
+# a window frame within this fraction of its nominal length counts as exactly one frame (timer jitter)
+SNAP = 0.1
+# draws skipped in a row at most while the simulation is behind
+MAX_SKIPPED_DRAWS = 2
+# an entity that moved more than this in one step teleported (level change, boss teleport): no blending [px]
+MAX_BLEND_DISTANCE = 32
+
+
+class FixedTimestep:
+    def __init__(self, step_rate=src.settings.SIM_FPS, frame_rate=src.settings.FPS,
+                 max_steps=src.settings.MAX_CATCH_UP_STEPS, clock=time.perf_counter):
+        self.step_time = 1.0 / step_rate
+        self.frame_time = 1.0 / frame_rate
+        self.max_steps = max_steps
+        self.clock = clock
+        # time of the last frame, None until the first one (or after a pause)
+        self.last = None
+        # real time not simulated yet [s]
+        self.accumulator = 0.0
+        # the cap dropped steps on the last frame
+        self.behind = False
+        self.skipped_draws = 0
+        # counters (debug overlay / profiler)
+        self.dropped_steps = 0
+
+    def reset(self):
+        """forget the time spent outside the simulation (menu, game over), call it when the game starts again"""
+        self.last = None
+        self.accumulator = 0.0
+        self.behind = False
+
+    def advance(self):
+        """add the time since the last frame, :return the number of steps to simulate now"""
+        now = self.clock()
+        if self.last is None:
+            elapsed = self.frame_time
+        else:
+            elapsed = now - self.last
+            if abs(elapsed - self.frame_time) < SNAP * self.frame_time:
+                elapsed = self.frame_time
+        self.last = now
+        self.accumulator += elapsed
+        ## small epsilon: n frames of 1/120 s are exactly n/2 steps of 1/60 s
+        steps = int(self.accumulator / self.step_time + 1e-9)
+        self.behind = steps > self.max_steps
+        if self.behind:
+            ## too far behind: the game slows down rather than spiralling into ever longer catch-ups
+            self.dropped_steps += steps - self.max_steps
+            steps = self.max_steps
+            self.accumulator = 0.0
+        else:
+            self.accumulator = max(0.0, self.accumulator - steps * self.step_time)
+        return steps
+
+    @property
+    def alpha(self):
+        """fraction of a step the simulation is ahead of the last step, for the render interpolation"""
+        return min(1.0, self.accumulator / self.step_time)
+
+    def should_draw(self):
+        """skip a few draws in a row while the simulation is behind"""
+        if self.behind and self.skipped_draws < MAX_SKIPPED_DRAWS:
+            self.skipped_draws += 1
+            return False
+        self.skipped_draws = 0
+        return True
+
+
+class RenderInterpolator:
+    def __init__(self):
+        # positions before the last step: camera offset, level and (entity, x, y) of the player and the enemies
+        self.camera = None
+        self.level = None
+        self.entities = []
+        # exact positions and bullet coordinates put back by restore()
+        self.saved = []
+        self.saved_camera = None
+        self.saved_bullets = None
+
+    def capture(self, world):
+        """remember the positions before a step, call it before the last step of a window frame"""
+        self.camera = (world.camera_x, world.camera_y)
+        self.level = world.level
+        self.entities = [(world.player, world.player.x, world.player.y)]
+        self.entities.extend((enemy, enemy.x, enemy.y) for enemy in world.enemies)
+
+    def apply(self, world, alpha):
+        """move the world to its position `alpha` of the way through the last step, for the draw"""
+        if self.camera is None or alpha >= 1.0 or world.level != self.level:
+            return
+        back = 1.0 - alpha
+        saved = self.saved
+        for entity, x, y in self.entities:
+            current_x, current_y = entity.x, entity.y
+            if abs(current_x - x) > MAX_BLEND_DISTANCE or abs(current_y - y) > MAX_BLEND_DISTANCE:
+                continue
+            saved.append((entity, current_x, current_y))
+            entity.x = current_x - (current_x - x) * back
+            entity.y = current_y - (current_y - y) * back
+        self.saved_camera = (world.camera_x, world.camera_y)
+        camera_x, camera_y = self.camera
+        if abs(world.camera_x - camera_x) <= MAX_BLEND_DISTANCE:
+            world.camera_x = round(world.camera_x - (world.camera_x - camera_x) * back)
+        ## bullets fly straight: one step back is one velocity back
+        bullets = world.bullets
+        n = bullets.high
+        if bullets.count:
+            self.saved_bullets = (n, bullets.x[:n].copy(), bullets.y[:n].copy())
+            alive = bullets.alive[:n]
+            bullets.x[:n] -= bullets.vx[:n] * back * alive
+            bullets.y[:n] -= bullets.vy[:n] * back * alive
+
+    def restore(self, world):
+        """put the exact positions of the simulation back after the draw"""
+        for entity, x, y in self.saved:
+            entity.x = x
+            entity.y = y
+        self.saved = []
+        if self.saved_camera is not None:
+            world.camera_x, world.camera_y = self.saved_camera
+            self.saved_camera = None
+        if self.saved_bullets is not None:
+            n, x, y = self.saved_bullets
+            world.bullets.x[:n] = x
+            world.bullets.y[:n] = y
+            self.saved_bullets = None
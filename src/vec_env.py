@@ -0,0 +1,176 @@
+"""
+vec_env.py
+This module provides the vectorized multi-world environment of the Neurotrace game, for training and evaluating bot players.
+N independent worlds are stepped in lockstep by step(actions) -> (obs, reward, done).
+An action is the packed button mask of an InputFrame (the gameplay buttons, the debug keys are ignored) and optionally
+the cursor [screen]. Observations are one float32 row per world, gathered for every world at once: the player,
+the OBS_ENEMIES nearest enemies and the OBS_BULLETS nearest bullets (relative to the player) from flat arrays
+of all the worlds, so no per-world array is built. A world taking the portal goes on with the next level
+(World.transition_to_next_level, with a reward), a world whose player died, beat the boss or ran out of frames
+is done and restarts at its first level with the next seed, as the game does on restart.
+"""
+import numpy as np
+import src.settings, src.bullet_pool
+from src.world import World
+from src.inputs import InputFrame
+
+# nearest enemies and bullets in an observation
+OBS_ENEMIES = 8
+OBS_BULLETS = 16
+# features of the player, of an enemy and of a bullet
+PLAYER_FEATURES = 11
+ENEMY_FEATURES = 5
+BULLET_FEATURES = 6
+OBS_SIZE = PLAYER_FEATURES + OBS_ENEMIES * ENEMY_FEATURES + OBS_BULLETS * BULLET_FEATURES
+# gameplay buttons an agent can press (InputFrame.BUTTONS up to the debug keys)
+ACTION_MASK = (1 << InputFrame.BUTTONS.index("toggle_debug")) - 1
+# rewards: per pixel moved right, per enemy defeated, per health point lost, level cleared, boss defeated, death
+REWARD_PROGRESS = 0.01
+REWARD_DEFEATED = 1.0
+REWARD_DAMAGE = -0.01
+REWARD_LEVEL = 10.0
+REWARD_WIN = 20.0
+REWARD_DEATH = -10.0
+# positions in the observations are divided by this [px]
+SCALE = 128.0
+
+
+class VecEnv:
+    def __init__(self, num_envs, level=0, seed=0, max_frames=60 * 120):
+        self.num_envs = num_envs
+        # level every episode starts at
+        self.level = level
+        self.max_frames = max_frames
+        # every episode gets its own seed: world i starts with seed + i, then the seeds after num_envs
+        self.next_seed = seed + num_envs
+        self.worlds = [World(level, seed=seed + i) for i in range(num_envs)]
+        # observation buffer, with views on the player, enemy and bullet features
+        self.obs = np.zeros((num_envs, OBS_SIZE), dtype=np.float32)
+        self.player_obs = self.obs[:, :PLAYER_FEATURES]
+        enemies_end = PLAYER_FEATURES + OBS_ENEMIES * ENEMY_FEATURES
+        self.enemy_obs = self.obs[:, PLAYER_FEATURES:enemies_end].reshape(num_envs, OBS_ENEMIES, ENEMY_FEATURES)
+        self.bullet_obs = self.obs[:, enemies_end:].reshape(num_envs, OBS_BULLETS, BULLET_FEATURES)
+        # state of the last step, the rewards are its differences
+        self.previous = self.gather_state()
+        # true where the episode ended on the frame budget rather than a death or a win (last step)
+        self.truncated = np.zeros(num_envs, dtype=bool)
+        # return and length of the running episodes, and of the episodes that ended on the last step
+        self.episode_return = np.zeros(num_envs)
+        self.episode_length = np.zeros(num_envs, dtype=np.int64)
+        self.final_return = np.zeros(num_envs)
+        self.final_length = np.zeros(num_envs, dtype=np.int64)
+
+    def reset(self):
+        """restart every world, :return the observations"""
+        for world in self.worlds:
+            self.restart(world)
+        self.previous = self.gather_state()
+        self.episode_return[:] = 0
+        self.episode_length[:] = 0
+        return self.observe()
+
+    def restart(self, world):
+        world.reset(self.level, seed=self.next_seed)
+        self.next_seed += 1
+
+    def step(self, actions):
+        """
+        advance every world by one frame
+        :param actions: int array [N] of button masks, or [N, 3] of (button mask, mouse x, mouse y)
+        :return (obs [N, OBS_SIZE], reward [N], done [N]), done worlds are already restarted in obs
+        """
+        actions = np.asarray(actions)
+        if actions.ndim == 1:
+            masks = (actions & ACTION_MASK).tolist()
+            ## no cursor: aim straight ahead on the right
+            cursors = [(src.settings.WINDOW_WIDTH - 8, src.settings.WINDOW_HEIGHT // 2)] * self.num_envs
+        else:
+            masks = (actions[:, 0] & ACTION_MASK).tolist()
+            cursors = actions[:, 1:3].tolist()
+        for world, mask, (mouse_x, mouse_y) in zip(self.worlds, masks, cursors):
+            world.step(InputFrame.from_mask(mask, mouse_x, mouse_y))
+
+        state = self.gather_state()
+        x, health, defeated, level, dead, won, frame = state
+        px, phealth, pdefeated, plevel = self.previous[:4]
+        changed_level = level != plevel
+        ## moving right on the same level, the new level starts at its own spawn point
+        progress = np.where(changed_level, 0.0, x - px)
+        reward = (REWARD_PROGRESS * progress + REWARD_DEFEATED * (defeated - pdefeated)
+                  + REWARD_DAMAGE * np.maximum(phealth - health, 0)
+                  + REWARD_LEVEL * changed_level + REWARD_WIN * won + REWARD_DEATH * dead)
+        self.truncated = (frame >= self.max_frames) & ~dead & ~won
+        done = dead | won | self.truncated
+        self.episode_return += reward
+        self.episode_length += 1
+        if done.any():
+            for i in np.flatnonzero(done).tolist():
+                self.restart(self.worlds[i])
+            self.final_return = np.where(done, self.episode_return, 0.0)
+            self.final_length = np.where(done, self.episode_length, 0)
+            self.episode_return[done] = 0
+            self.episode_length[done] = 0
+            state = self.gather_state()
+        self.previous = state
+        return self.observe(), reward, done
+
+    def gather_state(self):
+        """(x, health, defeated, level, dead, won, frame) arrays of every world, for the rewards"""
+        rows = [(world.player.x, world.player.health, world.defeated, world.level,
+                 world.player.health <= 0, world.boss_defeated, world.frame) for world in self.worlds]
+        x, health, defeated, level, dead, won, frame = zip(*rows)
+        return (np.array(x, dtype=float), np.array(health), np.array(defeated), np.array(level),
+                np.array(dead), np.array(won), np.array(frame))
+
+    def observe(self):
+        """fill the observation buffer from every world, :return it"""
+        worlds = self.worlds
+        self.obs[:] = 0
+        players = [world.player for world in worlds]
+        self.player_obs[:] = [(
+            player.x / SCALE, player.y / SCALE, player.velocity_y, player.health / player.max_health,
+            player.ammo[player.current_weapon] / player.weapons[player.current_weapon]['max_ammo'],
+            player.current_weapon, player.shield_stamina / player.shield_stamina_max,
+            player.shield_cooldown / player.shield_cooldown_max, player.facing_direction,
+            world.level, world.door_open,
+        ) for world, player in zip(worlds, players)]
+        px = np.array([player.x for player in players], dtype=float)
+        py = np.array([player.y for player in players], dtype=float)
+
+        ## enemies of every world in one flat array: (world, x, y, hp, type)
+        enemies = [(i, enemy.x, enemy.y, enemy.hp, enemy.type_index)
+                   for i, world in enumerate(worlds) for enemy in world.enemies if enemy.alive]
+        if enemies:
+            table = np.array(enemies, dtype=float)
+            owner = table[:, 0].astype(np.int64)
+            dx = (table[:, 1] - px[owner]) / SCALE
+            dy = (table[:, 2] - py[owner]) / SCALE
+            features = np.stack((dx, dy, table[:, 3], table[:, 4], np.ones(len(table))), axis=1)
+            self.scatter_nearest(self.enemy_obs, owner, dx * dx + dy * dy, features)
+
+        ## live bullets of every world, straight from the bullet pool arrays
+        pools = [world.bullets for world in worlds]
+        highs = [pool.high for pool in pools]
+        if sum(highs):
+            alive = np.concatenate([pool.alive[:n] for pool, n in zip(pools, highs)])
+            owner = np.repeat(np.arange(len(worlds)), highs)[alive]
+            bx = np.concatenate([pool.x[:n] for pool, n in zip(pools, highs)])[alive]
+            by = np.concatenate([pool.y[:n] for pool, n in zip(pools, highs)])[alive]
+            vx = np.concatenate([pool.vx[:n] for pool, n in zip(pools, highs)])[alive]
+            vy = np.concatenate([pool.vy[:n] for pool, n in zip(pools, highs)])[alive]
+            hostile = np.concatenate([pool.owner[:n] for pool, n in zip(pools, highs)])[alive] != src.bullet_pool.OWNER_PLAYER
+            dx = (bx - px[owner]) / SCALE
+            dy = (by - py[owner]) / SCALE
+            features = np.stack((dx, dy, vx, vy, hostile, np.ones(len(dx))), axis=1)
+            self.scatter_nearest(self.bullet_obs, owner, dx * dx + dy * dy, features)
+        return self.obs
+
+    @staticmethod
+    def scatter_nearest(out, owner, distance, features):
+        """write the rows of `features` into out[world, rank] for the nearest out.shape[1] of each world"""
+        order = np.lexsort((distance, owner))
+        owner = owner[order]
+        ## rank of each row within its world: position minus the position of the first row of the world
+        rank = np.arange(len(order)) - np.searchsorted(owner, owner, side="left")
+        keep = rank < out.shape[1]
+        out[owner[keep], rank[keep]] = features[order[keep]]
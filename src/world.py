@@ -0,0 +1,394 @@
+"""
+world.py
+This module provides the headless simulation core of the Neurotrace game.
+A World owns the player, the enemies, the camera and the current level, and advances them
+one frame at a time from an InputFrame. It never opens a window or reads pyxel input,
+so it can be stepped as fast as the CPU allows (balancing runs, regression runs on CI).
+Every random roll of the simulation comes from a seeded stream of the world, so the same seed
+and the same inputs always give the same run (see src/replay.py).
+"""
+import random
+import hashlib
+import src.settings, src.structure, src.player, src.camera, src.inputs, src.spatial_hash, src.bullet_pool, src.collision, src.profiler, src.ai_lod, src.enemy_batch, src.enemy_pool, src.geometry, src.chunks, src.snapshot, src.streams
+
+
+class World:
+    def __init__(self, level=0, seed=None):
+        self.structure = src.structure.STRUCTURE
+        # seed of every random stream of the world, a fresh one is picked when none is given
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        # debug flag (toggled by the game window, kept across restarts)
+        self.debug_mode = False
+        self.door_proximity_distance = 32  # Distance to trigger door opening
+        # spatial hash of live enemies, rebuilt every tick for bullet hit tests
+        self.enemy_grid = src.spatial_hash.SpatialHash()
+        # every projectile of the world (player, enemies, turrets)
+        self.bullets = src.bullet_pool.BulletPool()
+        # puts far, patrolling enemies to sleep and replays their frames exactly when they wake up
+        self.ai_lod = src.ai_lod.AILodScheduler()
+        # batched enemy update (src/enemy_batch.py), None runs the per-enemy loop
+        self.enemy_batch = None
+        # per-subsystem frame timings (disabled until someone turns it on)
+        self.profiler = src.profiler.Profiler()
+        # released enemies, reset in place when an enemy of the same type spawns
+        self.enemy_pool = src.enemy_pool.EnemyPool()
+        # parks the asleep enemies of the chunks away from the camera (src/chunks.py)
+        self.chunks = src.chunks.ChunkStreamer()
+        self.enemies = []
+        # defeated enemies: never updated again, only drawn (at most MAX_CORPSES)
+        self.corpses = []
+        self.player = None
+        # master random stream of the run, None until the first reset
+        self.rng = None
+        self.reset(level)
+
+    def reset(self, level=0, seed=None):
+        """
+        Reset the whole simulation for a fresh start at the given level
+        :param seed: seed of the new run, None rolls it from the stream of the previous run (a restart plays differently)
+        """
+        self.level = level
+        if seed is not None:
+            self.seed = seed
+        elif self.rng is not None:
+            ## the seed of a restart comes from the previous run: still reproducible from the first seed and the inputs
+            self.seed = self.rng.getrandbits(64)
+        # master random stream, every enemy gets its own stream seeded from it
+        self.rng = random.Random(self.seed)
+        ## the player is reset in place across restarts
+        if self.player is None:
+            self.player = src.player.Player()
+        else:
+            self.player.reset()
+        self.player.level = level
+        self.player.bullet_pool = self.bullets
+        self.camera = src.camera.Camera()
+        self.camera_x, self.camera_y = self.camera.get_offset()
+        # cheats (toggled by the game window)
+        self.god_mode = False
+        self.infinite_ammo = False
+        # door state
+        self.door_open = False
+        # number of simulated frames
+        self.frame = 0
+        # enemies defeated since the reset (every level)
+        self.defeated = 0
+        self.spawn_enemies()
+        self.player.resetPlayerPos(self.level)
+
+    def spawn_enemies(self):
+        """Spawn the enemies of the current level as defined in the structure"""
+        ## the enemies of the previous level go back to the pool
+        self.enemy_pool.release_all(self.enemies)
+        self.enemy_pool.release_all(self.chunks.loaded_enemies())
+        self.enemy_pool.release_all(self.corpses)
+        self.chunks.clear()
+        self.enemies = []
+        self.corpses = []
+        self.boss_defeated = False
+        self.bullets.clear()
+        ## compile the collision index of the level once, when it loads
+        compiled = src.collision.get_compiled_level(self.level)
+        self.enemy_grid = src.spatial_hash.SpatialHash(width=compiled.bound_x)
+        for enemy_info in self.structure[self.level]["enemies"]:
+            type_index, x, y = enemy_info
+            self.spawn_enemy(type_index, x, y)
+
+    def spawn_enemy(self, type_index, x, y):
+        """Add one enemy to the current level, with its own random stream seeded from the world"""
+        enemy_rng = src.streams.SplitMix(self.rng.getrandbits(64))
+        enemy = self.enemy_pool.acquire(type_index, x, y, self.level, self.bullets, enemy_rng)
+        self.enemies.append(enemy)
+        return enemy
+
+    # === STATE QUERIES ===
+
+    def is_player_dead(self):
+        return self.player.health <= 0
+
+    def is_boss_defeated(self):
+        """Check if a boss is present in the level and dead"""
+        return self.boss_defeated
+
+    def is_finished(self):
+        """An episode is over once the player died or the boss is defeated"""
+        return self.is_player_dead() or self.is_boss_defeated()
+
+    def state_digest(self):
+        """
+        sha1 of the simulation state (player, enemies, bullets, random streams)
+        two runs with the same seed and inputs must end with the same digest
+        """
+        self.sync_enemies()
+        player = self.player
+        parts = [self.frame, self.level, self.door_open, self.boss_defeated, self.god_mode, self.infinite_ammo, self.debug_mode,
+                 player.x, player.y, player.health, player.alive, player.speed, player.current_weapon,
+                 tuple(player.ammo), self.rng.getstate()]
+        for enemy in self.all_enemies():
+            parts.append((enemy.type_index, enemy.x, enemy.y, enemy.hp, enemy.alive, enemy.state,
+                          enemy.rng.getstate()))
+        for enemy in self.corpses:
+            parts.append((enemy.type_index, enemy.x, enemy.y))
+        digest = hashlib.sha1(repr(parts).encode())
+        ## bullets: raw bytes of the live range of the pool
+        n = self.bullets.high
+        for array in (self.bullets.x, self.bullets.y, self.bullets.vx, self.bullets.vy, self.bullets.alive):
+            digest.update(array[:n].tobytes())
+        return digest.hexdigest()
+
+    def snapshot(self):
+        """:return a save state of the simulation (bytes, see src/snapshot.py)"""
+        return src.snapshot.snapshot(self)
+
+    def restore(self, state):
+        """go back to a save state of snapshot(), the run goes on exactly as it did from there"""
+        src.snapshot.restore(self, state)
+
+    def all_enemies(self):
+        """the live enemies of the level, parked ones included, in spawn order"""
+        parked = self.chunks.parked_enemies()
+        if not parked:
+            return self.enemies
+        return sorted(self.enemies + parked, key=src.chunks.spawn_order)
+
+    def sync_enemies(self):
+        """bring the enemies asleep in the AI LOD up to date, call it before reading enemy state outside of step()"""
+        self.chunks.sync()
+        self.ai_lod.sync(self.enemies)
+        self.ai_lod.sync(self.chunks.parked_enemies())
+
+    # === SIMULATION ===
+
+    def step(self, inputs=None):
+        """
+        Advance the simulation by one frame.
+        :param inputs: InputFrame - the player inputs of this frame, None means no input
+        """
+        if inputs is None:
+            inputs = src.inputs.InputFrame()
+
+        # Toggle debug mode (F3)
+        if inputs.toggle_debug:
+            self.debug_mode = not self.debug_mode
+
+        if self.debug_mode:
+            if inputs.speed_up:
+                self.player.speed += 1
+            if inputs.speed_down:
+                self.player.speed -= 1
+
+        # Toggle god_mode (F4)
+        if inputs.toggle_god_mode:
+            self.god_mode = not self.god_mode
+
+        # Toggle infinite ammo (F5)
+        if inputs.toggle_infinite_ammo:
+            self.infinite_ammo = not self.infinite_ammo
+
+        self.frame += 1
+        profiler = self.profiler
+        profiler.next_frame(self.frame)
+        step_start = profiler.stamp()
+        ## get camera offset
+        self.camera_x, self.camera_y = self.camera.get_offset()
+
+        # speed can only be tuned by hand in debug mode
+        if not self.debug_mode:
+            self.player.speed = src.settings.PLAYER_SPEED
+
+        # if player in god mode, always in full hp
+        if self.god_mode:
+            self.player.health = 400
+
+        # if player in infinite ammo, always in full ammo
+        if self.infinite_ammo:
+            self.player.ammo = [8, 30, 10]
+
+        # Reset player movement flag at the start of update
+        self.player.is_moving = False
+
+        # Prevent all actions if player is dead
+        if not self.player.alive:
+            profiler.add("step", step_start)
+            return
+
+        # aiming follows the cursor of this frame
+        self.player.set_cursor(inputs.mouse_x, inputs.mouse_y)
+
+        # Player Movement
+        ## Move Left
+        if inputs.left:
+            self.player.moveLeft()
+
+        ## Move Right
+        elif inputs.right:
+            self.player.moveRight()
+
+        ## Jump control
+        if inputs.jump:
+            self.player.jump()
+
+        ## Dash control
+        if inputs.dash:
+            self.player.dash()
+
+        # Update camera to follow player
+        ## Get the map width from the structure
+        map_width = self.structure[self.level]["mapWH"][0]
+        ## update the camera: to center the player, since player is 16*16, we need to move right and move down 8 (half of the player)
+        start = profiler.stamp()
+        self.camera.update(self.player.x + 8, self.player.y + 8, map_width)
+        profiler.add("camera", start)
+
+        # Fire control
+        if inputs.fire:
+            self.player.fire(self.camera_x)
+
+        # Portal interaction
+        if inputs.interact:
+            self.check_portal_interaction()
+
+        # Check door proximity: if player approaches the portal, the door open.
+        self.check_door_proximity()
+
+        # AI level of detail: the view of this frame, wake everyone while the player's fire line is out
+        self.ai_lod.begin_frame(self.enemies, self.player, self.camera_x)
+        ## enemies parked in the chunks around the view come back
+        self.chunks.begin_frame(self.enemies, self.camera_x, self.ai_lod)
+
+        # PLAYER MAIN UPDATE function
+        start = profiler.stamp()
+        self.player.update(self.level, self.camera_x, self.enemies, inputs)
+        profiler.add("player", start)
+
+        # BULLETS MAIN UPDATE function: move every bullet at once, then resolve hits
+        start = profiler.stamp()
+        self.bullets.integrate(self.level)
+        self.chunks.wake(self.enemies, self.player, self.ai_lod, self.bullets)
+        self.ai_lod.sync_for_bullets(self.enemies, self.bullets)
+        self.bullets.collide_enemies(self.enemies, self.enemy_grid)
+        self.bullets.collide_player(self.player)
+        profiler.add("bullets", start)
+
+        # ENEMIES MAIN UPDATE function
+        enemies_start = profiler.stamp()
+        ai_lod = self.ai_lod
+        if self.enemy_batch is not None:
+            ## patrol / chase / retreat frames as array operations, the others run enemy.update in order
+            self.enemy_batch.update(self.enemies, self.player, self.camera_x, ai_lod, profiler)
+        else:
+            for enemy in self.enemies:
+                ## asleep enemies skip the frame (replayed when they wake up)
+                if ai_lod.skip(enemy, self.player):
+                    continue
+                start = profiler.stamp()
+                ## if BOSS summon
+                if hasattr(enemy, 'summon_active'):
+                    enemy.update(self.player, self.camera_x, self.enemies)
+                else:
+                    ## regular update each enemy
+                    enemy.update(self.player, self.camera_x)
+                ## time of each enemy type (only exported, the overlay shows the total)
+                if profiler.enabled:
+                    profiler.add("enemy." + enemy.__class__.__name__, start)
+        profiler.add("enemies", enemies_start)
+
+        # Check for collisions for player's firing
+        start = profiler.stamp()
+        self.check_fire_line_hits()
+        profiler.add("sniper", start)
+
+        # defeated enemies leave the active list, asleep enemies away from the camera are parked in their chunk
+        self.remove_defeated()
+        self.chunks.park(self.enemies)
+
+        # entity and bullet counts of this frame
+        if profiler.enabled:
+            profiler.count("enemy_count", len(self.enemies) + self.chunks.parked_count + len(self.corpses))
+            profiler.count("enemy_alive_count", len(self.enemies) + self.chunks.parked_count)
+            profiler.count("enemy_parked_count", self.chunks.parked_count)
+            profiler.count("bullet_count", len(self.bullets))
+            profiler.count("enemy_asleep_count", ai_lod.asleep)
+            if self.enemy_batch is not None:
+                profiler.count("enemy_batched_count", self.enemy_batch.batched)
+        profiler.add("step", step_start)
+
+    def remove_defeated(self):
+        """move the defeated enemies to the corpses (drawn, never updated), the oldest corpses go back to the pool"""
+        if all(enemy.alive for enemy in self.enemies):
+            return
+        live = []
+        for enemy in self.enemies:
+            if enemy.alive:
+                live.append(enemy)
+                continue
+            if hasattr(enemy, 'summon_active'):
+                self.boss_defeated = True
+            self.defeated += 1
+            self.corpses.append(enemy)
+        ## in place: the boss appends its summons to this list
+        self.enemies[:] = live
+        if len(self.corpses) > src.enemy_pool.MAX_CORPSES:
+            extra = len(self.corpses) - src.enemy_pool.MAX_CORPSES
+            self.enemy_pool.release_all(self.corpses[:extra])
+            del self.corpses[:extra]
+
+    def check_fire_line_hits(self):
+        """the sniper fire line of the player damages every live enemy it crosses"""
+        if self.player.is_firing and self.player.fire_line:
+            ## get the bullet position
+            x0, y0, x1, y1 = self.player.fire_line
+            ## one vectorized test of the line against every live enemy, the ones it crosses take damage
+            for enemy in src.geometry.segment_hits(x0, y0, x1, y1, self.enemies):
+                enemy.take_damage(1)
+
+    def check_portal_interaction(self):
+        """
+        Check if player is near portal and handle level transition
+        function is triggered when player press 'z' to go to next level
+        """
+        if "portal" in self.structure[self.level]:
+            portal = self.structure[self.level]["portal"]
+            if portal is not None:
+                ## get portal position and size
+                portal_x, portal_y, portal_w, portal_h = portal
+                ## get player positon
+                player_x, player_y = self.player.x, self.player.y
+                ## Check if player is within portal area
+                if (portal_x <= player_x <= portal_x + portal_w and
+                    portal_y <= player_y <= portal_y + portal_h):
+                    ## trigger transition: move the player and let camera follow
+                    self.transition_to_next_level()
+
+    def check_door_proximity(self):
+        """Check if player is near the door and update door state"""
+        if "portal" in self.structure[self.level]:
+            portal = self.structure[self.level]["portal"]
+            if portal is not None:
+                ## get portal position [absolute] and size
+                portal_x, portal_y, portal_w, portal_h = portal
+                ## get center position of player
+                player_x, player_y = self.player.x + 8, self.player.y + 8  # Player center
+                ## Calculate distance between player and door (center)
+                door_center_x = portal_x + portal_w // 2
+                door_center_y = portal_y + portal_h // 2
+                ## calculate the distance using Euclidean distance formula: sqrt((x2 - x1)^2 + (y2 - y1)^2)
+                distance = ((player_x - door_center_x) ** 2 + (player_y - door_center_y) ** 2) ** 0.5
+                ## Update door state based on proximity
+                self.door_open = distance <= self.door_proximity_distance
+            else:
+                ## door will never open since there is no door
+                self.door_open = False
+
+    def transition_to_next_level(self):
+        """Transition to the next level"""
+        # increment to game level
+        self.level += 1
+        self.player.level += 1
+        # if the level is not in the map, go back to level 0
+        if self.level not in self.structure:
+            self.level = 0
+        ## Spawn new enemies for the new level
+        self.spawn_enemies()
+        ## Reset player position for new level
+        self.player.resetPlayerPos(self.level)